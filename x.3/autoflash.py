@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino auto-flash daemon
+
+    Wait for Pinguino boards to appear in bootloader mode and upload the
+    same program into each of them as soon as it is plugged, without any
+    click, then log the result, the duration and the throughput of each
+    upload.
+
+    usage:  ./autoflash.py --pinguino4550 [-i INTERVAL] [-j JOBS] [-l LOGFILE]
+                           [-e EVENTS] [-m MODE] [--verify] [-n COUNT]
+                           program.hex
+
+    The USB busses are polled every INTERVAL seconds for the vendor and
+    product of the board. A board is flashed once when it appears, and
+    again only after it has been unplugged or reset. The .hex file is read
+    again for each board, so that it may be rebuilt while the daemon runs.
+    Stop it with Ctrl-C. The boot2 and boot4 8-bit bootloaders and the
+    32-bit HID bootloader are supported.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os, sys, time
+import threading
+from multiprocessing.pool import ThreadPool
+
+import usb
+
+from wxgui import argparse
+from wxgui.boards import boardlist
+from wxgui.uploader.uploader import baseUploader, getUploaderClass
+from gang import LogBuffer, flashDevice
+
+########################################################################
+class AutoFlash:
+    """ flash each board appearing on the USB busses """
+
+    #----------------------------------------------------------------------
+    def __init__(self, board, filename, mode, verify, logfile, jobs=1, eventlog=None):
+        self.board = board
+        self.filename = filename
+        self.mode = mode
+        self.verify = verify
+        self.logfile = logfile
+        self.eventlog = eventlog    # JSON log of the upload events
+        self.lock = threading.Lock()
+        self.pool = ThreadPool(jobs)
+        self.known = set()      # boards flashed or being flashed, still connected
+        self.busy = set()       # boards being flashed
+        self.started = 0
+        self.flashed = 0
+        self.failed = 0
+        self.totalbytes = 0
+        self.totaltime = 0.0
+        self.t0 = time.time()
+
+    #----------------------------------------------------------------------
+    def log(self, message):
+        """ print message and append it to the log file """
+        line = time.strftime("%Y-%m-%d %H:%M:%S ") + message
+        self.lock.acquire()
+        try:
+            print line
+            sys.stdout.flush()
+            fichier = open(self.logfile, 'a')
+            fichier.write(line + "\n")
+            fichier.close()
+        finally:
+            self.lock.release()
+
+    #----------------------------------------------------------------------
+    def getDevices(self):
+        """ list of (bus:address, device) of the boards in bootloader mode """
+        uploader = getUploaderClass(self.board)(LogBuffer(), self.filename, self.board)
+        return uploader.getDevices()
+
+    #----------------------------------------------------------------------
+    def poll(self):
+        """ start an upload for each new board """
+        devices = self.getDevices()
+        present = set([name for name, device in devices])
+        self.lock.acquire()
+        try:
+            # unplugged or reset boards may be flashed again
+            self.known = (self.known & present) | self.busy
+            new = [(name, device) for name, device in devices if name not in self.known]
+            for name, device in new:
+                self.known.add(name)
+                self.busy.add(name)
+        finally:
+            self.lock.release()
+        for name, device in new:
+            self.start(name, device)
+
+    #----------------------------------------------------------------------
+    def start(self, name, device):
+        self.started = self.started + 1
+        self.log("%s found, flashing %s" % (name, os.path.basename(self.filename)))
+        job = (name, device, self.board, self.filename, self.mode, self.verify, self.eventlog)
+        self.pool.apply_async(flashDevice, (job,), callback=self.done)
+
+    #----------------------------------------------------------------------
+    def done(self, result):
+        """ log the result of one upload """
+        self.lock.acquire()
+        try:
+            self.busy.discard(result['device'])
+            self.totaltime = self.totaltime + result['duration']
+            if result['status'] == 'ok':
+                self.flashed = self.flashed + 1
+                self.totalbytes = self.totalbytes + result['bytes']
+            else:
+                self.failed = self.failed + 1
+        finally:
+            self.lock.release()
+        if result['status'] == 'ok':
+            self.log("%s ok %.1fs %d bytes %.1f kB/s" % (result['device'],
+                result['duration'], result['bytes'], result['rate'] / 1024.0))
+        else:
+            self.log("%s error %.1fs %s" % (result['device'], result['duration'], result['error']))
+
+    #----------------------------------------------------------------------
+    def run(self, interval, count=0):
+        """ poll until interrupted, or until count boards are flashed """
+        self.log("waiting for %s boards, program %s" % (self.board.name, self.filename))
+        try:
+            while not count or self.started < count:
+                try:
+                    self.poll()
+                except usb.USBError, e:
+                    # the bus changed while it was scanned
+                    self.log("USB error %s" % e)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        self.pool.close()
+        self.pool.join()
+        self.summary()
+
+    #----------------------------------------------------------------------
+    def summary(self):
+        elapsed = time.time() - self.t0
+        boards = self.flashed + self.failed
+        message = "%d boards, %d failed in %.1f seconds" % (boards, self.failed, elapsed)
+        if boards:
+            message = message + ", %.1fs per upload, %.1f boards per hour" % \
+                (self.totaltime / boards, boards * 3600.0 / elapsed)
+        if self.totaltime:
+            message = message + ", %.1f kB/s" % (self.totalbytes / 1024.0 / self.totaltime)
+        self.log(message)
+
+#----------------------------------------------------------------------
+def getAutoFlashOptions():
+    parser = argparse.ArgumentParser(description='*** Pinguino auto-flash daemon ***')
+    parser.add_argument('-i', '--interval', dest='interval', type=float, default=0.25, help='seconds between two scans of the USB busses (default: 0.25)')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=4, help='number of boards flashed at the same time (default: 4)')
+    parser.add_argument('-l', '--log', dest='logfile', default='autoflash.log', help='log file (default: autoflash.log)')
+    parser.add_argument('-e', '--events', dest='events', default=None, help='append the upload events to EVENTS, one JSON object per line')
+    parser.add_argument('-n', '--count', dest='count', type=int, default=0, help='stop once COUNT boards are done (default: never)')
+    parser.add_argument('-m', '--mode', dest='mode', default=baseUploader.UPLOAD_FULL,
+                        choices=[baseUploader.UPLOAD_FULL, baseUploader.UPLOAD_SKIPBLANK, baseUploader.UPLOAD_DELTA],
+                        help='upload mode (default: full)')
+    parser.add_argument('--verify', dest='verify', action='store_true', default=False, help='read back the program once written')
+    for b in range(len(boardlist)):
+        parser.add_argument(    boardlist[b].longarg,
+                                    dest='board',
+                                    const=b,
+                                    action='store_const',
+                                    help='flash ' + boardlist[b].board + ' boards')
+    parser.add_argument('program', help='.hex file, or the .pde next to it')
+    return parser.parse_args()
+
+# ------------------------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    options = getAutoFlashOptions()
+    if options.board is None:
+        print "a board option is needed, see --help"
+        sys.exit(1)
+    board = boardlist[options.board]
+    if board.bldr not in ('boot2', 'boot4', 'microchip'):
+        print "no auto-flash for " + board.name
+        sys.exit(1)
+    filename = os.path.splitext(os.path.abspath(options.program))[0] + '.hex'
+    if not os.path.isfile(filename):
+        print "no such file " + filename
+        sys.exit(1)
+
+    eventlog = options.events
+    if eventlog is not None:
+        eventlog = os.path.abspath(eventlog)
+    daemon = AutoFlash(board, filename, options.mode, options.verify,
+                       os.path.abspath(options.logfile), max(1, options.jobs), eventlog)
+    daemon.run(options.interval, options.count)
+    if daemon.failed:
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino batch compiler
+
+    Compile a set of sketches for a set of boards, spreading the builds
+    over all the processors, and save the results in a JSON file.
+
+    usage:  ./batch.py [-j JOBS] [-o RESULTS] [-d HEXDIR] [--pinguino2550 ...]
+                       [sketch.pde or directory ...]
+
+    Without board argument, sketches are compiled for every board of
+    boardlist. Without sketch argument, every example is compiled.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os, sys, time, json
+import multiprocessing
+from wxgui.builder import *
+
+# ------------------------------------------------------------------------------
+# worker processes
+# ------------------------------------------------------------------------------
+
+pobject=None
+
+def initWorker():
+    """ each worker builds its own Builder object once """
+    global pobject
+    pobject = Builder()
+    pobject.setOSvariables()
+    # messages are kept for the results instead of being printed
+    pobject.messages = []
+
+#----------------------------------------------------------------------
+def buildSketch(job):
+    """ compile one sketch for one board and return its result """
+    sketch, b, hexdir = job
+    board = boardlist[b]
+    result = {  'sketch': sketch,
+                'board': board.name,
+                'status': 'error',
+                'codesize': None,
+                'memsize': board.memend - board.memstart,
+                'duration': 0,
+                'error': None }
+    t0 = time.time()
+    del pobject.messages[:]
+    pobject.diagnostics = []
+    fname, extension = os.path.splitext(sketch)
+    builddir = pobject.newBuildDir(board)
+    try:
+        if hexdir is None:
+            output = os.path.join(builddir, 'sketch.hex')
+        else:
+            output = os.path.join(hexdir, board.board, getSketchName(fname) + '.hex')
+            if not os.path.isdir(os.path.dirname(output)):
+                try:
+                    os.makedirs(os.path.dirname(output))
+                except OSError:
+                    # created by another worker meanwhile
+                    pass
+        try:
+            if pobject.build(fname, board, builddir, t0, output) == True:
+                result['status'] = 'ok'
+                result['codesize'] = pobject.getCodeBytes(output, board)
+                if hexdir is not None:
+                    result['hex'] = output
+        except Exception, e:
+            pobject.messages.append("error %s: %s\n" % (e.__class__.__name__, e))
+    finally:
+        pobject.removeBuildDir(builddir)
+    result['duration'] = round(time.time() - t0, 3)
+    if result['status'] != 'ok':
+        result['error'] = getFirstError(pobject) or "unknown error"
+    return result
+
+#----------------------------------------------------------------------
+def getFirstError(pobject):
+    """ first error of the compiler, else first error message """
+    for diagnostic in pobject.diagnostics:
+        if diagnostic.severity == 'error':
+            return str(diagnostic)
+    for message in pobject.messages:
+        for line in message.split("\n"):
+            if line.find("error")!=-1:
+                return line.strip()
+    return None
+
+# ------------------------------------------------------------------------------
+# sketches and boards
+# ------------------------------------------------------------------------------
+
+def getSketchName(fname):
+    """ path of the sketch relative to Pinguino directory, if possible """
+    name = os.path.relpath(fname, HOME_DIR)
+    if name.startswith(os.pardir):
+        name = os.path.basename(fname)
+    return name
+
+#----------------------------------------------------------------------
+def findSketches(paths):
+    sketches = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for fichier in sorted(files):
+                    if os.path.splitext(fichier)[1] == '.pde':
+                        sketches.append(os.path.abspath(os.path.join(root, fichier)))
+        elif os.path.splitext(path)[1] == '.pde':
+            sketches.append(os.path.abspath(path))
+        else:
+            print "bad file extension, it should be .pde: " + path
+            sys.exit(1)
+    return sketches
+
+#----------------------------------------------------------------------
+def getBatchOptions():
+    parser = argparse.ArgumentParser(description='*** Pinguino batch compiler ***')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=multiprocessing.cpu_count(), help='number of builds running at the same time (default: number of processors)')
+    parser.add_argument('-o', '--output', dest='output', default='results.json', help='JSON results file (default: results.json)')
+    parser.add_argument('-d', '--hexdir', dest='hexdir', default=None, help='keep .hex files in HEXDIR/<board>/')
+    for b in range(len(boardlist)):
+        parser.add_argument(    boardlist[b].longarg,
+                                    dest='boards',
+                                    const=b,
+                                    action='append_const',
+                                    help='compile code for ' + boardlist[b].board + ' board')
+    parser.add_argument('sketches', nargs='*', default=[EXAMPLES_DIR], help='.pde files or directories (default: examples)')
+    return parser.parse_args()
+
+# ------------------------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    options = getBatchOptions()
+    boards = options.boards or range(len(boardlist))
+    sketches = findSketches(options.sketches)
+    hexdir = options.hexdir
+    if hexdir is not None:
+        hexdir = os.path.abspath(hexdir)
+
+    jobs = []
+    for sketch in sketches:
+        for b in boards:
+            jobs.append((sketch, b, hexdir))
+
+    print "%d sketches, %d boards, %d builds on %d processes" % \
+        (len(sketches), len(boards), len(jobs), options.jobs)
+
+    t0 = time.time()
+    results = []
+    failed = 0
+    pool = multiprocessing.Pool(max(1, options.jobs), initWorker)
+    try:
+        for result in pool.imap_unordered(buildSketch, jobs):
+            results.append(result)
+            if result['status'] == 'ok':
+                print "ok     %-20s %s (%d bytes)" % (result['board'], result['sketch'], result['codesize'])
+            else:
+                failed = failed + 1
+                print "ERROR  %-20s %s\n\t%s" % (result['board'], result['sketch'], result['error'])
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        sys.exit(1)
+    pool.join()
+
+    results.sort(key=lambda r: (r['sketch'], r['board']))
+    fichier = open(options.output, 'w')
+    json.dump({ 'builds': len(results),
+                'failed': failed,
+                'duration': round(time.time() - t0, 3),
+                'results': results }, fichier, indent=1)
+    fichier.close()
+
+    print "%d builds, %d failed in %.1f seconds, results in %s" % \
+        (len(results), failed, time.time() - t0, options.output)
+    if failed:
+        sys.exit(1)
+    sys.exit(0)
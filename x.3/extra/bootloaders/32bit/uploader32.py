@@ -31,6 +31,10 @@ import sys
 import os
 import usb
 
+# wxgui is in Pinguino's home directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir))
+from wxgui.hexfile import readHex, HexError, HexChecksumError, HexRecordError
+
 # Hex format record types
 # --------------------------------------------------------------------------
 
@@ -165,7 +169,7 @@ def issueBlock(handle, address, block):
 		usbBuf[MAXPACKETSIZE - length + i] = block[i]
 	# write data packet on usb device
 	status = usbWrite(handle, usbBuf)
-	if (status == ERR_NONE) and (len < BLOCKSIZE):
+	if (status == ERR_NONE) and (length < BLOCKSIZE):
 		# Short data packets need flushing
 		#usbBuf = [PROGRAM_COMPLETE_CMD] * MAXPACKETSIZE
 		usbBuf[0] = PROGRAM_COMPLETE_CMD
@@ -186,117 +190,33 @@ def hexWrite(handle, filename):
 			03 + 00 + 30 + 00 + 02 + 33 + 7A = E2, 2's complement is 1E
 	"""
 
-	hexBuf		= []
-	bufLen		= 0
-	addrHi		= 0
-	addrSave	= 0
-	addr32		= 0
-	codesize	= 0
-
 	# load hex file
 	# ----------------------------------------------------------------------
 
-	fichier = open(filename, 'r')
-	if fichier == "":
+	try:
+		image = readHex(filename)
+	except IOError:
 		return ERR_FILE_NOT_FOUND
-	lines = fichier.readlines()
-	fichier.close()
+	except HexChecksumError:
+		return ERR_HEX_CHECKSUM
+	except HexRecordError:
+		return ERR_HEX_RECORD
+	except HexError:
+		return ERR_HEX_SYNTAX
 
-	# read each line in file
+	codesize = image.getSize()
+
+	# issue each run of contiguous data by blocks of BLOCKSIZE bytes
 	# ----------------------------------------------------------------------
 
-	for line in lines:
-		byte_count = int(line[1:3], 16)
-		addrLo = int(line[3:7], 16) # lower 16 bits (bits 0-15) of the data address
-		record_type= int(line[7:9], 16)
-
-		# checksum calculation
-		end = 9 + byte_count * 2 # position of checksum at end of line
-		checksum = int(line[end:end+2], 16)
-		cs = 0
-		i = 1
-		while i < end:
-			cs = cs + (0x100 - int(line[i:i+2], 16) ) & 0xff # eq. to not(i)
-			i = i + 2
-		if checksum != cs:
-			return ERR_HEX_CHECKSUM
-
-		# data record
-		if record_type == Data_Record:
-			# count bytes
-			codesize += byte_count
-			# If new record address is not contiguous with prior record,
-			# issue accumulated hex data (if any) and start anew
-			if (addrHi + addrLo) != addr32:
-				addr32 = addrHi + addrLo
-				if bufLen:
-					status = issueBlock(handle, addrSave, hexBuf)
-					if status != ERR_NONE: return status
-					bufLen = 0
-					hexBuf = []
-				addrSave = addr32
-			# Parse bytes from line into hexBuf
-			for i in range(byte_count):
-				hexBuf.append(int(line[9 + (2 * i) : 11 + (2 * i)], 16))
-				bufLen += 1
-				# If buffer is full, issue block and start anew
-				if bufLen == BLOCKSIZE:
-					status = issueBlock(handle, addrSave, hexBuf)
-					if status != ERR_NONE: return status
-					bufLen = 0
-					hexBuf = []
-				# Increment address, wraparound as per hexfile spec
-				if addr32 == 0xffffffff:
-					# Wraparound.  If any hex data, issue and start anew
-					if bufLen:
-						status = issueBlock(handle, addrSave, hexBuf)
-						if status != ERR_NONE: return status
-						bufLen = 0
-						hexBuf = []
-					addr32 = 0
-				else:
-					addr32 += 1
-				# If issueBlock() used, save new address for next block
-				if not bufLen:
-					addrSave = addr32;
-
-		# end of file record
-		elif record_type == End_Of_File_Record:
-			break
-
-		# extended linear address record
-		elif record_type == Extended_Linear_Address_Record:
-			# upper 16 bits (bits 16-31) of the data address
-			addrHi = int(line[9:13], 16) << 16
-			addr32 = addrHi + addrLo
-			# Assume this means a noncontiguous address jump; issue block
-			# and start anew.  The prior noncontiguous address code should
-			# already have this covered, but in the freak case of an
-			# extended address record with no subsequent data, make sure
-			# the last of the data is issued.
-			if bufLen:
-				status = issueBlock(handle, addrSave, hexBuf)
-				if status != ERR_NONE: return status
-				bufLen = 0;
-				hexBuf = []
-				addrSave = addr32;
-
-		# unsupported record type
-		else:
-			return ERR_HEX_RECORD
-
-	# At end of file, issue any residual data (counters reset at top)
-	if bufLen:
-		status = issueBlock(handle, addrSave, hexBuf)
-		if status != ERR_NONE: return status
-	# Make sure last data is flushed (issueBlock() does this
-	# automatically if less than 56 bytes...but if the last packet
-	# is exactly this size, an explicit flush is done here)
-	if bufLen == BLOCKSIZE:
-		#usbBuf = [PROGRAM_COMPLETE_CMD] * MAXPACKETSIZE
-		usbBuf = [0] * MAXPACKETSIZE
-		usbBuf[0] = PROGRAM_COMPLETE_CMD
-		return usbWrite(handle, usbBuf)
+	for address, data in image.getSegments():
+		for i in range(0, len(data), BLOCKSIZE):
+			status = issueBlock(handle, address + i, data[i:i + BLOCKSIZE])
+			if status != ERR_NONE: return status
+		# a run ending with a full block wasn't flushed by issueBlock
+		if len(data) % BLOCKSIZE == 0:
+			status = issueBlock(handle, address + len(data), [])
+			if status != ERR_NONE: return status
 		
 	print "%d bytes written" % codesize
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino gang programmer
+
+    Upload the same program into every connected Pinguino in bootloader
+    mode, all at the same time, and print the result of each board.
+
+    usage:  ./gang.py --pinguino4550 [-j JOBS] [-m MODE] [--verify]
+                      [-o RESULTS] [-e EVENTS] program.hex
+
+    Boards are found by the USB vendor and product of the board and
+    named by their bus and address (bus:address). The boot2 and boot4
+    8-bit bootloaders and the 32-bit HID bootloader are supported.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os, sys, time, json
+from multiprocessing.pool import ThreadPool
+
+from wxgui import argparse
+from wxgui.boards import boardlist
+from wxgui.uploader.uploader import baseUploader, getUploaderClass, UploadLog
+
+########################################################################
+class LogBuffer:
+    """ log window of one board """
+
+    #----------------------------------------------------------------------
+    def __init__(self):
+        self.lines = []
+
+    #----------------------------------------------------------------------
+    def WriteText(self, message):
+        self.lines.append(message)
+
+    #----------------------------------------------------------------------
+    def getText(self):
+        return "".join(self.lines)
+
+# ------------------------------------------------------------------------------
+# flashDevice: upload the program into one board
+# ------------------------------------------------------------------------------
+
+def flashDevice(job):
+    name, device, board, filename, mode, verify, eventlog = job
+    output = LogBuffer()
+    result = {  'device': name,
+                'status': 'error',
+                'duration': 0,
+                'bytes': 0,
+                'rate': 0,
+                'error': None }
+    t0 = time.time()
+    uploader = getUploaderClass(board)(output, filename, board, mode, verify)
+    uploader.device = device
+    if eventlog is not None:
+        uploader.addListener(UploadLog(eventlog, device=name))
+    try:
+        status = uploader.upload()
+    except Exception, e:
+        output.WriteText("error %s: %s\n" % (e.__class__.__name__, e))
+        status = None
+    result['duration'] = round(time.time() - t0, 3)
+    if status == baseUploader.ERR_NONE:
+        result['bytes'] = uploader.codesize
+        result['rate'] = int(round(uploader.codesize / max(result['duration'], 0.001)))
+    lines = output.getText().splitlines()
+    if status == baseUploader.ERR_NONE:
+        result['status'] = 'ok'
+    elif lines:
+        # last message, without the details indented under it
+        messages = [line for line in lines if not line.startswith(" ")]
+        result['error'] = (messages or lines)[-1].strip()
+    else:
+        result['error'] = "error %s" % status
+    result['log'] = lines
+    return result
+
+#----------------------------------------------------------------------
+def getGangOptions():
+    parser = argparse.ArgumentParser(description='*** Pinguino gang programmer ***')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=0, help='number of boards flashed at the same time (default: all)')
+    parser.add_argument('-m', '--mode', dest='mode', default=baseUploader.UPLOAD_FULL,
+                        choices=[baseUploader.UPLOAD_FULL, baseUploader.UPLOAD_SKIPBLANK, baseUploader.UPLOAD_DELTA],
+                        help='upload mode (default: full)')
+    parser.add_argument('--verify', dest='verify', action='store_true', default=False, help='read back the program once written')
+    parser.add_argument('-o', '--output', dest='output', default=None, help='JSON results file')
+    parser.add_argument('-e', '--events', dest='events', default=None, help='append the upload events to EVENTS, one JSON object per line')
+    for b in range(len(boardlist)):
+        parser.add_argument(    boardlist[b].longarg,
+                                    dest='board',
+                                    const=b,
+                                    action='store_const',
+                                    help='flash ' + boardlist[b].board + ' boards')
+    parser.add_argument('program', help='.hex file, or the .pde next to it')
+    return parser.parse_args()
+
+# ------------------------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    options = getGangOptions()
+    if options.board is None:
+        print "a board option is needed, see --help"
+        sys.exit(1)
+    board = boardlist[options.board]
+    if board.bldr not in ('boot2', 'boot4', 'microchip'):
+        print "no gang programming for " + board.name
+        sys.exit(1)
+    filename = os.path.splitext(os.path.abspath(options.program))[0] + '.hex'
+    if not os.path.isfile(filename):
+        print "no such file " + filename
+        sys.exit(1)
+
+    devices = getUploaderClass(board)(LogBuffer(), filename, board).getDevices()
+    if not devices:
+        print board.name + " not found"
+        print "Are your devices connected and in bootloader mode ?"
+        sys.exit(1)
+    jobs = options.jobs or len(devices)
+    print "%d %s found, flashing %s on %d threads" % \
+        (len(devices), board.name, os.path.basename(filename), jobs)
+
+    eventlog = options.events
+    if eventlog is not None:
+        eventlog = os.path.abspath(eventlog)
+
+    t0 = time.time()
+    pool = ThreadPool(jobs)
+    try:
+        results = pool.map(flashDevice,
+                           [(name, device, board, filename, options.mode, options.verify, eventlog)
+                            for name, device in devices])
+    finally:
+        pool.close()
+    pool.join()
+
+    failed = 0
+    print "%-12s %-6s %9s %9s  %s" % ("device", "status", "duration", "bytes/s", "error")
+    for result in sorted(results, key=lambda r: r['device']):
+        if result['status'] != 'ok':
+            failed = failed + 1
+        print "%-12s %-6s %8.1fs %9d  %s" % (result['device'], result['status'],
+                                             result['duration'], result['rate'], result['error'] or "")
+
+    if options.output is not None:
+        fichier = open(options.output, 'w')
+        json.dump({ 'program': filename,
+                    'board': board.name,
+                    'devices': len(results),
+                    'failed': failed,
+                    'duration': round(time.time() - t0, 3),
+                    'results': results }, fichier, indent=1)
+        fichier.close()
+
+    print "%d boards, %d failed in %.1f seconds" % (len(results), failed, time.time() - t0)
+    if failed:
+        sys.exit(1)
+    sys.exit(0)
@@ -1,6 +1,5 @@
 #!/usr/bin/env python
 #-*- coding: utf-8 -*-
 
-import check
-import pinguino
-import _trad
+# nothing is imported here: wxgui.builder must be usable without wx,
+# the IDE imports wxgui.pinguino itself
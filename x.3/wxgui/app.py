@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino IDE application: splash screen and main loop
+
+    Only imported when the graphic user interface is started, so that
+    command line builds do not need wx.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import wx, os, sys
+from wxgui.pinguino import Pinguino, setGui
+from wxgui._trad import _
+
+
+########################################################################
+class MySplashScreen(wx.SplashScreen):
+    #----------------------------------------------------------------------
+    def __init__(self):
+        """"""
+        #bmp = wx.Image(os.path.join("theme", "logoX3.png")).ConvertToBitmap()
+        image = wx.Image(os.path.join("theme", "logoX3.png"), wx.BITMAP_TYPE_PNG)
+        image = image.Scale(500, 375, wx.IMAGE_QUALITY_HIGH)
+        bmp = wx.BitmapFromImage(image)
+        memDC = wx.MemoryDC()
+        memDC.SetFont(wx.Font(10, wx.SWISS, wx.ITALIC, wx.NORMAL))
+        memDC.SetTextForeground(wx.BLACK)
+        memDC.SelectObject(bmp)
+        memDC.DrawText(_("loading..."), 10, 355)
+        memDC.SelectObject(wx.NullBitmap)
+        # TODO : replace wx.BORDER_SIMPLE (windows only)		
+        wx.SplashScreen.__init__(self, bmp,
+                                 wx.SPLASH_CENTRE_ON_SCREEN | wx.SPLASH_TIMEOUT,
+                                 5000, None, -1, style=wx.BORDER_SIMPLE)
+        self.Bind(wx.EVT_CLOSE, self.OnClose)
+        self.fc = wx.FutureCall(2000, self.ShowMain)
+
+    #----------------------------------------------------------------------
+    def OnClose(self, evt):
+        evt.Skip()
+        self.Hide()
+        if self.fc.IsRunning():
+            self.fc.Stop()
+            self.ShowMain()
+
+    #----------------------------------------------------------------------
+    def ShowMain(self):
+        setGui(True)
+        frame = Pinguino(None)
+        frame.__initPinguino__(None)
+        wx.GetApp().SetTopWindow(frame)
+        #app.cent
+        frame.Show()
+        if self.fc.IsRunning(): self.Raise()
+
+########################################################################
+class MyApp(wx.App):
+    def OnInit(self):
+        if sys.platform=='darwin':
+            setGui(True)
+            frame = Pinguino(None)
+            frame.__initPinguino__(None)
+            wx.GetApp().SetTopWindow(frame)
+            #app.cent
+            frame.Show()
+        else:			
+            splash = MySplashScreen()
+            splash.Show()
+        return True
+
+
+#----------------------------------------------------------------------
+def main():
+    app = MyApp(False)
+    #app.SetTopWindow(frame)
+    app.MainLoop()
@@ -24,8 +24,6 @@
 	Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
 -------------------------------------------------------------------------"""
 
-import wx	# wx.NewId()
-
 # vendors id
 MICROCHIP_ID = 0x04D8
 
@@ -33,9 +31,10 @@ MICROCHIP_ID = 0x04D8
 PIC8_ID = 0xFEAA
 PIC32_ID = 0x003C
 
+# board.id (menu id) is given by the IDE, boards do not depend on wx
+
 class Pinguino2550:
 	name='Pinguino 2550'
-	id=wx.NewId()
 	arch=8
 	bldr='boot2'
 	proc='18f2550'
@@ -49,7 +48,6 @@ class Pinguino2550:
 
 class Pinguino4550:
 	name='Pinguino 4550'
-	id=wx.NewId()
 	arch=8
 	bldr='boot2'
 	proc='18f4550'
@@ -63,7 +61,6 @@ class Pinguino4550:
 
 class Pinguino26J50:
 	name='Pinguino 26J50'
-	id=wx.NewId()
 	arch=8
 	bldr='boot4'
 	proc='18f26j50'
@@ -77,7 +74,6 @@ class Pinguino26J50:
 
 class PICuno_Equo:
 	name='PICuno Equo'
-	id=wx.NewId()
 	arch=8
 	bldr='boot2'
 	proc='18f4550'
@@ -92,7 +88,6 @@ class PICuno_Equo:
 
 class FreeJALduino:
 	name='FreeJALduino'
-	id=wx.NewId()
 	arch=8
 	bldr='boot2'
 	proc='18f2550'
@@ -107,7 +102,6 @@ class FreeJALduino:
 
 class PIC32_Pinguino:
 	name='PIC32 Pinguino'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX440F256H'
@@ -121,7 +115,6 @@ class PIC32_Pinguino:
 
 class PIC32_Pinguino_OTG:
 	name='PIC32 Pinguino OTG'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX440F256H'
@@ -135,7 +128,6 @@ class PIC32_Pinguino_OTG:
 
 class PIC32_Pinguino_Micro:
 	name='PIC32 Pinguino Micro'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX440F256H'
@@ -149,7 +141,6 @@ class PIC32_Pinguino_Micro:
 
 class PIC32_Pinguino_220:
 	name='PIC32 Pinguino 220'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX220F032D'
@@ -163,7 +154,6 @@ class PIC32_Pinguino_220:
 
 class GENERIC32MX250F128:
 	name='GENERIC32MX250F128'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX250F128B'
@@ -177,7 +167,6 @@ class GENERIC32MX250F128:
 
 class GENERIC32MX220F032:
 	name='GENERIC32MX220F032'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX220F032B'
@@ -191,7 +180,6 @@ class GENERIC32MX220F032:
 		
 class Emperor_460:
 	name='Emperor 460'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX460F512L'
@@ -205,7 +193,6 @@ class Emperor_460:
 
 class Emperor_795:
 	name='Emperor 795'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX795F512L'
@@ -219,7 +206,6 @@ class Emperor_795:
 
 class UBW32_460:
 	name='UBW32 460'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX460F512L'
@@ -233,7 +219,6 @@ class UBW32_460:
 
 class UBW32_795:
 	name='UBW32 795'
-	id=wx.NewId()
 	arch=32
 	bldr='microchip'
 	proc='32MX795F512L'
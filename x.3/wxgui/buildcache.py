@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino build cache
+
+    Keep the .hex of previous builds, addressed by a hash of everything
+    they depend on, so that an unchanged sketch is not compiled again.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os
+import shutil
+import hashlib
+
+# bump it each time the way keys are computed changes
+CACHE_VERSION = 2
+
+########################################################################
+class BuildCache:
+    """ content-addressed store of .hex files """
+
+    #----------------------------------------------------------------------
+    def __init__(self, cachedir, maxentries=256):
+        self.cachedir = cachedir
+        self.maxentries = maxentries
+
+    #----------------------------------------------------------------------
+    def getKey(self, parts):
+        """ hash of a list of strings """
+        sha = hashlib.sha1()
+        sha.update("pinguino build cache %d\0" % CACHE_VERSION)
+        for part in parts:
+            part = str(part)
+            sha.update("%d\0" % len(part))
+            sha.update(part)
+        return sha.hexdigest()
+
+    #----------------------------------------------------------------------
+    def getPath(self, key):
+        return os.path.join(self.cachedir, key + ".hex")
+
+    #----------------------------------------------------------------------
+    def restore(self, key, destination):
+        """ copy the cached .hex to destination, return False on a miss """
+        path = self.getPath(key)
+        if not os.path.isfile(path):
+            return False
+        try:
+            shutil.copy(path, destination)
+            # most recently used entries are the last to be pruned
+            os.utime(path, None)
+        except (IOError, OSError):
+            return False
+        return True
+
+    #----------------------------------------------------------------------
+    def store(self, key, source):
+        """ add a freshly built .hex to the cache """
+        try:
+            if not os.path.isdir(self.cachedir):
+                os.makedirs(self.cachedir)
+            path = self.getPath(key)
+            # several builds may run at the same time
+            tmp = "%s.%d.tmp" % (path, os.getpid())
+            shutil.copy(source, tmp)
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp, path)
+            self.prune()
+        except (IOError, OSError):
+            # cache is only an optimization
+            pass
+
+    #----------------------------------------------------------------------
+    def prune(self):
+        """ remove the least recently used entries """
+        entries = []
+        for fichier in os.listdir(self.cachedir):
+            if fichier.endswith(".hex"):
+                path = os.path.join(self.cachedir, fichier)
+                entries.append((os.path.getmtime(path), path))
+        if len(entries) > self.maxentries:
+            entries.sort()
+            for mtime, path in entries[:len(entries) - self.maxentries]:
+                os.remove(path)
+
+# ------------------------------------------------------------------------------
+# getFileStamp: name, modification time and size of files (toolchain version)
+# ------------------------------------------------------------------------------
+
+def getFileStamp(paths):
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append("%s:%d:%d" % (path, st.st_mtime, st.st_size))
+        except OSError:
+            stamp.append("%s:missing" % path)
+    return ";".join(stamp)
+
+# ------------------------------------------------------------------------------
+# getTreeStamp: stamp of all the files of a directory tree (libraries)
+# ------------------------------------------------------------------------------
+
+# directory: (its directories, their modification times, its files)
+treeFiles = {}
+
+def getTreeStamp(directory):
+    """ every file is stamped at each call, the tree is only listed again
+    when a file or a directory was added, removed or renamed in it """
+    known = treeFiles.get(directory)
+    if known is None or getFileStamp(known[0]) != known[1]:
+        dirs = []
+        paths = []
+        for root, subdirs, files in os.walk(directory):
+            subdirs.sort()
+            dirs.append(root)
+            files.sort()
+            for fichier in files:
+                paths.append(os.path.join(root, fichier))
+        known = (dirs, getFileStamp(dirs), paths)
+        treeFiles[directory] = known
+    return getFileStamp(known[2])
+
+# ------------------------------------------------------------------------------
+# readContent: content of a file, empty if it does not exist
+# ------------------------------------------------------------------------------
+
+def readContent(path):
+    try:
+        fichier = open(path, 'rb')
+        try:
+            return fichier.read()
+        finally:
+            fichier.close()
+    except IOError:
+        return ""
@@ -0,0 +1,629 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino builder
+
+    Preprocess, compile and link a sketch without any graphic user
+    interface. Used by the IDE, the command line, the batch compiler and
+    the compile server.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os
+import sys
+import re
+import time
+import shutil
+import tempfile
+import argparse
+
+from wxgui.boards import *
+from wxgui._trad import _
+from wxgui.translator import Defines
+from wxgui.pdl import loadLibrary
+from wxgui.buildcache import BuildCache, getFileStamp, getTreeStamp, readContent
+from wxgui.diagnostics import runTool, killTree
+from wxgui.hexfile import readHex, HexError
+
+# ------------------------------------------------------------------------------
+# current version
+# ------------------------------------------------------------------------------
+
+pinguino_version="x.3"
+
+# ------------------------------------------------------------------------------
+# paths
+# ------------------------------------------------------------------------------
+
+HOME_DIR    = os.getcwd()
+THEME_DIR    = os.path.join(HOME_DIR, 'theme')
+SOURCE_DIR    = os.path.join(HOME_DIR, 'source')
+LOCALE_DIR    = os.path.join(HOME_DIR, 'locale')
+P32_DIR        = os.path.join(HOME_DIR, 'p32')
+P8_DIR        = os.path.join(HOME_DIR, 'p8')
+SVN_DIR        = 'http://pinguino32.googlecode.com/svn/branches/x.3/'
+APP_CONFIG    = os.path.join(HOME_DIR, '.config')
+TEMP_DIR = os.path.join(HOME_DIR, '.temp')
+# per user, the install directory may be shared or read-only
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.pinguino', 'cache')
+EXAMPLES_DIR = os.path.join(HOME_DIR, 'examples')
+
+# ------------------------------------------------------------------------------
+# Builder Class
+# ------------------------------------------------------------------------------
+
+class Builder:
+    """ preprocess, compile and link, setOSvariables() must be called first """
+
+    osdir=""
+    debug_output=0
+    defines=None
+    buildcache=BuildCache(os.path.join(CACHE_DIR, 'build'))
+    buildkeys={}
+    messages=None       # list collecting the messages instead of printing them
+    diagnostics=[]      # diagnostics of the last compile and link
+    buildProcess=None   # compiler tool running, if any
+    buildCancelled=False    # set by cancelBuild, no other tool is started
+
+# ------------------------------------------------------------------------------
+# get OS name and define some OS dependant variable
+# ------------------------------------------------------------------------------
+
+    def setOSvariables(self):
+        if sys.platform == 'darwin':
+            self.osdir = 'macosx'
+            self.debug_port = '/dev/tty.usbmodem1912'
+            self.c8 = 'sdcc'
+            self.make = 'make'
+        elif sys.platform == 'win32':
+            self.osdir = 'win32'
+            self.debug_port = 15
+            self.c8 = 'sdcc.exe'
+            self.make = os.path.join(HOME_DIR, self.osdir, 'p32', 'bin', 'make.exe')
+        else:
+            self.osdir = 'linux'
+            self.debug_port = '/dev/ttyACM0'
+            self.c8 = 'sdcc'
+            self.make = 'make'
+
+# ------------------------------------------------------------------------------
+# displaymsg
+# ------------------------------------------------------------------------------
+
+    def displaymsg(self, message, clearpanel):
+        """ print message, or keep it if messages is a list """
+        if self.messages is not None:
+            if clearpanel==1:
+                del self.messages[:]
+            if message!="":
+                self.messages.append(message)
+        elif message!="":
+            print message
+
+# ------------------------------------------------------------------------------
+# build: preprocess, compile and link
+# ------------------------------------------------------------------------------
+
+    def build(self, filename, board, builddir, t0, output=None):
+        """ preprocess, compile and link filename in builddir
+
+        the .hex is copied to output, filename.hex by default """
+        if output is None:
+            output=filename+".hex"
+        self.onBuildStep(_("preprocessing"))
+        retour=self.preprocess(filename, board, builddir)
+        if retour=="error":
+            return False
+        # compilation
+        hexfile=self.getHexFile(board, builddir)
+        cached=self.restoreBuild(filename, board, builddir)
+        if cached:
+            self.displaymsg(_("nothing changed, using the last build")+"\n",0)
+            retour=0
+        else:
+            self.onBuildStep(_("compiling"))
+            retour=self.compile(filename, board, builddir)
+        if self.buildCancelled:
+            self.displaymsg(_("build cancelled")+"\n",0)
+            return False
+        if retour!=0:
+            self.displaymsg(_("error while compiling file ")+filename,0)
+        else:
+            if not cached:
+                self.onBuildStep(_("linking"))
+                retour=self.link(filename, board, builddir)
+                if self.buildCancelled:
+                    # the .hex of a killed linker is not trusted
+                    self.displaymsg(_("build cancelled")+"\n",0)
+                    return False
+                if retour==0:
+                    self.storeBuild(board, builddir)
+                else:
+                    # the .hex of a failed link is not cached
+                    self.buildkeys.pop(builddir, None)
+            if os.path.exists(hexfile)!=True:
+                self.displaymsg(_("error while linking")+" "+filename+".o",0)
+                return False
+            else:
+                shutil.copy(hexfile, output)
+                try:
+                    codesize=self.getCodeSize(os.path.splitext(output)[0], board)
+                except HexError, e:
+                    self.displaymsg(_("error in the .hex file")+" "+str(e)+"\n",0)
+                    return False
+                self.displaymsg(_("compilation done")+"\n",0)
+                self.displaymsg(codesize+"\n",0)
+                self.displaymsg(str(time.time() - t0) + " "+_("seconds process time")+"\n",0)
+                #os.remove(filename+".c")
+                return True
+
+    #----------------------------------------------------------------------
+    def onBuildStep(self, step):
+        """ called when build starts a new step """
+        if self.messages is None:
+            print step + " ..."
+
+# ------------------------------------------------------------------------------
+# getLibrary: parsed PDL files of the board's architecture
+# ------------------------------------------------------------------------------
+
+    def getLibrary(self, board):
+        # parsed files are cached until one of them changes
+        if board.arch == 8:
+            return loadLibrary(P8_DIR, '.pdl', CACHE_DIR)
+        else:
+            return loadLibrary(P32_DIR, '.pdl32', CACHE_DIR)
+
+# ------------------------------------------------------------------------------
+# preprocess
+# ------------------------------------------------------------------------------
+
+    def preprocess(self, filename, board, builddir=SOURCE_DIR):
+        fileline=[]
+
+        # define.h is only written once at the end
+        self.defines = Defines()
+
+        # read .pde (will be user.c)
+        path,name = os.path.split(filename)
+        fichier = open(filename + '.pde', 'r')
+        content = fichier.read()
+        fichier.close()
+
+        ### debug mode
+        ##DEBUG_STR = "NODEBUG"
+        ##if self.debug == self.ID_USBCDC:
+            ##DEBUG_STR = "USBCDCDEBUG"
+        ##if self.debug == self.ID_USBBULK:
+            ##DEBUG_STR = "USBBULKDEBUG"
+        ##if self.debug == self.ID_USBHID:
+            ##DEBUG_STR = "USBHIDDEBUG"
+        ##if self.debug == self.ID_USBOTG:
+            ##DEBUG_STR = "USBOTGDEBUG"
+        ##if self.debug == self.ID_UART1:
+            ##DEBUG_STR = "UART1DEBUG"
+        ##if self.debug == self.ID_UART2:
+            ##DEBUG_STR = "UART2DEBUG"
+        ##self.adddefine("#define DEBUG_MODE " + DEBUG_STR)
+
+        # board
+        #if board.arch == 8:
+        #    self.adddefine("#define " + board.board)
+
+        # add #include and #define from user.c to define.h
+        lines = content.split("\n")
+        for i in range(len(lines)):
+            line = lines[i]
+            if i < len(lines) - 1:
+                line = line + "\n"
+            if line.find("#include")!=-1 or line.find("#define")!=-1:
+                self.adddefine(line)    # add to define.h
+                fileline.append("\r\n")    # delete from user.c
+            else:
+                fileline.append(line)
+
+        # search and replace arduino keywords in file
+        content = "".join(fileline)
+        content = self.removecomments(content)
+        fileline = []
+        # instructions of the board's architecture, whatever board readlib got
+        translator = self.getLibrary(board).translator
+        for resultline in translator.translate(content, self):
+            if resultline.find("error")==1:
+                line = resultline
+                print "error " + resultline
+                self.displaymsg("error "+resultline,1)
+                return "error"
+            fileline.append(resultline)
+
+        # save new tmp file
+        fichier = open(os.path.join(builddir, 'user.c'), 'w')
+        fichier.writelines(fileline)
+        fichier.writelines("\r\n")
+        fichier.close()
+
+        # save sorted define.h
+        self.defines.write(os.path.join(builddir, 'define.h'))
+        return
+
+# ------------------------------------------------------------------------------
+# adddefine
+# ------------------------------------------------------------------------------
+
+    def adddefine(self,chaine):
+        """ add #define in define.h """
+        self.defines.adddefine(chaine)
+
+# ------------------------------------------------------------------------------
+# notindefine
+# ------------------------------------------------------------------------------
+
+    def notindefine(self,chaine):
+        """ verify if #define exists in define.h """
+        return self.defines.notindefine(chaine)
+
+# ------------------------------------------------------------------------------
+# removecomment
+# ------------------------------------------------------------------------------
+
+    def removecomments(self, text):
+        def replacer(match):
+            s = match.group(0)
+            if s.startswith('/'):
+                # keep the newlines of block comments, user.c keeps the
+                # lines of the sketch so that diagnostics point to them
+                return "\n" * s.count("\n")
+            else:
+                return s
+        pattern = re.compile(
+            r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
+            re.DOTALL | re.MULTILINE
+        )
+        return re.sub(pattern, replacer, text)
+
+# ------------------------------------------------------------------------------
+# getCompileCmd: SDCC command line used to compile main.c (8-bit only)
+# ------------------------------------------------------------------------------
+
+    def getCompileCmd(self, filename, board, builddir=SOURCE_DIR):
+        if board.bldr == 'boot2':
+            return [os.path.join(HOME_DIR, self.osdir, 'p8', 'bin', self.c8),\
+                    "-mpic16",\
+                    "--denable-peeps",\
+                    "--obanksel=9",\
+                    "--opt-code-size",\
+                    "--optimize-cmp",\
+                    "--optimize-df",\
+                    "-p" + board.proc,\
+                    "-D" + board.board,\
+                    "-D" + board.bldr,\
+                    "-I" + os.path.join(P8_DIR, 'include'),\
+                    "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
+                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
+                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
+                    "-I" + os.path.dirname(filename),\
+                    "--compile-only",\
+                    "-o" + os.path.join(builddir, 'main.o'),\
+                    os.path.join(builddir, 'main.c')]
+        else:# if board.bldr == 'boot4'
+#                   "--opt-code-size",\
+            return [os.path.join(HOME_DIR, self.osdir, 'p8', 'bin2', self.c8),\
+                    "-mpic16",\
+                    "--obanksel=9",\
+                    "--optimize-cmp",\
+                    "--optimize-df",\
+                    "--denable-peeps",\
+                    "--ivt-loc=" + str(board.memstart),\
+                    "-p" + board.proc,\
+                    "-D" + board.board,\
+                    "-D" + board.bldr,\
+                    "-I" + os.path.join(P8_DIR, 'include'),\
+                    "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
+                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
+                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
+                    "-I" + os.path.dirname(filename),\
+                    "--compile-only",\
+                    "-o" + os.path.join(builddir, 'main.o'),\
+                    os.path.join(builddir, 'main.c')]
+
+# ------------------------------------------------------------------------------
+# getLinkCmd: SDCC (8-bit) or make (32-bit) command line used to link
+# ------------------------------------------------------------------------------
+
+    def getLinkCmd(self, filename, board, builddir=SOURCE_DIR):
+        if board.arch == 8:
+            if board.bldr == 'boot2':
+                return [os.path.join(HOME_DIR, self.osdir, 'p8', 'bin', self.c8),\
+                        "-o" + os.path.join(builddir, 'main.hex'),\
+                        "--denable-peeps",\
+                        "--obanksel=9",\
+                        "--opt-code-size",\
+                        "--optimize-cmp",\
+                        "--optimize-df",\
+                        "--no-crt",\
+                        "-Wl-s" + os.path.join(P8_DIR, 'lkr', board.bldr + '.' + board.proc + '.lkr') + ",-m",\
+                        "-mpic16",\
+                        "-p" + board.proc,\
+                        "-D" + board.bldr,\
+                        "-I" + os.path.join(P8_DIR, 'include'),\
+                        "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
+                        "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
+                        "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
+                        "-L" + os.path.join(P8_DIR, 'lib', 'pic16'),\
+                        '-llibio' + board.proc + '.lib',\
+                        '-llibc18f.lib',\
+                        '-llibm18f.lib',\
+                        '-llibsdcc.lib',\
+                        os.path.join(P8_DIR, 'obj', 'application_iface.o'),\
+                        os.path.join(P8_DIR, 'obj', 'boot_iface.o'),\
+                        os.path.join(P8_DIR, 'obj', 'usb_descriptors.o'),\
+                        os.path.join(P8_DIR, 'obj', 'crt0ipinguino.o'),\
+                        os.path.join(builddir, 'main.o')]
+            else:# if board.bldr == 'boot4'
+#                       "--opt-code-size",\
+                return [os.path.join(HOME_DIR, self.osdir, 'p8', 'bin2', self.c8),\
+                        "-o" + os.path.join(builddir, 'main.hex'),\
+                        "-mpic16",\
+                        "--obanksel=9",\
+                        "--optimize-cmp",\
+                        "--optimize-df",\
+                        "--denable-peeps",\
+                        "--ivt-loc=" + str(board.memstart),\
+                        "--use-crt=" + os.path.join(P8_DIR, 'obj', 'crt0i' + board.proc + '.o'),\
+                        "-Wl-s" + os.path.join(P8_DIR, 'lkr', board.bldr + '.' + board.proc + '.lkr') + ",-m",\
+                        "-p" + board.proc,\
+                        "-D" + board.bldr,\
+                        "-I" + os.path.join(P8_DIR, 'include'),\
+                        "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
+                        "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
+                        "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
+                        "-L" + os.path.join(P8_DIR, 'lib', 'pic16'),\
+                        '-llibio' + board.proc + '.lib',\
+                        '-llibc18f.lib',\
+                        '-llibm18f.lib',\
+                        '-llibsdcc.lib',\
+                        os.path.join(builddir, 'main.o')]
+        else:#if board.arch == 32:
+            # "PDEDIR=" + os.path.dirname(self.GetPath()),\
+            # can't be used with Command Line version since editor isn't used
+            return [self.make,\
+                    "--makefile=" + os.path.join(SOURCE_DIR, 'Makefile32.'+self.osdir),\
+                    "HOME=" + HOME_DIR,\
+                    "SRCDIR=" + builddir,\
+                    "PDEDIR=" + os.path.dirname(filename),\
+                    "PROC=" + board.proc,\
+                    "BOARD=" + board.board]
+
+# ------------------------------------------------------------------------------
+# runTool: run a compiler tool, its output is parsed as soon as it is written
+# ------------------------------------------------------------------------------
+
+    def runTool(self, command, filename):
+        """ return the exit code of command and add its diagnostics to self.diagnostics """
+        if self.buildCancelled:
+            return -1
+        sketch = os.path.splitext(filename)[0] + '.pde'
+        def started(process):
+            self.buildProcess = process
+            # cancelled while the tool was starting
+            if self.buildCancelled:
+                killTree(process)
+        def output(line, diagnostic):
+            if diagnostic is not None:
+                # user.c has the same lines as the sketch
+                if diagnostic.filename is not None and os.path.basename(diagnostic.filename) == 'user.c':
+                    diagnostic.filename = sketch
+                self.diagnostics.append(diagnostic)
+            self.onBuildOutput(line, diagnostic)
+        try:
+            return runTool(command, output, started)
+        finally:
+            self.buildProcess = None
+
+    #----------------------------------------------------------------------
+    def onBuildOutput(self, line, diagnostic):
+        """ called for each line written by a compiler tool """
+        if diagnostic is not None and diagnostic.severity == 'error':
+            self.displaymsg(str(diagnostic) + "\n", 0)
+
+    #----------------------------------------------------------------------
+    def cancelBuild(self):
+        """ stop the compiler tool running, if any, and all its children
+
+        may be called from another thread than the one building, the
+        Builder stays cancelled: each new build needs a new Builder """
+        self.buildCancelled = True
+        process = self.buildProcess
+        if process is not None:
+            killTree(process)
+
+# ------------------------------------------------------------------------------
+# compile
+# ------------------------------------------------------------------------------
+
+    def compile(self, filename, board, builddir=SOURCE_DIR):
+        self.diagnostics = []
+        if (self.debug_output == 1):
+            print("compile " + board.proc)
+        else:
+            if board.arch == 8:
+                return self.runTool(self.getCompileCmd(filename, board, builddir), filename)
+            else:
+                return 0
+
+# ------------------------------------------------------------------------------
+# link
+# ------------------------------------------------------------------------------
+
+    def link(self, filename, board, builddir=SOURCE_DIR):
+        if (self.debug_output == 1):
+            print("link " + board.proc)
+        else:
+            retour = self.runTool(self.getLinkCmd(filename, board, builddir), filename)
+	    if sys.platform=='win32':
+		if board.board=='PIC32_PINGUINO_220':
+		    badrecord=":040000059D0040001A\n"
+		else:
+		    badrecord=":040000059D006000FA\n"                
+		if os.path.exists(os.path.join(builddir,"main32tmp.hex")):
+		    fichiersource=open(os.path.join(builddir,"main32tmp.hex"),'r')
+		    fichierdest=open(os.path.join(builddir,"main32.hex"),'w+')
+		    for line in fichiersource:
+			if line!=badrecord:
+			    fichierdest.writelines(line)
+		    fichiersource.close()
+		    fichierdest.close()
+		    os.remove(os.path.join(builddir,"main32tmp.hex"))
+	    return retour
+
+# ------------------------------------------------------------------------------
+# getBuildKey: hash of everything the .hex depends on
+# ------------------------------------------------------------------------------
+
+    def getBuildKey(self, filename, board, builddir=SOURCE_DIR):
+        parts = []
+        # preprocessed sketch
+        parts.append(readContent(os.path.join(builddir, 'user.c')))
+        parts.append(readContent(os.path.join(builddir, 'define.h')))
+        # board
+        parts.extend([board.name, board.arch, board.proc, board.board,
+                      board.bldr, board.memstart, board.memend])
+        # compiler flags and toolchain version
+        # (commands are the ones of SOURCE_DIR, whatever the build directory is)
+        if board.arch == 8:
+            driver = 'main.c'
+            command = self.getCompileCmd(filename, board) + self.getLinkCmd(filename, board)
+            tools = [command[0]]
+            libdir = P8_DIR
+        else:
+            driver = 'main32.c'
+            command = self.getLinkCmd(filename, board)
+            makefile = os.path.join(SOURCE_DIR, 'Makefile32.'+self.osdir)
+            parts.append(readContent(makefile))
+            bindir = os.path.join(HOME_DIR, self.osdir, 'p32', 'bin')
+            tools = [os.path.join(bindir, 'mips-elf-gcc'),
+                     os.path.join(bindir, 'mips-elf-objcopy')]
+            libdir = P32_DIR
+        parts.append(readContent(os.path.join(builddir, driver)))
+        parts.extend(command)
+        parts.append(getFileStamp(tools))
+        # libraries and headers
+        parts.append(getTreeStamp(libdir))
+        sketchdir = os.path.dirname(filename)
+        if os.path.isdir(sketchdir):
+            for fichier in sorted(os.listdir(sketchdir)):
+                if os.path.splitext(fichier)[1] in ('.c', '.h'):
+                    parts.append(fichier)
+                    parts.append(readContent(os.path.join(sketchdir, fichier)))
+        return self.buildcache.getKey(parts)
+
+# ------------------------------------------------------------------------------
+# build cache: get the .hex back if nothing changed since the last build
+# ------------------------------------------------------------------------------
+
+    def getHexFile(self, board, builddir=SOURCE_DIR):
+        if board.arch == 8:
+            return os.path.join(builddir, 'main.hex')
+        else:
+            return os.path.join(builddir, 'main32.hex')
+
+    #----------------------------------------------------------------------
+    def restoreBuild(self, filename, board, builddir=SOURCE_DIR):
+        """ restore main.hex from the cache, return True on success """
+        self.buildkeys.pop(builddir, None)
+        if self.debug_output == 1:
+            return False
+        key = self.getBuildKey(filename, board, builddir)
+        hexfile = self.getHexFile(board, builddir)
+        if self.buildcache.restore(key, hexfile):
+            return True
+        # a .hex left by a former build must not be taken for the new one
+        if os.path.exists(hexfile):
+            os.remove(hexfile)
+        self.buildkeys[builddir] = key
+        return False
+
+    #----------------------------------------------------------------------
+    def storeBuild(self, board, builddir=SOURCE_DIR):
+        """ keep main.hex of a successful build in the cache """
+        key = self.buildkeys.pop(builddir, None)
+        hexfile = self.getHexFile(board, builddir)
+        if key is not None and os.path.exists(hexfile):
+            self.buildcache.store(key, hexfile)
+
+# ------------------------------------------------------------------------------
+# build directories: every build works in its own scratch directory
+# ------------------------------------------------------------------------------
+
+    def newBuildDir(self, board):
+        """ create a scratch directory with the driver (main.c or main32.c) """
+        if not os.path.isdir(TEMP_DIR):
+            os.makedirs(TEMP_DIR)
+        builddir = tempfile.mkdtemp(prefix='build-', dir=TEMP_DIR)
+        if board.arch == 8:
+            shutil.copy(os.path.join(SOURCE_DIR, 'main.c'), builddir)
+        else:
+            shutil.copy(os.path.join(SOURCE_DIR, 'main32.c'), builddir)
+        return builddir
+
+    #----------------------------------------------------------------------
+    def removeBuildDir(self, builddir):
+        if builddir != SOURCE_DIR:
+            shutil.rmtree(builddir, True)
+
+# ------------------------------------------------------------------------------
+# getCodeSize
+# ------------------------------------------------------------------------------
+
+    def getCodeSize(self, filename, board):
+        codesize = self.getCodeBytes(filename + ".hex", board)
+        memfree = board.memend - board.memstart
+        return "code size: " + str(codesize) + " / " + str(memfree) + " bytes" + " (" + str(100*codesize/memfree) + "% used)"
+
+    #----------------------------------------------------------------------
+    def getCodeBytes(self, hexfile, board):
+        """ number of bytes of code written after the bootloader, raise
+        HexError if hexfile is not a valid .hex """
+        return readHex(hexfile).getSize(board.memstart)
+
+# ------------------------------------------------------------------------------
+# getOptions
+# ------------------------------------------------------------------------------
+
+def getOptions():
+    parser = argparse.ArgumentParser(description='*** Pinguino IDE ***')
+    parser.add_argument('-v', '--version', dest='version', action='store_true', default=False, help='show Pinguino IDE version and exit')
+    parser.add_argument('-a', '--author', dest='author', action='store_true', default=False, help='show authors of this Pinguino IDE version and exit')
+    parser.add_argument('-f', '--filename', dest='filename', nargs=1, default=False, help='filename to process')
+    parser.add_argument('--upload', dest='upload', action='store_true', default=False, help='upload the program once compiled')
+    parser.add_argument('--server', dest='server', metavar='ADDRESS', default=False, help='run a compile server on ADDRESS ([host:]port or unix:/path/to/socket)')
+    for b in range(len(boardlist)):
+        parser.add_argument(    boardlist[b].shortarg,
+                                    boardlist[b].longarg,
+                                    dest='board',
+                                    const=b,
+                                    action='store_const',
+                                    default=False,
+                                    help='compile code for ' + boardlist[b].board + ' board')
+    return parser.parse_args()
+
+# ------------------------------------------------------------------------------
+# getVersion
+# ------------------------------------------------------------------------------
+
+def getVersion():
+    return pinguino_version
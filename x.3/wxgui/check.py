@@ -275,7 +275,7 @@ except:
     perror()	
 
 try:
-    from uploader import Uploader
+    from uploader import Uploader, UploadLog
     fichier.writelines('Pinguino Uploader successfully loaded\n')
 except:
     fichier.writelines('Pinguino Uploader failed\n')
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino compiler diagnostics
+
+    Run SDCC, gcc or make with their output in a pipe and turn each line
+    into a diagnostic (file, line, severity, message) as soon as it is
+    written, instead of reading a log file once the tool has exited.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os
+import re
+import sys
+import signal
+from subprocess import Popen,PIPE,STDOUT,call
+
+# subprocess.CREATE_NEW_PROCESS_GROUP only exists since python 2.7
+CREATE_NEW_PROCESS_GROUP = 0x00000200
+
+# file:line[:column]: severity [number]: message (SDCC, gcc, gpasm)
+LOCATED_REGEX = re.compile(r"^(?P<file>(?:[A-Za-z]:)?[^:]+):(?P<line>\d+):(?:(?P<column>\d+):)?\s*"
+                           r"(?P<severity>(?:syntax |fatal )?error|warning|note)(?:\s+\d+)?\s*:?\s*(?P<message>.*)$",
+                           re.IGNORECASE)
+# file:(section): undefined reference (ld)
+SECTION_REGEX = re.compile(r"^(?P<file>(?:[A-Za-z]:)?[^:]+):\([^)]*\):\s*(?P<message>.*)$")
+# [tool: ]severity: message (gplink, ld, make)
+TOOL_REGEX = re.compile(r"^(?:(?P<tool>[^\s:]+):\s+)?(?:\*\*\*\s+)?(?P<severity>(?:fatal )?error|warning)\s*[:\s]\s*(?P<message>.*)$",
+                        re.IGNORECASE)
+# make: *** [target] Error 1
+MAKE_REGEX = re.compile(r"^(?P<tool>\S*make(?:\.exe)?)(?:\[\d+\])?: \*\*\* (?P<message>.*Error.*)$")
+
+########################################################################
+class Diagnostic:
+    """ one message of a compiler tool """
+
+    #----------------------------------------------------------------------
+    def __init__(self, severity, message, filename=None, line=None, column=None, text=""):
+        self.severity = severity        # 'error', 'warning' or 'note'
+        self.message = message
+        self.filename = filename
+        self.line = line
+        self.column = column
+        self.text = text                # line as written by the tool
+
+    #----------------------------------------------------------------------
+    def __str__(self):
+        location = ""
+        if self.filename is not None:
+            location = self.filename + ":"
+            if self.line is not None:
+                location = location + str(self.line) + ":"
+            location = location + " "
+        return location + self.severity + ": " + self.message
+
+    #----------------------------------------------------------------------
+    def asDict(self):
+        return {'file': self.filename,
+                'line': self.line,
+                'column': self.column,
+                'severity': self.severity,
+                'message': self.message}
+
+# ------------------------------------------------------------------------------
+# parseLine: diagnostic of one output line, None if it is not one
+# (any line with 'error' in it is one, as the former grep of the log)
+# ------------------------------------------------------------------------------
+
+def parseLine(text):
+    text = text.rstrip("\r\n")
+    match = LOCATED_REGEX.match(text)
+    if match:
+        column = match.group('column')
+        if column is not None:
+            column = int(column)
+        return Diagnostic(getSeverity(match.group('severity')),
+                          match.group('message').strip(),
+                          match.group('file'),
+                          int(match.group('line')),
+                          column,
+                          text)
+    match = MAKE_REGEX.match(text)
+    if match:
+        return Diagnostic('error', match.group('message').strip(), text=text)
+    match = SECTION_REGEX.match(text)
+    if match and match.group('message').find('undefined reference') != -1:
+        return Diagnostic('error', match.group('message').strip(), match.group('file'), text=text)
+    match = TOOL_REGEX.match(text)
+    if match:
+        return Diagnostic(getSeverity(match.group('severity')),
+                          match.group('message').strip(),
+                          text=text)
+    if text.find('error') != -1:
+        # some SDCC and gcc messages have no location nor severity prefix
+        return Diagnostic('error', text.strip(), text=text)
+    return None
+
+#----------------------------------------------------------------------
+def getSeverity(word):
+    word = word.lower()
+    if word.find('error') != -1:
+        return 'error'
+    return word
+
+# ------------------------------------------------------------------------------
+# runTool: run command and call callback(line, diagnostic) for each output line
+# ------------------------------------------------------------------------------
+
+def runTool(command, callback, started=None, cwd=None):
+    """ return the exit code of command
+
+    started(process) is called once the process exists, so that the
+    caller can keep it to cancel the build """
+    # the tool and its children (make runs gcc, gcc runs cc1...) get a
+    # process group of their own, so that killTree stops all of them
+    if sys.platform == 'win32':
+        process = Popen(command, stdout=PIPE, stderr=STDOUT, cwd=cwd, bufsize=1,
+                        creationflags=CREATE_NEW_PROCESS_GROUP)
+    else:
+        process = Popen(command, stdout=PIPE, stderr=STDOUT, cwd=cwd, bufsize=1,
+                        preexec_fn=os.setsid)
+    if started is not None:
+        started(process)
+    try:
+        for line in iter(process.stdout.readline, ''):
+            callback(line, parseLine(line))
+    finally:
+        process.stdout.close()
+        process.wait()
+    return process.returncode
+
+# ------------------------------------------------------------------------------
+# killTree: stop a process started by runTool and all its children
+# ------------------------------------------------------------------------------
+
+def killTree(process):
+    if process.poll() is not None:
+        return
+    try:
+        if sys.platform == 'win32':
+            devnull = open(os.devnull, 'w')
+            try:
+                call(['taskkill', '/F', '/T', '/PID', str(process.pid)], stdout=devnull, stderr=devnull)
+            finally:
+                devnull.close()
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
+    except OSError:
+        # already finished
+        pass
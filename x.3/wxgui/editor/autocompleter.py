@@ -30,6 +30,33 @@ from dic import Snippet
 ICONS_COMPLETER_DIR = os.path.join(os.getcwd(), "theme", "icons_autocompleter")
 AVAILABLE_ICONS = os.listdir(ICONS_COMPLETER_DIR)
 
+########################################################################
+class CompleterList(wx.ListCtrl):
+    """ virtual list of (word, icon), only the visible rows are drawn """
+
+    #----------------------------------------------------------------------
+    def __init__(self, parent, images):
+        wx.ListCtrl.__init__(self, parent, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize,
+                             wx.LC_NO_HEADER|wx.LC_REPORT|wx.LC_VIRTUAL|wx.NO_BORDER)
+        self.images = images    # icon: index in the image list
+        self.items = []
+
+    #----------------------------------------------------------------------
+    def setItems(self, items):
+        self.items = items
+        self.SetItemCount(len(items))
+        self.Refresh()
+
+    #----------------------------------------------------------------------
+    def OnGetItemText(self, item, col):
+        return self.items[item][0]
+
+    #----------------------------------------------------------------------
+    def OnGetItemImage(self, item):
+        icon = self.items[item][1]
+        if icon in ["u8", "u16", "u32", "u64"]: icon = "ux"
+        return self.images.get(icon, self.images["none"])
+
 ########################################################################
 class AutoCompleter():
 
@@ -40,9 +67,24 @@ class AutoCompleter():
         self.CharsCount = CharsCount
         self.MaxItemsCount = MaxItemsCount
 
+        # every icon is decoded once
+        self.il = wx.ImageList(14, 14)
+        self.images = {}
+        for fichier in AVAILABLE_ICONS:
+            name, extension = os.path.splitext(fichier)
+            if extension == ".png":
+                pn = os.path.normpath(os.path.join(ICONS_COMPLETER_DIR, fichier))
+                self.images[name] = self.il.Add(wx.Bitmap(pn, wx.BITMAP_TYPE_PNG))
+
+        # the list of the frame is replaced by a virtual one
+        listCtrl = self.listCtrlAutocompleter
+        self.listCtrlAutocompleter = CompleterList(self, self.images)
+        listCtrl.GetContainingSizer().Replace(listCtrl, self.listCtrlAutocompleter)
+        listCtrl.Destroy()
+        self.Layout()
+
         self.listCtrlAutocompleter.InsertColumn(col=0, format=wx.LIST_FORMAT_LEFT, heading='Completers', width=-1)
         self.listCtrlAutocompleter.SetColumnWidth(0, self.Size[0])
-        self.il = wx.ImageList(14, 14)
         self.listCtrlAutocompleter.SetImageList(self.il, wx.IMAGE_LIST_SMALL)
         self.listCtrlAutocompleter.SetFocus()
         self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.activated, self.listCtrlAutocompleter)
@@ -158,20 +200,6 @@ class AutoCompleter():
         event.Skip()
 
 
-    #----------------------------------------------------------------------
-    def addItem(self, name, icon):
-        if icon in ["u8", "u16", "u32", "u64"]: icon = "ux"
-        if not icon + ".png" in AVAILABLE_ICONS: icon = "none"
-        self.listCtrlAutocompleter.InsertImageStringItem(0, name, self.GetIconCompleter(icon))
-        self.listCtrlAutocompleter.SetItemData(0, 1)  
-
-    #----------------------------------------------------------------------
-    def GetIconCompleter(self, name):
-        pn = os.path.normpath(os.path.join(ICONS_COMPLETER_DIR, "%s.png" %name))
-        bitmap = wx.Bitmap(pn, wx.BITMAP_TYPE_PNG)        
-        return self.il.Add(bitmap)
-
-
     #----------------------------------------------------------------------
     def activated(self, event=None):
         index = self.index
@@ -179,9 +207,9 @@ class AutoCompleter():
         for i in index: textEdit.DeleteBack()
         
         itemCount = self.listCtrlAutocompleter.GetFocusedItem()
-        if itemCount == -1: itemCount = 0
+        if itemCount == -1 or itemCount >= len(self.listCtrlAutocompleter.items): itemCount = 0
             
-        current = self.listCtrlAutocompleter.GetItemText(itemCount)
+        current = self.listCtrlAutocompleter.items[itemCount][0]
         if current in Snippet:
             self.IDE.insertSnippet(current)
             self.Hide()
@@ -199,21 +227,11 @@ class AutoCompleter():
     #----------------------------------------------------------------------
     def setItems(self):
         index = self.index
-        completers, icons = self.IDE.getCompleters()
-        items = []
-        completers.reverse()
-        if index == None: items = completers[:]
-        else:
-            for word in completers:
-                if word.lower().startswith(index.lower()): items.append(word)
+        items = self.IDE.getCompletions(index)
 
         self.SetPosition(self.getPositionCompleter())
-        self.listCtrlAutocompleter.DeleteAllItems()
+        self.listCtrlAutocompleter.setItems(items)
         if len(items) > 0:
-            for item in items:
-                try: icon = icons[item]
-                except KeyError: icon = "none"
-                self.addItem(item, icon)
             self.listCtrlAutocompleter.Select(0)
             self.listCtrlAutocompleter.PageUp()
             self.setMinimunSize()
@@ -222,7 +240,7 @@ class AutoCompleter():
         else: self.Hide()
             
         if len(items) == 1:
-            if items[0].lower() == index.lower(): self.Hide()
+            if items[0][0].lower() == index.lower(): self.Hide()
         
 
     #----------------------------------------------------------------------
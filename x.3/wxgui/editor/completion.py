@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Completion words of the editor, sorted once and searched by prefix.
+
+    Each source of words (PDL keywords, symbols of the sketch, project
+    index, ...) is set with a key, and only merged again when its key
+    changes. A prefix is then found with a binary search, so a lookup
+    costs the length of the prefix and the number of matches, not the
+    number of words.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+from bisect import bisect_left
+
+#----------------------------------------------------------------------
+def sameKey(a, b):
+    """ keys hold the lists a source is made of, most of the time the
+    very same objects, compared without looking at their items """
+    if a is None or len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if x is not y and x != y:
+            return False
+    return True
+
+########################################################################
+class Completion:
+    """ words and icons of several sources, a word takes the icon of the
+    last source giving it one """
+
+    #----------------------------------------------------------------------
+    def __init__(self, sources):
+        self.sources = sources  # names, by increasing priority of their icons
+        self.keys = {}
+        self.words = {}         # source: {word: icon or None}
+        self.keywords = []      # (word.lower(), word) sorted
+        self.icons = {}
+        self.dirty = True
+
+    #----------------------------------------------------------------------
+    def setSource(self, source, key, getWords):
+        """ getWords() is called for {word: icon} only if key changed """
+        if sameKey(self.keys.get(source), key):
+            return
+        self.keys[source] = key
+        words = getWords()
+        if words != self.words.get(source):
+            self.words[source] = words
+            self.dirty = True
+
+    #----------------------------------------------------------------------
+    def merge(self):
+        icons = {}
+        for source in self.sources:
+            for word, icon in self.words.get(source, {}).iteritems():
+                if icon is not None or word not in icons:
+                    icons[word] = icon
+        self.keywords = [(word.lower(), word) for word in icons]
+        self.keywords.sort()
+        self.icons = icons
+        self.dirty = False
+
+    #----------------------------------------------------------------------
+    def match(self, prefix):
+        """ (word, icon) starting with prefix, whatever the case, those
+        with the same case first """
+        if self.dirty:
+            self.merge()
+        keywords = self.keywords
+        if not prefix:
+            matches = [word for lower, word in keywords]
+        else:
+            lowprefix = prefix.lower()
+            matches = []
+            i = bisect_left(keywords, (lowprefix,))
+            while i < len(keywords) and keywords[i][0].startswith(lowprefix):
+                matches.append(keywords[i][1])
+                i = i + 1
+            sameCase = [word for word in matches if word.startswith(prefix)]
+            if len(sameCase) < len(matches):
+                matches = sameCase + [word for word in matches if not word.startswith(prefix)]
+        return [(word, self.icons[word] or "none") for word in matches]
@@ -221,6 +221,7 @@ class editor:
 #        print self.notebookEditor.GetSelection()
         newIdx = self.notebookEditor.GetSelection()
         self.stcpage[newIdx].Bind(stc.EVT_STC_MODIFIED,self.OnChange)
+        self.stcpage[newIdx].Bind(stc.EVT_STC_MODIFIED,self.OnSymbolsChanged)
         self.stcpage[newIdx].Bind(wx.EVT_KEY_DOWN, self.OnKeyDown)
         self.stcpage[newIdx].Bind(wx.EVT_LEFT_UP, self.onclick)
         self.stcpage[newIdx].Bind(wx.EVT_RIGHT_UP, self.onclick)
@@ -28,6 +28,7 @@ import wx, re, os, sys, string
 import wx.stc as stc
 from ConfigParser import RawConfigParser
 from dic import Snippet, Autocompleter
+from completion import Completion
 from wxgui._trad import _
 
 HOME_DIR    = os.getcwd()
@@ -36,6 +37,8 @@ APP_CONFIG    = os.path.join(HOME_DIR, '.config')
 ########################################################################
 class General:
 
+    completion = None   # Completion of the editor, built on first use
+
     #----------------------------------------------------------------------
     def updateStatusBar(self, event=None):
         #self.findIndex = -1
@@ -116,6 +119,7 @@ class General:
         self.popupIDhelp0 = wx.NewId()
         self.popupIDhelp1 = wx.NewId()
         self.popupIDhelp2 = wx.NewId()
+        self.popupIDdefinition = wx.NewId()
 
         self.Bind(wx.EVT_MENU, lambda x:textEdit.Undo(), id=self.popupID1)
         self.Bind(wx.EVT_MENU, lambda x:textEdit.Redo(), id=self.popupID2)
@@ -152,6 +156,14 @@ class General:
             menu.AppendMenu(self.popupIDhelp0, word, help)          
             menu.AppendSeparator()
 
+        name = self.wordUnderCursor()
+        if name and self.projectIndex.lookup(name):
+            self.Bind(wx.EVT_MENU,
+                      lambda x:self.gotoDefinition(name),
+                      id=self.popupIDdefinition)
+            menu.Append(self.popupIDdefinition, _("Go to definition of")+" "+name)
+            menu.AppendSeparator()
+
         menu.Append(self.popupID8, _("Comment/Uncomment"))
         menu.Append(self.popupID9, _("Increase Indent"))
         menu.Append(self.popupID10, _("Decrease Indent"))
@@ -298,48 +310,55 @@ class General:
         
 
     #----------------------------------------------------------------------
-    def getCompleters(self):
-        icons = {}
-        def addInDict(icon, list):
-            for item in list:
-                icons[item] = icon
+    def getCompletions(self, prefix):
+        """ (word, icon) of the completers starting with prefix """
+        if self.completion is None:
+            self.completion = Completion(("files", "project", "library", "sketch", "snippet", "reserved"))
+            self.completion.setSource("snippet", (), lambda: dict.fromkeys(Snippet.keys(), "snippet"))
+            reserved = dict.fromkeys(Autocompleter["reserved"], "reserved")
+            reserved.update(dict.fromkeys(Autocompleter["directive"], "directive"))
+            self.completion.setSource("reserved", (), lambda: reserved)
+
+        # only the sources which changed are read again
+        self.completion.setSource("files", (self.otherWords,),
+                                  lambda: dict.fromkeys(self.otherWords))
+        self.completion.setSource("project", (self.projectIndex.getNames(),),
+                                  self.getProjectCompleters)
+        self.completion.setSource("library", (self.keywordList, self.reservedword, len(self.reservedword)),
+                                  self.getLibraryCompleters)
+        self.completion.setSource("sketch", (self.allVars, self.allFunc, self.allDefi, self.autoCompleteWords),
+                                  self.getSketchCompleters)
+        return self.completion.match(prefix)
 
-        varbls = []
+    #----------------------------------------------------------------------
+    def getLibraryCompleters(self):
+        words = dict.fromkeys(self.reservedword)
+        words.update(dict.fromkeys(self.keywordList, "function"))
+        return words
 
+    #----------------------------------------------------------------------
+    def getSketchCompleters(self):
+        words = dict.fromkeys(self.autoCompleteWords)
         for i in self.allVars:
-            icons[i[0][:].replace("*", "")] = i[1][:]
-            varbls.append(i[0][:].replace("*", ""))
-
-        for i in self.allFunc:
-            icons[i[0][:].replace("*", "")] = "function"
-            #varbls.append(i[0][:].replace("*", ""))
-            self.keywordList.append(i[0][:].replace("*", ""))
-
+            words[i[0].replace("*", "")] = i[1]
         for i in self.allDefi:
-            icons[i[1][:].replace("*", "")] = "directive"
-            varbls.append(i[1][:].replace("*", ""))
-
-        autoComp = []
-        for key in Autocompleter.keys(): autoComp.extend(Autocompleter[key][:])
-
-        completer = self.keywordList + self.reservedword + Snippet.keys() + varbls[:] + autoComp + self.autoCompleteWords
-
-        completersFilter = []
-        for i in completer:
-            if i not in completersFilter: completersFilter.append(i)
-        completersFilter.sort()
-
-        for i in Autocompleter["reserved"]:
-            if i in self.keywordList: self.keywordList.remove(i)
-
-        addInDict("snippet", Snippet.keys())
-        addInDict("function", self.keywordList)
-        addInDict("reserved", Autocompleter["reserved"])
-        addInDict("directive", Autocompleter["directive"])
+            words[i[1].replace("*", "")] = "directive"
+        for i in self.allFunc:
+            words[i[0].replace("*", "")] = "function"
+        return words
 
-        return completersFilter + self.otherWords, icons
-    
-    
+    #----------------------------------------------------------------------
+    def getProjectCompleters(self):
+        """ functions, globals, defines and types of the other files """
+        words = {}
+        project = self.projectIndex.getNames()
+        for name in project:
+            path, line, kind, detail = project[name][0]
+            if kind == "variable": words[name] = detail
+            elif kind == "define": words[name] = "directive"
+            elif kind == "function": words[name] = "function"
+            else: words[name] = None
+        return words
 
     #----------------------------------------------------------------------
     def OnMarginClick(self, evt):
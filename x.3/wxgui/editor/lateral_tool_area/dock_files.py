@@ -25,9 +25,108 @@
 -------------------------------------------------------------------------"""
 
 import wx, re
+import wx.stc as stc
 import sys, os
+import difflib
+import threading
+import time
 
 from wxgui._trad import _
+from wxgui.symbols import SymbolIndex
+from wxgui.projectindex import ProjectIndex, getDefinitions
+from wxgui.builder import P8_DIR, P32_DIR, CACHE_DIR
+
+# seconds between two scans of the project files
+PROJECT_SCAN_DELAY = 10
+
+EVT_RESULT_SYMBOLS_ID = wx.NewId()
+
+def EVT_RESULT_SYMBOLS(win, func):
+    win.Connect(-1, -1, EVT_RESULT_SYMBOLS_ID, func)
+
+class ResultEventSymbols(wx.PyEvent):
+    def __init__(self, worker):
+        wx.PyEvent.__init__(self)
+        self.SetEventType(EVT_RESULT_SYMBOLS_ID)
+        self.worker = worker
+
+#----------------------------------------------------------------------
+def splitLines(text):
+    """ lines of text with their end of line, as the editor breaks them """
+    parts = re.split("(\r\n|\r|\n)", text)
+    parts.append("")
+    return [parts[i] + parts[i + 1] for i in range(0, len(parts) - 1, 2)]
+
+#----------------------------------------------------------------------
+def getListChanges(shown, new, linecol):
+    """ (kind, index, data) turning the items of a list control from shown
+    into new, only the added or removed items and the changed lines """
+    key = lambda var: tuple(var[:linecol] + var[linecol + 1:])
+    matcher = difflib.SequenceMatcher(None, map(key, shown), map(key, new), False)
+    changes = []
+    # from the end, so that the indexes of the next ones don't move
+    opcodes = matcher.get_opcodes()
+    opcodes.reverse()
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            for k in range(i2 - i1):
+                if shown[i1 + k][linecol] != new[j1 + k][linecol]:
+                    changes.append(('line', i1 + k, (linecol, new[j1 + k][linecol])))
+            continue
+        for i in range(i2 - 1, i1 - 1, -1):
+            changes.append(('delete', i, None))
+        for k in range(j2 - j1):
+            changes.append(('insert', i1 + k, new[j1 + k]))
+    return changes
+
+# ------------------------------------------------------------------------------
+# SymbolWorker: parse a page without blocking the main loop
+# ------------------------------------------------------------------------------
+
+class SymbolWorker(threading.Thread):
+    """ parse the dirty lines of a copy of the index of page from a snapshot
+    of its text, the result is posted to window as ResultEventSymbols,
+    with error set if the parsing failed """
+
+    #----------------------------------------------------------------------
+    def __init__(self, window, page, index, text, shown):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.window = window
+        self.page = page
+        self.version = index.version
+        self.source = index     # copied by the thread, the result is dropped if it was edited
+        self.text = text
+        self.shown = shown      # (vars, functions, directives) in the lists
+        self.error = None
+
+    #----------------------------------------------------------------------
+    def run(self):
+        try:
+            try:
+                self.parse()
+            except Exception, e:
+                self.error = "%s: %s" % (e.__class__.__name__, e)
+        finally:
+            # always answer, or the page would never be parsed again
+            wx.PostEvent(self.window, ResultEventSymbols(self))
+
+    #----------------------------------------------------------------------
+    def parse(self):
+        self.index = self.source.copy()
+        lines = splitLines(self.text)
+        if len(lines) != len(self.index.lines):
+            self.index.reset(len(lines))
+        self.index.update(lines.__getitem__)
+        self.symbols = self.index.getSymbols()
+        self.definitions = getDefinitions(self.index)
+        # the lists show the symbols sorted by name
+        self.lists = []
+        self.changes = []
+        for shown, new, linecol in zip(self.shown, self.symbols[:3], (2, 2, 3)):
+            new = sorted(new)
+            self.lists.append(new)
+            self.changes.append(getListChanges(shown, new, linecol))
 
 ########################################################################
 class File:
@@ -36,10 +135,19 @@ class File:
         self.lateralFunc = self.lat.listCtrlFunc
         self.lateralVars = self.lat.listCtrlVars
         self.lateralDefi = self.lat.listCtrlDefi
+        self.symbolsShown = None        # (page, version) in the lists
+        self.symbolWorker = None
+        self.projectIndex = ProjectIndex([os.path.join(P8_DIR, 'include', 'pinguino'),
+                                          os.path.join(P32_DIR, 'include', 'pinguino')],
+                                         os.path.join(CACHE_DIR, 'symbols.cache'))
+        self.projectScan = None         # thread scanning the project files
+        self.projectScanTime = 0
+        self.otherWordsStamp = None     # (directory, mtime) of otherWords
         
         self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.moveToFunc, self.lateralFunc)
         self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.moveToVar, self.lateralVars)
         self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.moveToDefi, self.lateralDefi)
+        EVT_RESULT_SYMBOLS(self, self.OnSymbolsEvent)
     
         self.lateralVars.InsertColumn(col=0, format=wx.LIST_FORMAT_LEFT, heading=_("Name"), width=-1)
         self.lateralVars.InsertColumn(col=1, format=wx.LIST_FORMAT_LEFT, heading=_("Type"), width=-1)
@@ -59,229 +167,166 @@ class File:
     def moveToVar(self, event=None):
         textEdit = self.stcpage[self.notebookEditor.GetSelection()]
         textEdit.GotoLine(textEdit.LineCount)
-        self.allVars.reverse()
         color = self.getColorConfig("Highligh", "codenavigation", [120, 255, 152])
-        self.highlightline(int(self.allVars[event.GetIndex()][2])-1, color)
-        self.allVars.reverse()
+        self.highlightline(int(self.allVars_back[event.GetIndex()][2])-1, color)
         textEdit.SetFocus()
         
     #----------------------------------------------------------------------
     def moveToFunc(self, event=None):
         textEdit = self.stcpage[self.notebookEditor.GetSelection()]
         textEdit.GotoLine(textEdit.LineCount)
-        self.allFunc.reverse()
         color = self.getColorConfig("Highligh", "codenavigation", [120, 255, 152])
-        self.highlightline(int(self.allFunc[event.GetIndex()][2])-1, color)
-        self.allFunc.reverse()
+        self.highlightline(int(self.allFunc_back[event.GetIndex()][2])-1, color)
         textEdit.SetFocus()
         
     #----------------------------------------------------------------------
     def moveToDefi(self, event=None):
         textEdit = self.stcpage[self.notebookEditor.GetSelection()]
         textEdit.GotoLine(textEdit.LineCount)
-        self.allDefi.reverse()
         color = self.getColorConfig("Highligh", "codenavigation", [120, 255, 152])
-        self.highlightline(int(self.allDefi[event.GetIndex()][3])-1, color)
-        self.allDefi.reverse()
+        self.highlightline(int(self.allDefi_back[event.GetIndex()][3])-1, color)
         textEdit.SetFocus()  
         
     #----------------------------------------------------------------------
-    def addVarInListCtrl(self, index, var):
-        self.lateralVars.InsertStringItem(0, var[0])        
-        self.lateralVars.SetStringItem(0, 1, var[1])         
-        self.lateralVars.SetStringItem(0, 2, var[2])    
-        self.lateralVars.SetItemData(0, 1)
-        
+    def gotoDefinition(self, name):
+        """ show the first definition of name in the project """
+        definitions = self.projectIndex.lookup(name)
+        if not definitions:
+            return False
+        path, line = definitions[0][:2]
+        if path in self.filename:
+            self.notebookEditor.SetSelection(self.filename.index(path))
+        else:
+            self.Open(path)
+        textEdit = self.stcpage[self.notebookEditor.GetSelection()]
+        color = self.getColorConfig("Highligh", "codenavigation", [120, 255, 152])
+        self.highlightline(line - 1, color)
+        textEdit.SetFocus()
+        return True
+
     #----------------------------------------------------------------------
-    def addFuncInListCtrl(self, index, var):
-        self.lateralFunc.InsertStringItem(0, var[0])        
-        self.lateralFunc.SetStringItem(0, 1, var[1])         
-        self.lateralFunc.SetStringItem(0, 2, var[2])         
-        self.lateralFunc.SetStringItem(0, 3, var[3])   
-        self.lateralFunc.SetItemData(0, 1)
-        
+    def scanProject(self, sketchdir):
+        """ update the project index in a thread, at once for a new sketch
+        directory, then every PROJECT_SCAN_DELAY seconds """
+        if self.projectScan is not None and self.projectScan.isAlive():
+            return
+        if sketchdir == self.projectIndex.sketchdir and \
+           time.time() - self.projectScanTime < PROJECT_SCAN_DELAY:
+            return
+        self.projectIndex.keepBuffers(self.filename)
+        self.projectScanTime = time.time()
+        self.projectScan = threading.Thread(target=self.projectIndex.scan, args=(sketchdir,))
+        self.projectScan.setDaemon(True)
+        self.projectScan.start()
+
+    #----------------------------------------------------------------------
+    def setListItem(self, listCtrl, index, var):
+        """ insert var at index, one string per column """
+        listCtrl.InsertStringItem(index, var[0])
+        for col in range(1, len(var)):
+            listCtrl.SetStringItem(index, col, var[col])
+        listCtrl.SetItemData(index, 1)
+
+    #----------------------------------------------------------------------
+    def updateListCtrl(self, listCtrl, changes):
+        """ apply the changes of getListChanges to listCtrl """
+        for kind, index, data in changes:
+            if kind == 'line':
+                listCtrl.SetStringItem(index, data[0], data[1])
+            elif kind == 'delete':
+                listCtrl.DeleteItem(index)
+            else:
+                self.setListItem(listCtrl, index, data)
+
+    #----------------------------------------------------------------------
+    def getSymbolIndex(self, textEdit):
+        """ symbols of the lines of textEdit, kept with the page """
+        try:
+            return textEdit.symbols
+        except AttributeError:
+            textEdit.symbols = SymbolIndex(textEdit.GetLineCount())
+            return textEdit.symbols
+
+    #----------------------------------------------------------------------
+    def OnSymbolsChanged(self, event):
+        """ mark the lines changed by an edit, update_dockFiles parses them """
+        event.Skip()
+        if not event.GetModificationType() & (stc.STC_MOD_INSERTTEXT | stc.STC_MOD_DELETETEXT):
+            return
+        textEdit = event.GetEventObject()
+        try:
+            index = textEdit.symbols
+        except AttributeError:
+            # the new page is parsed once for all
+            self.getSymbolIndex(textEdit)
+            return
+        index.changed(textEdit.LineFromPosition(event.GetPosition()), event.GetLinesAdded())
+
     #----------------------------------------------------------------------
-    def addDefiInListCtrl(self, index, var):
-        self.lateralDefi.InsertStringItem(0, var[0])            
-        self.lateralDefi.SetStringItem(0, 1, var[1])         
-        self.lateralDefi.SetStringItem(0, 2, var[2])        
-        self.lateralDefi.SetStringItem(0, 3, var[3])         
-        self.lateralDefi.SetItemData(0, 1)
+    def getOtherWords(self, filename):
+        """ files of the directory of filename, listed again if it changed """
+        dirname = os.path.dirname(filename)
+        stamp = (dirname, os.stat(dirname).st_mtime)
+        if stamp != self.otherWordsStamp:
+            self.otherWords = os.listdir(dirname)
+            self.otherWordsStamp = stamp
+        return self.otherWords
 
     #----------------------------------------------------------------------
     def update_dockFiles(self, event=None):
         if len(self.stcpage) < 1:
             self.lateralVars.DeleteAllItems()
             self.lateralFunc.DeleteAllItems()
+            self.lateralDefi.DeleteAllItems()
+            self.allVars_back = []
+            self.allFunc_back = []
+            self.allDefi_back = []
+            self.symbolsShown = None
             if event: event.Skip()
             return 
             
         try:
             textEdit = self.stcpage[self.notebookEditor.GetSelection()]
-            text = textEdit.GetText().split("\n")
-            dirname = self.filename[self.notebookEditor.GetSelection()]
-            self.otherWords = os.listdir(os.path.dirname(dirname))      
+            self.getOtherWords(self.filename[self.notebookEditor.GetSelection()])
         except:
             return
-        
-        
-        
-        self.tiposDatos = "int|float|char|double|"\
-                          "u8|u16|u32|u64|"\
-                          "BOOL|byte|word|void"
-        
-        def updateRegex():
-            
-            ReFunction = "[\s]*(unsigned)*[\s]*(" + self.tiposDatos + ")[\s]*[*]*[\s]*([*\w]*)[\s]*\(([\w ,*.]*)\)[\s]*"
-            
-            ReVariable = "[\s]*(volatile|register|static|extern)*[\s]*(unsigned|signed)*[\s]*(short|long)*[\s]*(" + self.tiposDatos + ")[\s]*(.+);"
-            ReStructs  = "[\s]*(struct|union|enum)[\s]*([*\w]*)[\s]*(.+);"
-            
-            ReTypeDef  = "[\s]*(typedef)[ ]*([\w]*)[ ]*([\w]*)[\s]*([{,;])*"
-            
-            ReTypeStru = "[\s]*}[\s]*([\w]+)[\s]*;"
-            
-            ReDefines = "[\s]*#(define|ifndef|endif)[ ]+([\S]*)[ ]+([\S]*)"
-            ReInclude = "[\s]*#include[ ]+<[\s]*([\S]*)[\s]*>"
-        
-            return ReFunction, ReVariable, ReStructs, ReTypeDef, ReDefines, ReInclude, ReTypeStru
-  
+        self.scanProject(os.path.dirname(self.filename[self.notebookEditor.GetSelection()]))
 
-        self.allVars = [] 
-        self.allFunc = []
-        self.allDefi = []
-        self.autoCompleteWords = []
-        #currentFunction = "None"
-        
-        ReFunction, ReVariable, ReStructs, ReTypeDef, ReDefines, ReInclude, ReTypeStru = updateRegex()
-        
-        
-        def getVar(var, tipo):
-            if "=" in var: var = var[:var.find("=")]
-            if "[" in var:
-                var = var[:var.find("[")]
-                if tipo != "char": tipo = "vect"
-            return var, tipo
-        
-        def getParam(param):
-            param = param.split(",")
-            ret = []
-            for par in param:
-                reg = re.match(ReVariable, par)
-                
-        def getOutTo(a, b, cont):
-            if a in cont:
-                x = cont.find(a)
-                cont = cont[:x]
-            if b in cont:
-                y = cont.find(b)
-                cont = cont+ cont[y:]
-            return cont
-                
-        count = 1
-        for linea in text:
-            if "//" in linea:
-                linea = linea[:linea.find("//")]
-            
-            reg1 = re.match(ReFunction, linea)
-            if reg1 != None:
-                self.allFunc.append([reg1.group(3),
-                                    reg1.group(2),
-                                    str(count),
-                                    reg1.group(4)])
-                
-                                    
-            reg2a = re.match(ReVariable, linea)
-            reg2b = re.match(ReStructs, linea)
-            
-            if reg2a != None or reg2b != None:                
-                if reg2b != None: #Struct
-                    reg2 = reg2b
-                    tipo = reg2.group(1)
-                    cont = reg2.group(2)
-                elif reg2a != None: #Variable
-                    reg2 = reg2a
-                    t = [reg2.group(1), reg2.group(2), reg2.group(3), reg2.group(4)]
-                    for i in range(t.count(None)): t.remove(None)
-                    tipo = " ".join(t)
-                    cont = reg2.group(5)
-                    
-                cont = getOutTo("{", "}", cont)
-                if "=" in cont: cont = getOutTo("(", ")", cont)
-                    
-                cont = cont.split(",")
-                self.allVars.extend([[getVar(var, tipo)[0],
-                                    getVar(var, tipo)[1],
-                                    str(count)] for var in cont])
-                
-                
-            reg3 = re.match(ReDefines, linea)
-            if reg3 != None:
-                self.allDefi.append([reg3.group(1),
-                                     reg3.group(2),
-                                     reg3.group(3),
-                                     str(count)])
-                
-            reg4 = re.match(ReInclude, linea)
-            if reg4 != None:
-                self.allDefi.append(["include",
-                                     reg4.group(1),
-                                     "",
-                                     str(count)])
-                
-                
-            reg5 = re.match(ReTypeDef, linea)
-            if reg5 != None:
-                self.tiposDatos += "|%s" %reg5.group(3)
-                self.autoCompleteWords.append(reg5.group(3))
-                ReFunction, ReVariable, ReStructs, ReTypeDef, ReDefines, ReInclude, ReTypeStru = updateRegex()
-                
-            reg6 = re.match(ReTypeStru, linea)
-            if reg6 != None:
-                self.tiposDatos += "|%s" %reg6.group(1)
-                self.autoCompleteWords.append(reg6.group(1))
-                ReFunction, ReVariable, ReStructs, ReTypeDef, ReDefines, ReInclude, ReTypeStru = updateRegex()        
-                
-            count += 1
-            
-        self.allDefi.sort()
-        self.allDefi_back.sort()
-        self.allFunc.sort()
-        self.allFunc_back.sort()
-        self.allVars.sort()
-        self.allVars_back.sort()
-              
-        if self.allVars_back != self.allVars:        
-            count = 0
-            #self.allVars.reverse()
-            self.lateralVars.DeleteAllItems()
-            for var in self.allVars:
-                self.addVarInListCtrl(count, var)
-                count += 1
-            self.allVars_back = self.allVars[:]
-        
-        if self.allFunc_back != self.allFunc:
-            count = 0
-            #self.allFunc.reverse()
-            self.lateralFunc.DeleteAllItems()
-            for var in self.allFunc:
-                self.addFuncInListCtrl(count, var)
-                count += 1
-            self.allFunc_back = self.allFunc[:]
-        
-        
-        if self.allDefi_back != self.allDefi:
-            count = 0
-            #self.allDefi.reverse()
-            self.lateralDefi.DeleteAllItems()
-            for var in self.allDefi:
-                self.addDefiInListCtrl(count, var)
-                count += 1
-            self.allDefi_back = self.allDefi[:]
-            
-            
+        index = self.getSymbolIndex(textEdit)
+        if self.symbolsShown == (textEdit, index.version) or self.symbolWorker is not None:
+            return
+        # the dirty lines are parsed from a snapshot by a worker thread
+        shown = (self.allVars_back, self.allFunc_back, self.allDefi_back)
+        self.symbolWorker = SymbolWorker(self, textEdit, index, textEdit.GetText(), shown)
+        self.symbolWorker.start()
 
-            
-                
-        #if event: event.Skip()       
-    
+    #----------------------------------------------------------------------
+    def OnSymbolsEvent(self, event):
+        """ symbols parsed by a SymbolWorker """
+        worker = event.worker
+        if worker is not self.symbolWorker:
+            return
+        self.symbolWorker = None
+        textEdit = worker.page
+        if textEdit not in self.stcpage or textEdit.symbols.version != worker.version:
+            # closed or edited since, the next update parses it again
+            return
+        if worker.error is not None:
+            # keep the lists as they are until the next edit
+            self.symbolsShown = (textEdit, worker.version)
+            return
+        textEdit.symbols = worker.index
+        self.projectIndex.setBuffer(self.filename[self.stcpage.index(textEdit)], worker.definitions)
+        if textEdit is not self.stcpage[self.notebookEditor.GetSelection()]:
+            return
+        shown = (self.allVars_back, self.allFunc_back, self.allDefi_back)
+        if map(id, shown) != map(id, worker.shown):
+            # the lists changed since the snapshot
+            return
+
+        self.allVars, self.allFunc, self.allDefi = worker.lists
+        self.autoCompleteWords = worker.symbols[3]
+        for listCtrl, changes in zip((self.lateralVars, self.lateralFunc, self.lateralDefi), worker.changes):
+            self.updateListCtrl(listCtrl, changes)
+        self.allVars_back, self.allFunc_back, self.allDefi_back = worker.lists
+        self.symbolsShown = (textEdit, worker.version)
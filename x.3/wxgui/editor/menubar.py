@@ -235,6 +235,8 @@ class Menubar:
     def OnExit(self, event):
         self.stopTimers()
         self.closing = True  #Signal for Threads
+        if self.buildWorker is not None:
+            self.buildWorker.cancelBuild()
 
         try:
             self.pinguino.close()
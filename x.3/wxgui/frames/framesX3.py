@@ -164,6 +164,9 @@ class menubarPinguino ( wx.MenuBar ):
 		self.menuItemCompileUpload = wx.MenuItem( self.menuPinguino, wx.ID_ANY, _("If Compile then Upload")+ u"\t" + u"F7", wx.EmptyString, wx.ITEM_NORMAL )
 		self.menuPinguino.AppendItem( self.menuItemCompileUpload )
 		
+		self.menuItemCancelBuild = wx.MenuItem( self.menuPinguino, wx.ID_ANY, _("Cancel Compilation")+ u"\t" + u"Shift+F5", wx.EmptyString, wx.ITEM_NORMAL )
+		self.menuPinguino.AppendItem( self.menuItemCancelBuild )
+		
 		self.Append( self.menuPinguino, _("Pinguino") ) 
 		
 		self.menuHelp = wx.Menu()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino Intel HEX files
+
+    Decode a .hex file into a sparse memory image, shared by the uploaders
+    and the code size report.
+
+    Each record is decoded at once with binascii.unhexlify and its checksum
+    checked on the decoded bytes:
+
+    :0300300002337A1E
+     03                 byte count
+       0030             address (lower 16 bits)
+           00           record type
+             02337A     data
+                   1E   checksum, the sum of all the bytes is 0 modulo 256
+
+    The data are kept in bytearray segments, one per run of contiguous
+    addresses.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import bisect
+import binascii
+
+# Hex format record types
+# --------------------------------------------------------------------------
+
+Data_Record = 00
+End_Of_File_Record = 01
+Extended_Segment_Address_Record = 02
+Start_Segment_Address_Record = 03
+Extended_Linear_Address_Record = 04
+Start_Linear_Address_Record = 05
+
+########################################################################
+class HexError(Exception):
+    """ the file is not a valid Intel HEX file """
+
+    #----------------------------------------------------------------------
+    def __init__(self, message, lineno=None):
+        if lineno is not None:
+            message = "line %d: %s" % (lineno, message)
+        Exception.__init__(self, message)
+        self.lineno = lineno
+
+class HexSyntaxError(HexError):
+    pass
+
+class HexChecksumError(HexError):
+    pass
+
+class HexRecordError(HexError):
+    pass
+
+########################################################################
+class MemoryImage:
+    """ sparse memory, a sorted list of [address, bytearray] segments """
+
+    #----------------------------------------------------------------------
+    def __init__(self):
+        self.segments = []
+        self.start = None       # start address record, if any
+
+    #----------------------------------------------------------------------
+    def write(self, address, data):
+        """ copy data at address, merging contiguous segments """
+        if not data:
+            return
+        segments = self.segments
+        # records usually follow each other
+        if segments:
+            last = segments[-1]
+            lastend = last[0] + len(last[1])
+            if address == lastend:
+                last[1].extend(data)
+                return
+            if address > lastend:
+                segments.append([address, bytearray(data)])
+                return
+        end = address + len(data)
+        # first segment which may touch [address, end]
+        i = bisect.bisect_right(segments, [address]) - 1
+        if i < 0 or segments[i][0] + len(segments[i][1]) < address:
+            i = i + 1
+        j = i
+        merged = bytearray()
+        start = address
+        tail = None
+        while j < len(segments) and segments[j][0] <= end:
+            segaddress, segdata = segments[j]
+            if segaddress < start:
+                merged = segdata[:start - segaddress] + merged
+                start = segaddress
+            if segaddress + len(segdata) > end:
+                tail = segdata[end - segaddress:]
+            j = j + 1
+        merged = merged + bytearray(data)
+        if tail is not None:
+            merged.extend(tail)
+        segments[i:j] = [[start, merged]]
+
+    #----------------------------------------------------------------------
+    def getSegments(self, start=0, end=None):
+        """ list of (address, bytearray) clipped to [start, end) """
+        clipped = []
+        for address, data in self.segments:
+            segend = address + len(data)
+            if segend <= start:
+                continue
+            if end is not None and address >= end:
+                break
+            if address < start or (end is not None and segend > end):
+                first = max(address, start)
+                if end is None:
+                    last = segend
+                else:
+                    last = min(segend, end)
+                clipped.append((first, data[first - address:last - address]))
+            else:
+                clipped.append((address, data))
+        return clipped
+
+    #----------------------------------------------------------------------
+    def getSize(self, start=0, end=None):
+        """ number of bytes of data in [start, end) """
+        size = 0
+        for address, data in self.getSegments(start, end):
+            size = size + len(data)
+        return size
+
+    #----------------------------------------------------------------------
+    def getEnd(self, start=0, end=None):
+        """ address after the last byte of data in [start, end), None if empty """
+        segments = self.getSegments(start, end)
+        if not segments:
+            return None
+        address, data = segments[-1]
+        return address + len(data)
+
+    #----------------------------------------------------------------------
+    def getRange(self, start, end, fill=0xFF):
+        """ bytearray of the memory from start to end, gaps are filled """
+        memory = bytearray(chr(fill)) * (end - start)
+        for address, data in self.getSegments(start, end):
+            memory[address - start:address - start + len(data)] = data
+        return memory
+
+# ------------------------------------------------------------------------------
+# parseHex: memory image of the lines of a .hex file
+# ------------------------------------------------------------------------------
+
+def parseHex(lines):
+    image = MemoryImage()
+    base = 0
+    lineno = 0
+    for line in lines:
+        lineno = lineno + 1
+        line = line.strip()
+        if line == "":
+            continue
+        if line[0] != ":":
+            raise HexSyntaxError("record does not start with ':'", lineno)
+        try:
+            record = bytearray(binascii.unhexlify(line[1:]))
+        except TypeError:
+            raise HexSyntaxError("bad hexadecimal digits", lineno)
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise HexSyntaxError("bad record length", lineno)
+        if sum(record) & 0xFF:
+            raise HexChecksumError("bad checksum", lineno)
+        record_type = record[3]
+        data = record[4:-1]
+        if record_type == Data_Record:
+            image.write(base + (record[1] << 8) + record[2], data)
+        elif record_type == End_Of_File_Record:
+            break
+        elif record_type in (Extended_Linear_Address_Record, Extended_Segment_Address_Record) \
+             and len(data) != 2:
+            raise HexSyntaxError("bad address record", lineno)
+        elif record_type == Extended_Linear_Address_Record:
+            # upper 16 bits (bits 16-31) of the data address
+            base = ((data[0] << 8) + data[1]) << 16
+        elif record_type == Extended_Segment_Address_Record:
+            base = ((data[0] << 8) + data[1]) << 4
+        elif record_type in (Start_Segment_Address_Record, Start_Linear_Address_Record):
+            image.start = int(binascii.hexlify(str(data)), 16)
+        else:
+            raise HexRecordError("unsupported record type %d" % record_type, lineno)
+    return image
+
+# ------------------------------------------------------------------------------
+# readHex: memory image of a .hex file
+# ------------------------------------------------------------------------------
+
+def readHex(filename):
+    fichier = open(filename, 'r')
+    try:
+        return parseHex(fichier)
+    finally:
+        fichier.close()
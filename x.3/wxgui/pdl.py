@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino PDL libraries
+
+    Parse the .pdl (8-bit) or .pdl32 (32-bit) files and keep the result,
+    in memory and on disk, until one of the files changes.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os
+import cPickle
+
+from wxgui.translator import Translator
+
+# bump it each time the content of the cache changes
+CACHE_VERSION = 1
+
+# fixed reserved words
+FIXED_RW = ("setup","loop","HIGH","LOW","INPUT","OUTPUT","void","FOSC","MIPS","ON","OFF","TRUE","FALSE")
+
+# libraries already loaded by this process
+loaded = {}
+
+########################################################################
+class Library:
+    """ instructions of all the PDL files of one architecture """
+
+    #----------------------------------------------------------------------
+    def __init__(self, stamp):
+        self.version = CACHE_VERSION
+        self.stamp = stamp
+        self.keywordList = []
+        self.reservedword = []
+        self.libinstructions = []
+        self.rw = []
+        self.translator = None
+
+    #----------------------------------------------------------------------
+    def parse(self, pdldir):
+        for fichier, mtime, size in self.stamp:
+            # check content of the PDL file
+            libfile=open(os.path.join(pdldir, fichier),'r')
+            for line in libfile:
+                if line!="\n":
+                    # arduino's instruction
+                    instruction=line[0:line.find(" ")]
+                    self.keywordList.append(instruction)
+                    # library's instruction
+                    cnvinstruction=line[line.find(" ")+1:line.find("#")]
+                    # find #include & #define
+                    include=""
+                    define=""
+                    explode=line.split("#")
+                    if len(explode)>=2:
+                        include=explode[1]
+                    if len(explode)==3:
+                        define=explode[2]
+                    # append to the list
+                    self.libinstructions.append([instruction,cnvinstruction,include,define])
+            libfile.close()
+        # one matcher for all the instructions
+        self.translator = Translator(self.libinstructions)
+        # clean up the keyword list
+        self.keywordList.sort()
+        seen = set()
+        keywords = []
+        for keyword in self.keywordList:
+            if keyword not in seen:
+                seen.add(keyword)
+                keywords.append(keyword)
+        self.keywordList = keywords
+        # make reserved words list
+        for instruction in self.libinstructions:
+            chaine=instruction[0]
+            self.rw.append(chaine)
+            pos = chaine.find(".")
+            if pos != -1:
+                self.reservedword.append(chaine[0:pos])
+                self.reservedword.append(chaine[pos+1:len(chaine)])
+            else:
+                self.reservedword.append(chaine)
+        # sort keywords for short key help
+        self.rw.sort(key=lambda x: x.lower())
+        # adding fixed reserved word
+        self.reservedword.extend(FIXED_RW)
+
+# ------------------------------------------------------------------------------
+# getStamp: name, modification time and size of each PDL file
+# ------------------------------------------------------------------------------
+
+def getStamp(pdldir, libext):
+    stamp = []
+    # listdir order is kept, it is the order instructions are replaced in
+    for fichier in os.listdir(pdldir):
+        filename,extension=os.path.splitext(fichier)
+        if extension==libext:
+            st = os.stat(os.path.join(pdldir, fichier))
+            stamp.append((fichier, st.st_mtime, st.st_size))
+    return stamp
+
+# ------------------------------------------------------------------------------
+# loadLibrary: parsed PDL files, from memory, from cache or from scratch
+# ------------------------------------------------------------------------------
+
+def loadLibrary(libdir, libext, cachedir=None):
+    pdldir = os.path.join(libdir, 'pdl')
+    stamp = getStamp(pdldir, libext)
+
+    lib = loaded.get(pdldir)
+    if lib is not None and lib.stamp == stamp:
+        return lib
+
+    cachefile = None
+    if cachedir is not None:
+        cachefile = os.path.join(cachedir, 'pdl' + libext.replace('.pdl', '') + '.cache')
+        lib = readCache(cachefile)
+        if lib is not None and (lib.version != CACHE_VERSION or lib.stamp != stamp):
+            lib = None
+
+    if lib is None:
+        lib = Library(stamp)
+        lib.parse(pdldir)
+        if cachefile is not None:
+            writeCache(cachefile, lib)
+
+    loaded[pdldir] = lib
+    return lib
+
+#----------------------------------------------------------------------
+def readCache(cachefile):
+    try:
+        fichier = open(cachefile, 'rb')
+        try:
+            return cPickle.load(fichier)
+        finally:
+            fichier.close()
+    except Exception:
+        # missing, old or corrupted cache
+        return None
+
+#----------------------------------------------------------------------
+def writeCache(cachefile, lib):
+    try:
+        if not os.path.isdir(os.path.dirname(cachefile)):
+            os.makedirs(os.path.dirname(cachefile))
+        # several builds may run at the same time
+        tmp = '%s.%d.tmp' % (cachefile, os.getpid())
+        fichier = open(tmp, 'wb')
+        cPickle.dump(lib, fichier, cPickle.HIGHEST_PROTOCOL)
+        fichier.close()
+        if os.path.exists(cachefile):
+            os.remove(cachefile)
+        os.rename(tmp, cachefile)
+    except (IOError, OSError):
+        # cache is only an optimization
+        pass
@@ -26,6 +26,7 @@
 # ------------------------------------------------------------------------------
 
 from check import *
+from wxgui.builder import *
 
 EVT_RESULT_REVISION_ID = wx.NewId()
 
@@ -37,28 +38,59 @@ class ResultEventRevision(wx.PyEvent):
         wx.PyEvent.__init__(self)
         self.SetEventType(EVT_RESULT_REVISION_ID)
         self.data = data
-	
-# ------------------------------------------------------------------------------
-# current version
-# ------------------------------------------------------------------------------
 
-pinguino_version="x.3"
+EVT_RESULT_BUILD_ID = wx.NewId()
+
+def EVT_RESULT_BUILD(win, func):
+    win.Connect(-1, -1, EVT_RESULT_BUILD_ID, func)
+
+class ResultEventBuild(wx.PyEvent):
+    def __init__(self, worker, kind, data):
+        wx.PyEvent.__init__(self)
+        self.SetEventType(EVT_RESULT_BUILD_ID)
+        self.worker = worker
+        self.kind = kind        # 'message', 'step' or 'done'
+        self.data = data
 
 # ------------------------------------------------------------------------------
-# paths
+# BuildWorker: build a sketch without blocking the main loop
 # ------------------------------------------------------------------------------
 
-HOME_DIR    = os.getcwd()
-THEME_DIR    = os.path.join(HOME_DIR, 'theme')
-SOURCE_DIR    = os.path.join(HOME_DIR, 'source')
-LOCALE_DIR    = os.path.join(HOME_DIR, 'locale')
-P32_DIR        = os.path.join(HOME_DIR, 'p32')
-P8_DIR        = os.path.join(HOME_DIR, 'p8')
-SVN_DIR        = 'http://pinguino32.googlecode.com/svn/branches/x.3/'
-APP_CONFIG    = os.path.join(HOME_DIR, '.config')
-TEMP_DIR = os.path.join(HOME_DIR, '.temp')
-EXAMPLES_DIR = os.path.join(HOME_DIR, 'examples')
+class BuildWorker(threading.Thread, Builder):
+    """ messages, steps and result are posted to window as ResultEventBuild
+
+    the .hex is left in builddir, the window copies it next to the sketch
+    and removes builddir once the build is done """
+
+    #----------------------------------------------------------------------
+    def __init__(self, window, filename, board, upload=False):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.window = window
+        self.filename = filename
+        self.board = board
+        self.upload = upload
+        self.setOSvariables()
+        self.builddir = self.newBuildDir(board)
+        self.output = os.path.join(self.builddir, 'sketch.hex')
+
+    #----------------------------------------------------------------------
+    def displaymsg(self, message, clearpanel):
+        wx.PostEvent(self.window, ResultEventBuild(self, 'message', (message, clearpanel)))
+
+    #----------------------------------------------------------------------
+    def onBuildStep(self, step):
+        wx.PostEvent(self.window, ResultEventBuild(self, 'step', step))
 
+    #----------------------------------------------------------------------
+    def run(self):
+        retour = False
+        try:
+            retour = self.build(self.filename, self.board, self.builddir, time.time(), self.output)
+        except Exception, e:
+            self.displaymsg("error %s: %s\n" % (e.__class__.__name__, e), 0)
+        wx.PostEvent(self.window, ResultEventBuild(self, 'done', retour == True))
+	
 # ------------------------------------------------------------------------------
 # default
 # ------------------------------------------------------------------------------
@@ -67,16 +99,17 @@ BOARD_DEFAULT = Pinguino2550()
 gui=False
 
 # ------------------------------------------------------------------------------
-# traducciones
+# boards menu ids
 # ------------------------------------------------------------------------------
-from wxgui._trad import _
+for b in range(len(boardlist)):
+    boardlist[b].id = wx.NewId()
 
 
 # ------------------------------------------------------------------------------
 # Pinguino Class
 # ------------------------------------------------------------------------------
 
-class Pinguino(framePinguinoX, Editor):
+class Pinguino(framePinguinoX, Editor, Builder):
 
     global lang
     global gui
@@ -89,12 +122,12 @@ class Pinguino(framePinguinoX, Editor):
     debug_thread=False
     debug_flag=False
     in_verify=0
+    buildWorker=None
 
     noname=0
     keywordList=[]
     reservedword=[]
     libinstructions=[]
-    regobject=[]
     rw=[]
     THEME=[]
     KEYWORD=[]
@@ -136,6 +169,7 @@ class Pinguino(framePinguinoX, Editor):
 
         #Threads
         EVT_RESULT_REVISION(self, self.setRevision)
+        EVT_RESULT_BUILD(self, self.OnBuildEvent)
         threadRevision = threading.Thread(target=self.getRevision, args=( ))
         threadRevision.start()
 
@@ -263,6 +297,7 @@ class Pinguino(framePinguinoX, Editor):
 	self.Bind(wx.EVT_MENU, self.OnVerify, self.menu.menuItemCompile)
 	self.Bind(wx.EVT_MENU, self.OnUpload, self.menu.menuItemUpload)
 	self.Bind(wx.EVT_MENU, self.OnVerifyUpload, self.menu.menuItemCompileUpload)
+	self.Bind(wx.EVT_MENU, self.OnCancelBuild, self.menu.menuItemCancelBuild)
 
 
 	##plugin
@@ -406,30 +441,6 @@ class Pinguino(framePinguinoX, Editor):
 	    self.buildLateralDir(lateralPath)
 	    
 
-# ----------------------------------------------------------------------
-# get OS name and define some OS dependant variable
-# ----------------------------------------------------------------------
-    def setOSvariables(self):
-        if sys.platform == 'darwin':
-            self.osdir = 'macosx'
-            self.debug_port = '/dev/tty.usbmodem1912'
-            self.c8 = 'sdcc'
-            self.u32 = 'mphidflash'
-            self.make = 'make'
-        elif sys.platform == 'win32':
-            self.osdir = 'win32'
-            self.debug_port = 15
-            self.c8 = 'sdcc.exe'
-            self.u32 = 'mphidflash.exe'
-            self.make = os.path.join(HOME_DIR, self.osdir, 'p32', 'bin', 'make.exe')
-        else:
-            self.osdir = 'linux'
-            self.debug_port = '/dev/ttyACM0'
-            self.c8 = 'sdcc'
-            self.u32 = 'ubw32'
-            self.make = 'make'
-
-
 # ------------------------------------------------------------------------------
 # Thread Functions
 # ------------------------------------------------------------------------------
@@ -555,7 +566,6 @@ class Pinguino(framePinguinoX, Editor):
 
 		# clear all the lists before rebuild them
 		del self.rw[:]
-		del self.regobject[:]
 		del self.keywordList[:]
 		del self.reservedword[:]
 		del self.libinstructions[:]
@@ -586,7 +596,6 @@ class Pinguino(framePinguinoX, Editor):
     def setBoard(self, name):
 	# clear all the lists before rebuild them
 	del self.rw[:]
-	del self.regobject[:]
 	del self.keywordList[:]
 	del self.reservedword[:]
 	del self.libinstructions[:]
@@ -710,9 +719,12 @@ class Pinguino(framePinguinoX, Editor):
 # ------------------------------------------------------------------------------
 
     def OnVerify(self, event=None):
-        global lang
-        self.in_verify=1
-        t0 = time.time()
+        """ start building the current file, return False if it can't be """
+        return self.startBuild(upload=False)
+
+    #----------------------------------------------------------------------
+    def startBuild(self, upload):
+        """ build in a BuildWorker, a build still running is cancelled """
         if self.GetPath()==-1:
             dlg = wx.MessageDialog(self,
                                    _('Open file first !!'),
@@ -729,33 +741,49 @@ class Pinguino(framePinguinoX, Editor):
         filename,extension=os.path.splitext(filename)
         if os.path.exists(filename+".hex"):
             os.remove(filename+".hex")
-        if os.path.exists(os.path.join(SOURCE_DIR, "user.c")):
-            os.remove(os.path.join(SOURCE_DIR, "user.c"))
-        retour=self.preprocess(filename, self.curBoard)
-        if retour=="error":
-            return False
-        # compilation
-        if self.curBoard.arch == 8:
-            MAIN_FILE="main.hex"
-        else:
-            MAIN_FILE="main32.hex"
-        retour=self.compile(filename, self.curBoard)
-        if retour!=0:
-            self.displaymsg(_("error while compiling file ")+filename,0)
-        else:
-            retour=self.link(filename, self.curBoard)
-            if os.path.exists(os.path.join(SOURCE_DIR, MAIN_FILE))!=True:
-                self.displaymsg(_("error while linking")+" "+filename+".o",0)
-		return False
-            else:
-                shutil.copy(os.path.join(SOURCE_DIR, MAIN_FILE), filename+".hex")
-                self.displaymsg(_("compilation done")+"\n",0)
-                self.displaymsg(self.getCodeSize(filename, self.curBoard)+"\n",0)
-                self.displaymsg(str(time.time() - t0) + " "+_("seconds process time")+"\n",0)
-                os.remove(os.path.join(SOURCE_DIR, MAIN_FILE))
-                #os.remove(filename+".c")
-		return True
-        self.in_verify=0
+        # the new build supersedes the one in flight
+        if self.buildWorker is not None:
+            self.buildWorker.cancelBuild()
+        self.in_verify=1
+        self.buildWorker=BuildWorker(self, filename, self.curBoard, upload)
+        self.buildWorker.start()
+        return True
+
+    #----------------------------------------------------------------------
+    def OnBuildEvent(self, event):
+        """ messages and result of a BuildWorker """
+        worker = event.worker
+        current = worker is self.buildWorker
+        if event.kind == 'done':
+            if current:
+                self.buildWorker = None
+                self.in_verify = 0
+                if event.data:
+                    shutil.copy(worker.output, worker.filename+".hex")
+                    self.statusBarEditor.SetStatusText(number=3, text=_("compilation done"))
+                else:
+                    self.statusBarEditor.SetStatusText(number=3, text=_("compilation failed"))
+            self.removeBuildDir(worker.builddir)
+            if current and event.data and worker.upload:
+                self.OnUpload()
+        elif not current:
+            # superseded or cancelled build
+            pass
+        elif event.kind == 'message':
+            message, clearpanel = event.data
+            self.displaymsg(message, clearpanel)
+        elif event.kind == 'step':
+            self.statusBarEditor.SetStatusText(number=3, text=event.data+"...")
+
+    #----------------------------------------------------------------------
+    def OnCancelBuild(self, event=None):
+        if self.buildWorker is not None:
+            self.buildWorker.cancelBuild()
+            self.buildWorker = None
+            self.in_verify = 0
+            self.displaymsg(_("build cancelled")+"\n", 0)
+            self.statusBarEditor.SetStatusText(number=3, text=_("build cancelled"))
+
 	
         
 # ------------------------------------------------------------------------------
@@ -767,20 +795,14 @@ class Pinguino(framePinguinoX, Editor):
             filename = self.GetPath()
             filename, extension = os.path.splitext(filename)
             if os.path.exists(filename + '.hex'):
-                if self.curBoard.arch == 8:
-                    u = Uploader(self.logwindow, filename, self.curBoard)
-                else:
-                    fichier = open(os.path.join(SOURCE_DIR, 'stdout'), 'w+')
-                    sortie=Popen([os.path.join(HOME_DIR, self.osdir, 'p32', 'bin', self.u32),
-                                  "-w",
-                                  filename+".hex",
-                                  "-r",
-                                  "-n"],
-                                 stdout=fichier, stderr=STDOUT)
-                    sortie.communicate()
-                    fichier.seek(0)
-                    self.displaymsg(fichier.read(),0)
-                    fichier.close()
+                listeners = [self.OnUploadEvent]
+                eventlog = self.getElse("Upload", "eventlog", "")
+                if eventlog != "":
+                    listeners.append(UploadLog(eventlog))
+                u = Uploader(self.logwindow, filename, self.curBoard,
+                             self.getElse("Upload", "mode", "full"),
+                             self.getElse("Upload", "verify", "False") == "True",
+                             listeners)
             else:# no file
                 dlg = wx.MessageDialog(self,
                                        _('File must be verified/compiled before upload'),
@@ -798,9 +820,29 @@ class Pinguino(framePinguinoX, Editor):
         if event != None: event.Skip()
 
 
+    #----------------------------------------------------------------------
+    def OnUploadEvent(self, event):
+        """ show the progress of the upload in the status bar """
+        if event['event'] == 'erase_start':
+            text = _("erasing")+"..."
+        elif event['event'] == 'write':
+            text = _("writing")+" %d%%" % event['percent']
+        elif event['event'] == 'verify_start':
+            text = _("verifying")+"..."
+        elif event['event'] == 'done' and event['status'] == 0:
+            text = _("upload done")+" (%d bytes/s)" % event['rate']
+        elif event['event'] == 'done':
+            text = _("upload failed")
+        else:
+            return
+        self.statusBarEditor.SetStatusText(number=3, text=text)
+        # the upload runs in the GUI thread, repaint now
+        self.statusBarEditor.Update()
+
     #----------------------------------------------------------------------
     def OnVerifyUpload(self, even=None):
-	if self.OnVerify(): self.OnUpload()
+	# OnBuildEvent uploads once the build succeeded
+	self.startBuild(upload=True)
 	
 
 
@@ -881,67 +923,12 @@ class Pinguino(framePinguinoX, Editor):
 
     def readlib(self, board):
         # trying to find PDL files to store reserved words
-        self.keywordList = []
-        if board.arch == 8:
-            libext='.pdl'
-            libdir=P8_DIR
-        else:
-            libext='.pdl32'
-            libdir=P32_DIR
-        #for fichier in os.listdir(os.path.join(libdir, 'lib')):
-        for fichier in os.listdir(os.path.join(libdir, 'pdl')):
-            filename,extension=os.path.splitext(fichier)
-            if extension==libext:
-                # check content of the PDL file
-                #libfile=open(os.path.join(libdir, 'lib', fichier),'r')
-                libfile=open(os.path.join(libdir, 'pdl', fichier),'r')
-                for line in libfile:
-                    if line!="\n":
-                        # arduino's instruction
-                        instruction=line[0:line.find(" ")]
-                        self.keywordList.append(instruction)
-                        # library's instruction
-                        cnvinstruction=line[line.find(" ")+1:line.find("#")]
-                        # find #include & #define
-                        #include=line[line.find("#")+1:len(line)]
-                        include=""
-                        define=""
-                        explode=line.split("#")
-                        if len(explode)>=2:
-                            include=explode[1]
-                        if len(explode)==3:
-                            define=explode[2]
-                        # append to the list
-                        self.libinstructions.append([instruction,cnvinstruction,include,define])
-                        #regex = re.compile(r"(^|[' ']|['=']|['{']|[',']|[\t]|['(']|['!'])"+str(instruction))+"[ ]*\(")
-                        #regex = re.compile(r"(^|[' ']|['=']|['{']|[',']|[\t]|['(']|['!'])"+str(instruction)+r"([' ']|['=']|['}']|[',']|[';']|[\t]|[')'].*)")
-                        #regex = re.compile(r"(^|[' ']|['=']|['{']|[',']|[\t]|['(']|['!'])"+str(instruction)+".*")
-                        #regex = re.compile(r'\W%s\W' % re.escape(str(instruction)))
-                        regex = re.compile(r"(^|[' ']|['=']|['{']|[',']|[\t]|['(']|['!'])%s\W" % re.escape(str(instruction)))
-                        self.regobject.append(regex)
-                libfile.close()
-        # clean up the keyword list
-        self.keywordList.sort()
-        self.keywordList = self.ClearRedundancy(self.keywordList)
+        lib = self.getLibrary(board)
+        self.libinstructions.extend(lib.libinstructions)
+        self.keywordList = lib.keywordList[:]
         self.keywordNum = len(self.keywordList)
-        # make reserved words list
-        if len(self.libinstructions)!=0:
-            for i in range(len(self.libinstructions)):
-                chaine=self.libinstructions[i][0]
-                self.rw.append(chaine)
-                pos = chaine.find(".")
-                if pos != -1:
-                    self.reservedword.append(chaine[0:pos])
-                    self.reservedword.append(chaine[pos+1:len(chaine)])
-                else:
-                    self.reservedword.append(chaine)
-            # sort keywords for short key help
-            self.rw.sort(key=lambda x: x.lower())
-        # adding fixed reserved word
-        fixed_rw=("setup","loop","HIGH","LOW","INPUT","OUTPUT","void","FOSC","MIPS","ON","OFF","TRUE","FALSE")
-        for i in range(len(fixed_rw)):
-            self.reservedword.append(fixed_rw[i])
-	    
+        self.rw.extend(lib.rw)
+        self.reservedword.extend(lib.reservedword)
 	self.displaymsg(_("Board config")+":\t"+board.name+"\n", 0)
 
 # ------------------------------------------------------------------------------
@@ -985,353 +972,6 @@ class Pinguino(framePinguinoX, Editor):
             # assume it's a posix or win32 platform
             return message
 
-# ------------------------------------------------------------------------------
-# preprocess
-# ------------------------------------------------------------------------------
-
-    def preprocess(self, filename, board):
-        defineword={}
-        index=0
-        fileline={}
-
-        # delete old define.h and create a new one
-        if os.path.exists(os.path.join(SOURCE_DIR, 'define.h')):
-            os.remove(os.path.join(SOURCE_DIR, 'define.h'))
-        fichier=open(os.path.join(SOURCE_DIR, 'define.h'), 'a')
-        fichier.close()
-
-        # rename .pde in user.c
-        path,name = os.path.split(filename)
-        shutil.copy(filename + '.pde', os.path.join(SOURCE_DIR, 'user.c'))
-        fichier = open(os.path.join(SOURCE_DIR, 'user.c'), 'a')
-        #fichier.writelines("\n")
-        fichier.close()
-
-        ### debug mode
-        ##DEBUG_STR = "NODEBUG"
-        ##if self.debug == self.ID_USBCDC:
-            ##DEBUG_STR = "USBCDCDEBUG"
-        ##if self.debug == self.ID_USBBULK:
-            ##DEBUG_STR = "USBBULKDEBUG"
-        ##if self.debug == self.ID_USBHID:
-            ##DEBUG_STR = "USBHIDDEBUG"
-        ##if self.debug == self.ID_USBOTG:
-            ##DEBUG_STR = "USBOTGDEBUG"
-        ##if self.debug == self.ID_UART1:
-            ##DEBUG_STR = "UART1DEBUG"
-        ##if self.debug == self.ID_UART2:
-            ##DEBUG_STR = "UART2DEBUG"
-        ##self.adddefine("#define DEBUG_MODE " + DEBUG_STR)
-
-        # board
-        #if board.arch == 8:
-        #    self.adddefine("#define " + board.board)
-
-        # add #include and #define from user.c to define.h
-        fichier = open(os.path.join(SOURCE_DIR, 'user.c'), 'r')
-        i=0
-        for line in fichier:
-            if line.find("#include")!=-1 or line.find("#define")!=-1:
-                self.adddefine(line)    # add to define.h
-                fileline[i]="\r\n";    # delete from user.c
-                i=i+1
-            else:
-                fileline[i]=line
-                i=i+1
-        fichier.close()
-
-        # rewrite file user.c without #include and #define
-        fichier = open(os.path.join(SOURCE_DIR, 'user.c'), 'w')
-        for cpt in range(i):
-            fichier.write(fileline[cpt])
-        fichier.close()
-
-        # search and replace arduino keywords in file
-        fichier = open(os.path.join(SOURCE_DIR, 'user.c'), 'r')
-        content = fichier.read()
-        content = self.removecomments(content)
-        content = content.split('\n')
-        nblines = 0
-        for line in content:
-            resultline = self.replaceword(line)
-            if resultline.find("error")==1:
-                line = resultline
-                print "error " + resultline
-                self.displaymsg("error "+resultline,1)
-                return "error"
-            fileline[nblines] = resultline
-            nblines += 1
-        fichier.close()
-
-        # save new tmp file
-        fichier = open(os.path.join(SOURCE_DIR, 'user.c'), 'w')
-        for i in range(0,nblines):
-            fichier.writelines(fileline[i])
-        fichier.writelines("\r\n")
-        fichier.close()
-
-        # sort define.h
-        fichier = open(os.path.join(SOURCE_DIR, 'define.h'), "r")
-        lignes = fichier.readlines()
-        lignes.sort()
-        fichier.close()
-
-        # save sorted lines
-        fichier = open(os.path.join(SOURCE_DIR, 'define.h'), "w")
-        fichier.writelines(lignes)
-        fichier.close()
-        return
-
-# ------------------------------------------------------------------------------
-# adddefine
-# ------------------------------------------------------------------------------
-
-    def adddefine(self,chaine):
-        """ add #define in define.h file """
-        fichier = open(os.path.join(SOURCE_DIR, 'define.h'), 'a')
-        fichier.writelines(chaine+"\n")
-        fichier.close()
-
-# ------------------------------------------------------------------------------
-# notindefine
-# ------------------------------------------------------------------------------
-
-    def notindefine(self,chaine):
-        """ verify if #define exists in define.h file """
-        fichier = open(os.path.join(SOURCE_DIR, 'define.h'), 'r')
-        for line in fichier:
-            # chaine has been found ?
-            if line.find(chaine)!=-1:
-                fichier.close()
-                return(0)
-        fichier.close()
-        return(1)
-
-# ------------------------------------------------------------------------------
-# replaceword
-# ------------------------------------------------------------------------------
-
-    def replaceword(self,line):
-        """ convert pinguino language in C language """
-        # replace arduino/pinguino language and add #define or #include to define.h
-        for i in range(len(self.libinstructions)):
-            if re.search(self.regobject[i], line):
-                line = line.replace(str(self.libinstructions[i][0]), str(self.libinstructions[i][1]))
-                if self.notindefine("#"+str(self.libinstructions[i][2])) == 1:
-                    self.adddefine("#"+str(self.libinstructions[i][2]))
-                if self.notindefine("#"+str(self.libinstructions[i][3])) == 1:
-                    self.adddefine("#"+str(self.libinstructions[i][3]))
-        return line+"\n"
-
-# ------------------------------------------------------------------------------
-# removecomment
-# ------------------------------------------------------------------------------
-
-    def removecomments(self, text):
-        def replacer(match):
-            s = match.group(0)
-            if s.startswith('/'):
-                return ""
-            else:
-                return s
-        pattern = re.compile(
-            r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
-            re.DOTALL | re.MULTILINE
-        )
-        return re.sub(pattern, replacer, text)
-
-# ------------------------------------------------------------------------------
-# compile
-# ------------------------------------------------------------------------------
-
-    def compile(self, filename, board):
-        if (self.debug_output == 1):
-            print("compile " + board.proc)
-        else:
-            if board.arch == 8:
-                fichier = open(os.path.join(SOURCE_DIR, 'stdout'), 'w+')
-                if board.bldr == 'boot2':
-                    sortie = Popen([os.path.join(HOME_DIR, self.osdir, 'p8', 'bin', self.c8),\
-                                    "-mpic16",\
-                                    "--denable-peeps",\
-                                    "--obanksel=9",\
-                                    "--opt-code-size",\
-                                    "--optimize-cmp",\
-                                    "--optimize-df",\
-                                    "-p" + board.proc,\
-                                    "-D" + board.board,\
-                                    "-D" + board.bldr,\
-                                    "-I" + os.path.join(P8_DIR, 'include'),\
-                                    "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
-                                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
-                                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
-                                    "-I" + os.path.dirname(filename),\
-                                    "--compile-only",\
-                                    "-o" + os.path.join(SOURCE_DIR, 'main.o'),\
-                                    os.path.join(SOURCE_DIR, 'main.c')],\
-                                   stdout=fichier, stderr=STDOUT)
-                else:# if board.bldr == 'boot4'
-#                                    "--opt-code-size",\
-                    sortie = Popen([os.path.join(HOME_DIR, self.osdir, 'p8', 'bin2', self.c8),\
-                                    "-mpic16",\
-                                    "--obanksel=9",\
-                                    "--optimize-cmp",\
-                                    "--optimize-df",\
-                                    "--denable-peeps",\
-                                    "--ivt-loc=" + str(board.memstart),\
-                                    "-p" + board.proc,\
-                                    "-D" + board.board,\
-                                    "-D" + board.bldr,\
-                                    "-I" + os.path.join(P8_DIR, 'include'),\
-                                    "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
-                                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
-                                    "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
-                                    "-I" + os.path.dirname(filename),\
-                                    "--compile-only",\
-                                    "-o" + os.path.join(SOURCE_DIR, 'main.o'),\
-                                    os.path.join(SOURCE_DIR, 'main.c')],\
-                                   stdout=fichier, stderr=STDOUT)
-                sortie.communicate()
-                if sortie.poll()!=0:
-                    fichier.seek(0)
-                    for ligne in fichier:
-                        if ligne.find('error')!=-1:
-                            self.displaymsg(ligne, 0)
-                fichier.seek(0)
-                line=fichier.readline()
-                if line.find("error")!=-1:
-                    number=line[line.find(":")+1:line.find("error")-2]
-                    #self.highlightline(int(number)-1,'pink')
-                    self.displaymsg("error line " + number + "\n", 1)
-                    self.displaymsg(line[line.find("error")+7:len(line)],0)
-                fichier.close()
-                return sortie.poll()
-            else:
-                return 0
-
-# ------------------------------------------------------------------------------
-# link
-# ------------------------------------------------------------------------------
-
-    def link(self, filename, board):
-        if (self.debug_output == 1):
-            print("link " + board.proc)
-        else:
-            fichier = open(os.path.join(SOURCE_DIR, 'stdout'), 'w+')
-            if board.arch == 8:
-                if board.bldr == 'boot2':
-                    sortie=Popen([os.path.join(HOME_DIR, self.osdir, 'p8', 'bin', self.c8),\
-                                  "-o" + os.path.join(SOURCE_DIR, 'main.hex'),\
-                                  "--denable-peeps",\
-                                  "--obanksel=9",\
-                                  "--opt-code-size",\
-                                  "--optimize-cmp",\
-                                  "--optimize-df",\
-                                  "--no-crt",\
-                                  "-Wl-s" + os.path.join(P8_DIR, 'lkr', board.bldr + '.' + board.proc + '.lkr') + ",-m",\
-                                  "-mpic16",\
-                                  "-p" + board.proc,\
-                                  "-D" + board.bldr,\
-                                  "-I" + os.path.join(P8_DIR, 'include'),\
-                                  "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
-                                  "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
-                                  "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
-                                  "-L" + os.path.join(P8_DIR, 'lib', 'pic16'),\
-                                  '-llibio' + board.proc + '.lib',\
-                                  '-llibc18f.lib',\
-                                  '-llibm18f.lib',\
-                                  '-llibsdcc.lib',\
-                                  os.path.join(P8_DIR, 'obj', 'application_iface.o'),\
-                                  os.path.join(P8_DIR, 'obj', 'boot_iface.o'),\
-                                  os.path.join(P8_DIR, 'obj', 'usb_descriptors.o'),\
-                                  os.path.join(P8_DIR, 'obj', 'crt0ipinguino.o'),\
-                                  os.path.join(SOURCE_DIR, 'main.o')],\
-                                  stdout=fichier, stderr=STDOUT)
-                else:# if board.bldr == 'boot4'
-#                                  "--opt-code-size",\
-                    sortie=Popen([os.path.join(HOME_DIR, self.osdir, 'p8', 'bin2', self.c8),\
-                                  "-o" + os.path.join(SOURCE_DIR, 'main.hex'),\
-                                  "-mpic16",\
-                                  "--obanksel=9",\
-                                  "--optimize-cmp",\
-                                  "--optimize-df",\
-                                  "--denable-peeps",\
-                                  "--ivt-loc=" + str(board.memstart),\
-                                  "--use-crt=" + os.path.join(P8_DIR, 'obj', 'crt0i' + board.proc + '.o'),\
-                                  "-Wl-s" + os.path.join(P8_DIR, 'lkr', board.bldr + '.' + board.proc + '.lkr') + ",-m",\
-                                  "-p" + board.proc,\
-                                  "-D" + board.bldr,\
-                                  "-I" + os.path.join(P8_DIR, 'include'),\
-                                  "-I" + os.path.join(P8_DIR, 'include', 'non-free', 'pic16'),\
-                                  "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'core'),\
-                                  "-I" + os.path.join(P8_DIR, 'include', 'pinguino', 'libraries'),\
-                                  "-L" + os.path.join(P8_DIR, 'lib', 'pic16'),\
-                                  '-llibio' + board.proc + '.lib',\
-                                  '-llibc18f.lib',\
-                                  '-llibm18f.lib',\
-                                  '-llibsdcc.lib',\
-                                  os.path.join(SOURCE_DIR, 'main.o')],\
-                                  stdout=fichier, stderr=STDOUT)
-            else:#if board.arch == 32:
-                # "PDEDIR=" + os.path.dirname(self.GetPath()),\
-                # can't be used with Command Line version since editor isn't used
-                sortie=Popen([self.make,\
-                              "--makefile=" + os.path.join(SOURCE_DIR, 'Makefile32.'+self.osdir),\
-                              "HOME=" + HOME_DIR,\
-                              "PDEDIR=" + os.path.dirname(filename),\
-                              "PROC=" + board.proc,\
-                              "BOARD=" + board.board],\
-                             stdout=fichier, stderr=STDOUT)
-            sortie.communicate()
-            fichier.seek(0)
-            # Check if child process has terminated
-            if sortie.poll()!=0:
-                for ligne in fichier:
-                    if ligne.find('error')!=-1:
-                        self.displaymsg(ligne, 0)
-            fichier.close()
-	    if sys.platform=='win32':
-		if board.board=='PIC32_PINGUINO_220':
-		    badrecord=":040000059D0040001A\n"
-		else:
-		    badrecord=":040000059D006000FA\n"                
-		if os.path.exists(os.path.join(SOURCE_DIR,"main32tmp.hex")):
-		    fichiersource=open(os.path.join(SOURCE_DIR,"main32tmp.hex"),'r')
-		    fichierdest=open(os.path.join(SOURCE_DIR,"main32.hex"),'w+')
-		    for line in fichiersource:
-			if line!=badrecord:
-			    fichierdest.writelines(line)
-		    fichiersource.close()
-		    fichierdest.close()
-		    os.remove(os.path.join(SOURCE_DIR,"main32tmp.hex"))
-	    return sortie.poll()
-
-# ------------------------------------------------------------------------------
-# getCodeSize
-# ------------------------------------------------------------------------------
-
-    def getCodeSize(self, filename, board):
-        codesize = 0
-        address_Hi = 0
-        memfree = board.memend - board.memstart
-        fichier = open(filename + ".hex", 'r')
-        lines = fichier.readlines()
-        for line in lines:
-            byte_count = int(line[1:3], 16)
-            address_Lo = int(line[3:7], 16)
-            record_type= int(line[7:9], 16)
-            # extended linear address record
-            if record_type == 4:
-                address_Hi = int(line[9:13], 16) << 16
-			# address calculation
-            address = (address_Hi << 16) + address_Lo
-            # code size
-            if record_type == 0:
-                if address >= board.memstart:
-                    codesize = codesize + byte_count
-        fichier.close()
-        return "code size: " + str(codesize) + " / " + str(memfree) + " bytes" + " (" + str(100*codesize/memfree) + "% used)"
-
     #----------------------------------------------------------------------
     def OnPreferences(self, event=None):
         #app = wx.PySimpleApp(0)
@@ -1405,32 +1045,6 @@ class AutocompleterIDE(frameAutoCompleter, AutoCompleter):
     """"""
 
 
-# ------------------------------------------------------------------------------
-# getOptions
-# ------------------------------------------------------------------------------
-
-def getOptions():
-    parser = argparse.ArgumentParser(description='*** Pinguino IDE ***')
-    parser.add_argument('-v', '--version', dest='version', action='store_true', default=False, help='show Pinguino IDE version and exit')
-    parser.add_argument('-a', '--author', dest='author', action='store_true', default=False, help='show authors of this Pinguino IDE version and exit')
-    parser.add_argument('-f', '--filename', dest='filename', nargs=1, default=False, help='filename to process')
-    for b in range(len(boardlist)):
-        parser.add_argument(    boardlist[b].shortarg,
-                                    boardlist[b].longarg,
-                                    dest='board',
-                                    const=b,
-                                    action='store_const',
-                                    default=False,
-                                    help='compile code for ' + boardlist[b].board + ' board')
-    return parser.parse_args()
-
-# ------------------------------------------------------------------------------
-# getVersion
-# ------------------------------------------------------------------------------
-
-def getVersion():
-    return pinguino_version
-
 #----------------------------------------------------------------------
 def setGui(bool):
     global gui
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino project symbols
+
+    Functions, variables, defines and types of the open buffers, of the
+    sources of the sketch directory and of the Pinguino libraries, with the
+    file and the line defining them. Files are parsed again only when
+    their modification time or size change, and the index is kept on
+    disk between sessions.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os
+import re
+
+from wxgui.symbols import SymbolIndex
+from wxgui.pdl import readCache, writeCache
+
+# bump it each time the content of the cache changes
+CACHE_VERSION = 1
+
+# sources of a sketch directory
+SKETCH_EXT = ('.pde', '.c', '.h')
+
+# sources of the libraries, most of them are included as .c files
+LIBRARY_EXT = ('.c', '.h')
+
+# names the line parser may return for declarations it half understands
+IDENTIFIER = re.compile("^[A-Za-z_]\w*$")
+
+# ------------------------------------------------------------------------------
+# getDefinitions: (name, kind, line, detail) of the symbols of an index
+# ------------------------------------------------------------------------------
+
+def getDefinitions(index):
+    """ kind is 'function', 'variable', 'define' or 'type', detail the
+    return type, the type or the value, lines are counted from 1 """
+    definitions = []
+    isName = IDENTIFIER.match
+    line = 1
+    for symbols in index.lines:
+        if symbols:
+            variables, functions, directives, types = symbols
+            for name, tipo, params in functions:
+                definitions.append((name.replace("*", ""), 'function', line, tipo))
+            for name, tipo in variables:
+                definitions.append((name.replace("*", "").strip(), 'variable', line, tipo))
+            for directive, name, value in directives:
+                if directive == 'define':
+                    definitions.append((name, 'define', line, value))
+            for name in types:
+                definitions.append((name, 'type', line, ''))
+        line += 1
+    return [definition for definition in definitions if isName(definition[0])]
+
+#----------------------------------------------------------------------
+def parseFile(filename):
+    """ definitions of a source file """
+    fichier = open(filename, 'r')
+    try:
+        lines = fichier.read().split("\n")
+    finally:
+        fichier.close()
+    index = SymbolIndex(len(lines))
+    index.update(lines.__getitem__)
+    return getDefinitions(index)
+
+########################################################################
+class ProjectIndex:
+    """ definitions of the buffers, of the sketch directory and of the
+    sources of libdirs, looked up by name """
+
+    #----------------------------------------------------------------------
+    def __init__(self, libdirs, cachefile=None):
+        self.libdirs = libdirs
+        self.cachefile = cachefile
+        self.sketchdir = None
+        self.files = {}         # path: (mtime, size, definitions)
+        self.buffers = {}       # path: definitions of the open buffers
+        self.names = None       # name: [(path, line, kind, detail)], built on demand
+        self.load()
+
+    #----------------------------------------------------------------------
+    def load(self):
+        if self.cachefile is None:
+            return
+        cache = readCache(self.cachefile)
+        if cache is not None and cache[0] == CACHE_VERSION and cache[1] == self.libdirs:
+            self.files = cache[2]
+
+    #----------------------------------------------------------------------
+    def save(self):
+        if self.cachefile is not None:
+            writeCache(self.cachefile, (CACHE_VERSION, self.libdirs, self.files))
+
+    #----------------------------------------------------------------------
+    def getSources(self, sketchdir):
+        """ sources of sketchdir, then sources of the libraries """
+        sources = []
+        if sketchdir is not None and os.path.isdir(sketchdir):
+            for fichier in sorted(os.listdir(sketchdir)):
+                if os.path.splitext(fichier)[1] in SKETCH_EXT:
+                    sources.append(os.path.join(sketchdir, fichier))
+        for libdir in self.libdirs:
+            for root, dirs, files in os.walk(libdir):
+                dirs.sort()
+                for fichier in sorted(files):
+                    if os.path.splitext(fichier)[1] in LIBRARY_EXT:
+                        sources.append(os.path.join(root, fichier))
+        return sources
+
+    #----------------------------------------------------------------------
+    def scan(self, sketchdir=None):
+        """ parse the new or changed sources, return how many were """
+        files = {}
+        parsed = 0
+        for path in self.getSources(sketchdir):
+            try:
+                st = os.stat(path)
+                known = self.files.get(path)
+                if known is not None and known[:2] == (st.st_mtime, st.st_size):
+                    files[path] = known
+                else:
+                    files[path] = (st.st_mtime, st.st_size, parseFile(path))
+                    parsed = parsed + 1
+            except (IOError, OSError):
+                # removed while scanned
+                pass
+        changed = parsed or sketchdir != self.sketchdir or set(files) != set(self.files)
+        # replaced at once, lookups may run in another thread
+        self.sketchdir = sketchdir
+        self.files = files
+        if changed:
+            self.names = None
+            self.save()
+        return parsed
+
+    #----------------------------------------------------------------------
+    def setBuffer(self, path, definitions):
+        """ definitions of an open buffer, used instead of its file """
+        if self.buffers.get(path) != definitions:
+            self.buffers[path] = definitions
+            self.names = None
+
+    #----------------------------------------------------------------------
+    def keepBuffers(self, paths):
+        """ forget the buffers that are not in paths anymore """
+        for path in self.buffers.keys():
+            if path not in paths:
+                del self.buffers[path]
+                self.names = None
+
+    #----------------------------------------------------------------------
+    def getNames(self):
+        """ name: definitions, the buffers first, then the sketch
+        directory, then the libraries """
+        names = self.names
+        if names is not None:
+            return names
+        names = {}
+        buffers = self.buffers.copy()
+        files = self.files
+        sketch = [path for path in files if os.path.dirname(path) == self.sketchdir]
+        libraries = [path for path in files if os.path.dirname(path) != self.sketchdir]
+        sources = [(path, buffers[path]) for path in sorted(buffers)]
+        for path in sorted(sketch) + sorted(libraries):
+            if path not in buffers:
+                sources.append((path, files[path][2]))
+        for path, definitions in sources:
+            for name, kind, line, detail in definitions:
+                names.setdefault(name, []).append((path, line, kind, detail))
+        self.names = names
+        return names
+
+    #----------------------------------------------------------------------
+    def lookup(self, name):
+        """ [(path, line, kind, detail)] defining name """
+        return self.getNames().get(name, [])
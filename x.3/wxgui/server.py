@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino compile server
+
+    Keep boards and PDL libraries loaded and compile sketches on request,
+    so that editors and CI jobs do not pay the start of a new process for
+    each build.
+
+    Requests and responses are JSON objects, one per line:
+
+    -> {"file": "/path/to/sketch.pde", "board": "--pinguino2550"}
+    <- {"status": "ok", "hex": "/path/to/sketch.hex", "codesize": 1234,
+        "memsize": 24575, "duration": 1.2,
+        "errors": [], "diagnostics": [], "messages": [...]}
+
+    "board" is a long option of pinguino.py, a board name or a board
+    define (PIC18F2550), "output" may give the path of the .hex, in the
+    directory of the sketch. Each
+    diagnostic of the compiler is {"file", "line", "column", "severity",
+    "message"}.
+    {"command": "boards"} lists the boards and {"command": "ping"} only
+    answers {"status": "ok"}.
+
+    The server listens on a Unix socket (unix:/path/to/socket) or on a
+    TCP port of localhost ([host:]port). Any client may build the sketches
+    the server can read, only give another host on a trusted network.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import os
+import sys
+import time
+import json
+import threading
+import SocketServer
+
+from wxgui.builder import boardlist
+
+########################################################################
+class CompileServer:
+    """ build requests, one at a time, with an always loaded Builder """
+
+    #----------------------------------------------------------------------
+    def __init__(self, pobject):
+        self.pobject = pobject
+        self.lock = threading.Lock()
+        # messages are kept for the responses instead of being printed
+        pobject.messages = []
+        # parse PDL files of both architectures once for all
+        for arch in (8, 32):
+            for board in boardlist:
+                if board.arch == arch:
+                    pobject.getLibrary(board)
+                    break
+
+    #----------------------------------------------------------------------
+    def getBoard(self, name):
+        for board in boardlist:
+            if name in (board.longarg, board.longarg.lstrip('-'), board.name, board.board):
+                return board
+        return None
+
+    #----------------------------------------------------------------------
+    def process(self, request):
+        """ answer one request """
+        if not isinstance(request, dict):
+            return {'status': 'error', 'error': 'request must be a JSON object'}
+        command = request.get('command', 'build')
+        if command == 'ping':
+            return {'status': 'ok'}
+        elif command == 'boards':
+            return {'status': 'ok',
+                    'boards': [{'name': b.name, 'board': b.board, 'arch': b.arch,
+                                'proc': b.proc, 'option': b.longarg} for b in boardlist]}
+        elif command == 'build':
+            return self.build(request)
+        return {'status': 'error', 'error': 'unknown command ' + str(command)}
+
+    #----------------------------------------------------------------------
+    def build(self, request):
+        for field in ('file', 'board', 'output'):
+            if request.get(field) is not None and not isinstance(request[field], basestring):
+                return {'status': 'error', 'error': field + ' must be a string'}
+        filename = request.get('file')
+        board = self.getBoard(request.get('board'))
+        if board is None:
+            return {'status': 'error', 'error': 'unknown board ' + str(request.get('board'))}
+        if not filename or os.path.splitext(filename)[1] != '.pde':
+            return {'status': 'error', 'error': 'bad file extension, it should be .pde'}
+        if not os.path.isfile(filename):
+            return {'status': 'error', 'error': 'no such file ' + filename}
+        fname = os.path.splitext(os.path.abspath(filename))[0]
+        output = os.path.abspath(request.get('output') or fname + '.hex')
+        # only the .hex of a sketch is written, next to it
+        sketchdir = os.path.realpath(os.path.dirname(fname))
+        if os.path.dirname(os.path.realpath(output)) != sketchdir or os.path.splitext(output)[1] != '.hex':
+            return {'status': 'error', 'error': 'output must be a .hex file of the sketch directory'}
+
+        self.lock.acquire()
+        try:
+            pobject = self.pobject
+            pobject.messages = []
+            pobject.diagnostics = []
+            t0 = time.time()
+            builddir = pobject.newBuildDir(board)
+            try:
+                try:
+                    retour = pobject.build(fname, board, builddir, t0, output)
+                except Exception, e:
+                    pobject.messages.append("error %s: %s\n" % (e.__class__.__name__, e))
+                    retour = False
+            finally:
+                pobject.removeBuildDir(builddir)
+            messages = "".join(pobject.messages).splitlines()
+            diagnostics = [d.asDict() for d in pobject.diagnostics]
+        finally:
+            self.lock.release()
+
+        response = {'status': 'error',
+                    'board': board.name,
+                    'memsize': board.memend - board.memstart,
+                    'duration': round(time.time() - t0, 3),
+                    'errors': [line for line in messages if line.find('error')!=-1],
+                    'diagnostics': diagnostics,
+                    'messages': messages}
+        if retour == True:
+            response['status'] = 'ok'
+            response['hex'] = output
+            response['codesize'] = pobject.getCodeBytes(output, board)
+        return response
+
+########################################################################
+class RequestHandler(SocketServer.StreamRequestHandler):
+    """ one client connection, several requests """
+
+    #----------------------------------------------------------------------
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            line = line.strip()
+            if line == "":
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {'status': 'error', 'error': 'request is not valid JSON'}
+            else:
+                try:
+                    response = self.server.compiler.process(request)
+                except Exception, e:
+                    # answer instead of dropping the connection
+                    response = {'status': 'error', 'error': "%s: %s" % (e.__class__.__name__, e)}
+            self.wfile.write(json.dumps(response) + "\n")
+            self.wfile.flush()
+
+########################################################################
+class TCPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(SocketServer, 'UnixStreamServer'):
+    class UnixServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+        daemon_threads = True
+
+# ------------------------------------------------------------------------------
+# serve: listen on address until interrupted
+# ------------------------------------------------------------------------------
+
+def serve(address, pobject):
+    compiler = CompileServer(pobject)
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if os.path.exists(path):
+            os.remove(path)
+        server = UnixServer(path, RequestHandler)
+    else:
+        host = 'localhost'
+        port = address
+        if address.find(':') != -1:
+            host, port = address.rsplit(':', 1)
+        server = TCPServer((host, int(port)), RequestHandler)
+    server.compiler = compiler
+    print "pinguino compile server listening on " + address
+    try:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    finally:
+        server.server_close()
+        if address.startswith('unix:') and os.path.exists(address[len('unix:'):]):
+            os.remove(address[len('unix:'):])
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino sketch symbols
+
+    Find the functions, variables, defines and types of a sketch one line
+    at a time. A SymbolIndex keeps the symbols of each line of a buffer,
+    so that an edit only costs the parsing of the lines it touched.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import re
+
+# types known before any typedef
+BASE_TYPES = ("int", "float", "char", "double",
+              "u8", "u16", "u32", "u64",
+              "BOOL", "byte", "word", "void")
+
+# symbols of a line without any
+EMPTY = ((), (), (), ())
+
+# compiled regex of each list of types
+regexCache = {}
+
+# ------------------------------------------------------------------------------
+# getRegex: compiled regex of a tuple of types, built once
+# ------------------------------------------------------------------------------
+
+def getRegex(types):
+    if types in regexCache:
+        return regexCache[types]
+    if len(regexCache) > 32:
+        # typing a typedef makes a new list of types at each key
+        regexCache.clear()
+    tiposDatos = "|".join(types)
+    regex = (re.compile("[\s]*(unsigned)*[\s]*(" + tiposDatos + ")[\s]*[*]*[\s]*([*\w]*)[\s]*\(([\w ,*.]*)\)[\s]*"),
+             re.compile("[\s]*(volatile|register|static|extern)*[\s]*(unsigned|signed)*[\s]*(short|long)*[\s]*(" + tiposDatos + ")[\s]*(.+);"),
+             re.compile("[\s]*(struct|union|enum)[\s]*([*\w]*)[\s]*(.+);"),
+             re.compile("[\s]*(typedef)[ ]*([\w]*)[ ]*([\w]*)[\s]*([{,;])*"),
+             re.compile("[\s]*#(define|ifndef|endif)[ ]+([\S]*)[ ]+([\S]*)"),
+             re.compile("[\s]*#include[ ]+<[\s]*([\S]*)[\s]*>"),
+             re.compile("[\s]*}[\s]*([\w]+)[\s]*;"))
+    regexCache[types] = regex
+    return regex
+
+#----------------------------------------------------------------------
+def getVar(var, tipo):
+    if "=" in var: var = var[:var.find("=")]
+    if "[" in var:
+        var = var[:var.find("[")]
+        if tipo != "char": tipo = "vect"
+    return var, tipo
+
+#----------------------------------------------------------------------
+def getOutTo(a, b, cont):
+    if a in cont:
+        x = cont.find(a)
+        cont = cont[:x]
+    if b in cont:
+        y = cont.find(b)
+        cont = cont+ cont[y:]
+    return cont
+
+# ------------------------------------------------------------------------------
+# parseLine: (variables, functions, directives, types) of one line
+# ------------------------------------------------------------------------------
+
+def parseLine(linea, regex):
+    """ variables are (name, type), functions (name, return, parameters),
+    directives (directive, name, value) and types are names """
+    ReFunction, ReVariable, ReStructs, ReTypeDef, ReDefines, ReInclude, ReTypeStru = regex
+
+    if "//" in linea:
+        linea = linea[:linea.find("//")]
+    if linea.strip() == "":
+        return EMPTY
+
+    variables = []
+    functions = []
+    directives = []
+    types = []
+
+    reg1 = ReFunction.match(linea)
+    if reg1 != None:
+        functions.append((reg1.group(3), reg1.group(2), reg1.group(4)))
+
+    reg2a = ReVariable.match(linea)
+    reg2b = ReStructs.match(linea)
+    if reg2a != None or reg2b != None:
+        if reg2b != None: #Struct
+            tipo = reg2b.group(1)
+            cont = reg2b.group(2)
+        else: #Variable
+            t = [reg2a.group(1), reg2a.group(2), reg2a.group(3), reg2a.group(4)]
+            for i in range(t.count(None)): t.remove(None)
+            tipo = " ".join(t)
+            cont = reg2a.group(5)
+
+        cont = getOutTo("{", "}", cont)
+        if "=" in cont: cont = getOutTo("(", ")", cont)
+        for var in cont.split(","):
+            variables.append(getVar(var, tipo))
+
+    reg3 = ReDefines.match(linea)
+    if reg3 != None:
+        directives.append((reg3.group(1), reg3.group(2), reg3.group(3)))
+
+    reg4 = ReInclude.match(linea)
+    if reg4 != None:
+        directives.append(("include", reg4.group(1), ""))
+
+    reg5 = ReTypeDef.match(linea)
+    if reg5 != None and reg5.group(3):
+        types.append(reg5.group(3))
+
+    reg6 = ReTypeStru.match(linea)
+    if reg6 != None:
+        types.append(reg6.group(1))
+
+    if not (variables or functions or directives or types):
+        return EMPTY
+    return tuple(variables), tuple(functions), tuple(directives), tuple(types)
+
+########################################################################
+class SymbolIndex:
+    """ symbols of each line of a buffer, None for the lines to parse """
+
+    #----------------------------------------------------------------------
+    def __init__(self, count=1):
+        self.lines = [None] * count
+        self.types = {}         # typedef name: number of lines defining it
+        self.regexTypes = BASE_TYPES
+        self.regex = getRegex(BASE_TYPES)
+        self.version = 0        # changed by each edit
+
+    #----------------------------------------------------------------------
+    def copy(self):
+        """ an index to update apart from this one """
+        index = SymbolIndex(0)
+        index.lines = self.lines[:]
+        index.types = self.types.copy()
+        index.regexTypes = self.regexTypes
+        index.regex = self.regex
+        index.version = self.version
+        return index
+
+    #----------------------------------------------------------------------
+    def reset(self, count):
+        """ every line has to be parsed again """
+        self.lines = [None] * count
+        self.types = {}
+        self.regexTypes = BASE_TYPES
+        self.regex = getRegex(BASE_TYPES)
+        self.version = self.version + 1
+
+    #----------------------------------------------------------------------
+    def changed(self, line, linesAdded):
+        """ text of line changed and linesAdded lines were inserted after it,
+        or removed if negative """
+        if linesAdded > 0:
+            self.lines[line + 1:line + 1] = [None] * linesAdded
+        elif linesAdded < 0:
+            for symbols in self.lines[line + 1:line + 1 - linesAdded]:
+                self.forgetTypes(symbols)
+            del self.lines[line + 1:line + 1 - linesAdded]
+        if line < len(self.lines):
+            self.forgetTypes(self.lines[line])
+            self.lines[line] = None
+        self.version = self.version + 1
+
+    #----------------------------------------------------------------------
+    def forgetTypes(self, symbols):
+        if symbols is None:
+            return
+        for name in symbols[3]:
+            self.types[name] = self.types[name] - 1
+            if self.types[name] == 0:
+                del self.types[name]
+
+    #----------------------------------------------------------------------
+    def getDirty(self):
+        """ numbers of the lines to parse """
+        return [i for i in range(len(self.lines)) if self.lines[i] is None]
+
+    #----------------------------------------------------------------------
+    def getTypes(self):
+        """ regex key, the base types and the typedefs of the buffer """
+        return BASE_TYPES + tuple(sorted(self.types.keys()))
+
+    #----------------------------------------------------------------------
+    def setLines(self, parsed):
+        """ store the symbols of (line, symbols) of parsed """
+        for line, symbols in parsed:
+            self.forgetTypes(self.lines[line])
+            self.lines[line] = symbols
+            for name in symbols[3]:
+                self.types[name] = self.types.get(name, 0) + 1
+        types = self.getTypes()
+        if types != self.regexTypes:
+            # a type was defined or removed, lines may match or not anymore
+            self.regexTypes = types
+            self.regex = getRegex(types)
+            self.lines = [None] * len(self.lines)
+            self.types = {}
+            return False
+        return True
+
+    #----------------------------------------------------------------------
+    def update(self, getLine):
+        """ parse the dirty lines, getLine(n) is the text of line n """
+        while True:
+            regex = self.regex
+            parsed = [(i, parseLine(getLine(i), regex)) for i in self.getDirty()]
+            if self.setLines(parsed):
+                return
+
+    #----------------------------------------------------------------------
+    def getSymbols(self):
+        """ variables [name, type, line], functions [name, return, line,
+        parameters], directives [directive, name, value, line] and typedef
+        names of the buffer, lines are strings counted from 1 """
+        allVars = []
+        allFunc = []
+        allDefi = []
+        allTypes = []
+        count = 1
+        for symbols in self.lines:
+            if symbols is not None and symbols is not EMPTY:
+                variables, functions, directives, types = symbols
+                line = str(count)
+                for name, tipo in variables:
+                    allVars.append([name, tipo, line])
+                for name, tipo, params in functions:
+                    allFunc.append([name, tipo, line, params])
+                for directive, name, value in directives:
+                    allDefi.append([directive, name, value, line])
+                allTypes.extend(types)
+            count += 1
+        return allVars, allFunc, allDefi, allTypes
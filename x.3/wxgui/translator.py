@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+"""-------------------------------------------------------------------------
+    Pinguino keyword translator
+
+    Converts pinguino language (PDL instructions) in C language in a single
+    scan of the sketch instead of trying every instruction on every line.
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the Free Software
+    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+-------------------------------------------------------------------------"""
+
+import re
+from bisect import bisect_right
+from heapq import heappush, heappop
+
+# an instruction is replaced when it follows one of these characters
+KEYWORD_REGEX = r"(^|[' ']|['=']|['{']|[',']|[\t]|['(']|['!'])%s\W"
+
+########################################################################
+class Translator:
+    """ convert pinguino language in C language
+
+    All the PDL instructions are merged in one trie-shaped regex which
+    gives, at every position of the sketch, the longest instruction
+    starting there. Every shorter instruction found at the same position
+    is a prefix of it, so one scan of the sketch is enough to know which
+    instructions each line may contain. Only those are then checked, in
+    the PDL order, with the original per-instruction regex, so that the
+    output is exactly the one of the former line by instruction loop. """
+
+    #----------------------------------------------------------------------
+    def __init__(self, libinstructions):
+        self.libinstructions = libinstructions
+        self.regobject = {}     # instruction index : compiled regex (lazy)
+        self.indexes = {}       # instruction : indexes in libinstructions
+        self.always = []        # indexes of empty instructions
+        for i in range(len(libinstructions)):
+            instruction = str(libinstructions[i][0])
+            if instruction == "":
+                self.always.append(i)
+            else:
+                self.indexes.setdefault(instruction, []).append(i)
+
+        # trie of instructions, None key marks the end of an instruction
+        trie = {}
+        for instruction in self.indexes:
+            node = trie
+            for char in instruction:
+                node = node.setdefault(char, {})
+            node[None] = instruction
+
+        # instructions which are a prefix of (or equal to) each instruction
+        self.prefixes = {}
+        for instruction in self.indexes:
+            node = trie
+            found = []
+            for char in instruction:
+                node = node[char]
+                if None in node:
+                    found.append(node[None])
+            self.prefixes[instruction] = found
+
+        if self.indexes:
+            self.pattern = "(?=(%s))" % self.trieRegex(trie)
+        else:
+            self.pattern = None
+        self.matcher = None
+
+    #----------------------------------------------------------------------
+    def __getstate__(self):
+        """ compiled regex are not pickled, they are compiled when needed """
+        state = self.__dict__.copy()
+        state['regobject'] = {}
+        state['matcher'] = None
+        return state
+
+    #----------------------------------------------------------------------
+    def trieRegex(self, node):
+        """ build a regex matching the longest path of the trie """
+        alternatives = []
+        for char in sorted([k for k in node if k is not None]):
+            alternatives.append(re.escape(char) + self.trieRegex(node[char]))
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and None not in node:
+            return alternatives[0]
+        regex = "(?:" + "|".join(alternatives) + ")"
+        if None in node:
+            regex += "?"
+        return regex
+
+    #----------------------------------------------------------------------
+    def getMatcher(self):
+        if self.matcher is None and self.pattern is not None:
+            self.matcher = re.compile(self.pattern)
+        return self.matcher
+
+    #----------------------------------------------------------------------
+    def getRegex(self, i):
+        """ original regex of the i-th instruction """
+        if i not in self.regobject:
+            self.regobject[i] = re.compile(KEYWORD_REGEX % re.escape(str(self.libinstructions[i][0])))
+        return self.regobject[i]
+
+    #----------------------------------------------------------------------
+    def candidates(self, text):
+        """ indexes of the instructions found in text """
+        found = set(self.always)
+        matcher = self.getMatcher()
+        if matcher is not None:
+            for longest in set(matcher.findall(text)):
+                for instruction in self.prefixes[longest]:
+                    found.update(self.indexes[instruction])
+        return found
+
+    #----------------------------------------------------------------------
+    def translate(self, content, defines):
+        """ translate a whole sketch and return its lines
+
+        defines must provide notindefine() and adddefine() to collect the
+        #include and #define needed by the instructions used """
+        lines = content.split('\n')
+        starts = []
+        pos = 0
+        for line in lines:
+            starts.append(pos)
+            pos += len(line) + 1
+
+        # one scan of the whole sketch gives the candidates of each line
+        candidates = {}
+        matcher = self.getMatcher()
+        if matcher is not None:
+            for match in matcher.finditer(content):
+                nline = bisect_right(starts, match.start()) - 1
+                for instruction in self.prefixes[match.group(1)]:
+                    candidates.setdefault(nline, set()).update(self.indexes[instruction])
+
+        result = []
+        for nline in range(len(lines)):
+            found = candidates.get(nline)
+            if found or self.always:
+                result.append(self.translateLine(lines[nline], found, defines))
+            else:
+                result.append(lines[nline] + "\n")
+        return result
+
+    #----------------------------------------------------------------------
+    def translateLine(self, line, found, defines):
+        """ replace instructions of one line, in the PDL order """
+        heap = []
+        for i in set(found or ()) | set(self.always):
+            heappush(heap, i)
+        done = set()
+        while heap:
+            i = heappop(heap)
+            if i in done:
+                continue
+            done.add(i)
+            if self.getRegex(i).search(line):
+                line = line.replace(str(self.libinstructions[i][0]), str(self.libinstructions[i][1]))
+                if defines.notindefine("#"+str(self.libinstructions[i][2])) == 1:
+                    defines.adddefine("#"+str(self.libinstructions[i][2]))
+                if defines.notindefine("#"+str(self.libinstructions[i][3])) == 1:
+                    defines.adddefine("#"+str(self.libinstructions[i][3]))
+                # the new line may contain instructions coming later
+                for j in self.candidates(line):
+                    if j > i and j not in done:
+                        heappush(heap, j)
+        return line+"\n"
+
+########################################################################
+class Defines:
+    """ content of define.h, kept in memory until the end of preprocess
+
+    Lines are stored in the order they are added, just like they used to
+    be appended to the file, and a search is never done twice on the same
+    lines. """
+
+    #----------------------------------------------------------------------
+    def __init__(self):
+        self.lines = []
+        self.searched = {}      # string : first line not searched yet (-1 if found)
+
+    #----------------------------------------------------------------------
+    def adddefine(self, chaine):
+        """ add #define or #include in define.h """
+        chaine = chaine + "\n"
+        for line in chaine.split("\n")[:-1]:
+            self.lines.append(line + "\n")
+
+    #----------------------------------------------------------------------
+    def notindefine(self, chaine):
+        """ verify if #define or #include exists in define.h """
+        start = self.searched.get(chaine, 0)
+        if start == -1:
+            return(0)
+        for n in range(start, len(self.lines)):
+            # chaine has been found ?
+            if self.lines[n].find(chaine)!=-1:
+                self.searched[chaine] = -1
+                return(0)
+        self.searched[chaine] = len(self.lines)
+        return(1)
+
+    #----------------------------------------------------------------------
+    def write(self, filename):
+        """ save sorted lines """
+        lignes = self.lines[:]
+        lignes.sort()
+        fichier = open(filename, "w")
+        fichier.writelines(lignes)
+        fichier.close()
@@ -1,4 +1,4 @@
 #!/usr/bin/env python
 #-*- coding: utf-8 -*-
 
-from uploader import Uploader
\ No newline at end of file
+from uploader import Uploader, UploadLog
\ No newline at end of file
@@ -1,6 +1,11 @@
 #!/usr/bin/env python
 #-*- coding: utf-8 -*-
 
+import os
+import sys
+import time
+import json
+import threading
 import usb
 
 ########################################################################
@@ -39,17 +44,94 @@ class baseUploader:
     ERR_EOL = 16
     ERR_USB_ERASE = 17
 
+# Upload modes
+# --------------------------------------------------------------------------
+
+    UPLOAD_FULL = 'full'            # erase and write all the memory up to the end of the code
+    UPLOAD_SKIPBLANK = 'skipblank'  # erase only the rows holding code, skip blank blocks
+    UPLOAD_DELTA = 'delta'          # as skipblank, but only the rows which differ from the device
+
+    device = None       # USB device to flash, the first Pinguino found if None
+    listeners = ()      # functions called with each upload event
+    codesize = 0        # bytes of code of the .hex
+    t0 = None           # start time of the upload
+    writeTotal = 0      # bytes of memory to write
+    percent = -1        # last write progress sent
+    READSIZE = 32       # bytes read back by a command
+    READ_DEPTH = 4      # read commands sent before their answer is read
+    ADDRESS = "0x%06X"  # format of the addresses in the messages
+
 # ------------------------------------------------------------------------------
-    def __init__(self, output, filename, board):
+    def __init__(self, output, filename, board, mode=UPLOAD_FULL, verify=False):
         self.output = output
         self.filename = filename
         self.board = board
+        self.mode = mode
+        self.verify = verify        # read back the code once written
 
 # ------------------------------------------------------------------------------
     def txtWrite(self, message):
         """ display message in the log window """
         self.output.WriteText(message)
 
+# ------------------------------------------------------------------------------
+    def addListener(self, listener):
+        """ call listener(event) for each upload event
+
+        an event is a dict with its name ('start', 'found', 'erase_start',
+        'erase_end', 'write', 'verify_start', 'verify_end', 'reset' or
+        'done'), the board, its time and the seconds elapsed since the
+        start of the upload, and the data of the event """
+        self.listeners = list(self.listeners) + [listener]
+
+# ------------------------------------------------------------------------------
+    def emit(self, name, **data):
+        """ send an upload event to the listeners """
+        if not self.listeners:
+            return
+        now = time.time()
+        data['event'] = name
+        data['board'] = self.board.name
+        data['time'] = now
+        if self.t0 is not None:
+            data['elapsed'] = round(now - self.t0, 3)
+        for listener in self.listeners:
+            listener(data)
+
+# ------------------------------------------------------------------------------
+    def startWrite(self, total):
+        """ total bytes of memory to write, or to skip when blank """
+        self.writeTotal = total
+        self.percent = -1
+        self.progress(0)
+
+# ------------------------------------------------------------------------------
+    def progress(self, done):
+        """ done bytes of memory written, an event for each percent """
+        total = max(self.writeTotal, 1)
+        percent = min(done, total) * 100 / total
+        if percent != self.percent:
+            self.percent = percent
+            self.emit('write', bytes=min(done, total), total=self.writeTotal, percent=percent)
+
+# ------------------------------------------------------------------------------
+    def upload(self):
+        """ writeHex with 'start' and 'done' events, return its status """
+        self.t0 = time.time()
+        self.emit('start', file=os.path.basename(self.filename), mode=self.mode, verify=self.verify)
+        try:
+            status = self.writeHex()
+        except Exception, e:
+            self.emit('done', status=None, error="%s: %s" % (e.__class__.__name__, e))
+            raise
+        duration = time.time() - self.t0
+        rate = 0
+        if status == self.ERR_NONE and duration > 0:
+            rate = int(round(self.codesize / duration))
+        self.emit('done', status=status, bytes=self.codesize,
+                  duration=round(duration, 3), rate=rate)
+        return status
+
 # ------------------------------------------------------------------------------
     def getDevice(self):
         """ get list of USB devices and search for pinguino """
@@ -60,6 +142,147 @@ class baseUploader:
                     return device
         return self.ERR_DEVICE_NOT_FOUND
 
+# ------------------------------------------------------------------------------
+    def getDevices(self):
+        """ list of (bus:address, device) of all the connected pinguino """
+        devices = []
+        for bus in usb.busses():
+            for device in bus.devices:
+                if device.idVendor == self.board.vendor and device.idProduct == self.board.product:
+                    devices.append(("%s:%s" % (bus.dirname, device.filename), device))
+        return devices
+
+# ------------------------------------------------------------------------------
+    def getRowRuns(self, image, start, end, rowsize):
+        """ list of (first, last) addresses of the runs of adjacent rows
+        holding data of image between start and end """
+        runs = []
+        for address, data in image.getSegments(start, end):
+            first = address - (address % rowsize)
+            last = address + len(data)
+            last = last + (-last % rowsize)
+            if runs and first <= runs[-1][1]:
+                # adjacent or same row as the previous segment
+                runs[-1] = (runs[-1][0], max(last, runs[-1][1]))
+            else:
+                runs.append((first, last))
+        return runs
+
+# ------------------------------------------------------------------------------
+    def getBlocks(self, address, length, size):
+        """ (address, length) of the blocks of at most size bytes holding
+        length bytes at address """
+        return [(addr, min(size, address + length - addr))
+                for addr in range(address, address + length, size)]
+
+# ------------------------------------------------------------------------------
+    def readBlocks(self, blocks):
+        """ {address: bytearray} of the (address, length) blocks read back,
+        the blocks which can't be read are left out
+
+        self.sendRead(address, length) sends a read command and
+        self.receiveRead(length) reads the answer of the oldest one (None
+        if it doesn't come), READ_DEPTH commands are kept in flight """
+        readback = {}
+        pending = []
+        depth = self.READ_DEPTH
+        i = 0
+        while i < len(blocks) or pending:
+            if i < len(blocks) and len(pending) < depth:
+                address, length = blocks[i]
+                if self.sendRead(address, length) == self.ERR_NONE:
+                    pending.append(blocks[i])
+                    i = i + 1
+                    continue
+                if not pending:
+                    # this one can't be read
+                    i = i + 1
+                    continue
+                # the bootloader can't buffer that many commands
+                depth = 1
+            address, length = pending.pop(0)
+            data = self.receiveRead(length)
+            if data is not None:
+                readback[address] = data
+        return readback
+
+# ------------------------------------------------------------------------------
+    def getChangedRuns(self, first, data, rowsize):
+        """ runs of adjacent rows of data (at first) which differ from the
+        device, all the rows are read back at once """
+        readback = self.readBlocks(self.getBlocks(first, len(data), self.READSIZE))
+        runs = []
+        for addr in range(first, first + len(data), rowsize):
+            index = addr - first
+            row = bytearray()
+            for block in range(addr, addr + rowsize, self.READSIZE):
+                row.extend(readback.get(block, ''))
+            if row == data[index:index + rowsize]:
+                continue
+            if runs and runs[-1][1] == addr:
+                runs[-1] = (runs[-1][0], addr + rowsize)
+            else:
+                runs.append((addr, addr + rowsize))
+        return runs
+
+# ------------------------------------------------------------------------------
+    def addMismatches(self, mismatches, address, expected, readback):
+        """ add the [first, last) ranges where readback (None if it could
+        not be read) differs from expected, both at address """
+        if readback == expected:
+            return
+        for i in range(len(expected)):
+            if readback is None or i >= len(readback) or readback[i] != expected[i]:
+                if mismatches and mismatches[-1][1] == address + i:
+                    mismatches[-1][1] = address + i + 1
+                else:
+                    mismatches.append([address + i, address + i + 1])
+
+# ------------------------------------------------------------------------------
+    def getVerifySegments(self, image):
+        """ (address, data) of the code to read back """
+        return image.getSegments(self.board.memstart, self.board.memend)
+
+# ------------------------------------------------------------------------------
+    def verifyFlash(self, image):
+        """ read back the code of image, return the [first, last) address
+        ranges where the device differs """
+        chunks = []
+        for address, data in self.getVerifySegments(image):
+            for addr, length in self.getBlocks(address, len(data), self.READSIZE):
+                chunks.append((addr, data[addr - address:addr - address + length]))
+        readback = self.readBlocks([(addr, len(expected)) for addr, expected in chunks])
+        mismatches = []
+        for addr, expected in chunks:
+            self.addMismatches(mismatches, addr, expected, readback.get(addr))
+        return mismatches
+
+# ------------------------------------------------------------------------------
+    def verifyImage(self, image):
+        """ read back image with self.verifyFlash and report the differences,
+        verifyFlash returns None if the bootloader can't read back """
+        self.txtWrite("Verifying ...\n")
+        self.emit('verify_start')
+        mismatches = self.verifyFlash(image)
+        if mismatches is None:
+            self.txtWrite("verify not supported by this bootloader\n")
+            self.emit('verify_end', errors=None, supported=False)
+            return self.ERR_NONE
+        errors = sum([last - first for first, last in mismatches])
+        self.emit('verify_end', errors=errors)
+        if mismatches:
+            self.txtWrite("Verify failed, %d bytes differ\n" % errors)
+            for first, last in mismatches:
+                self.txtWrite(("  %s - %s\n" % (self.ADDRESS, self.ADDRESS)) % (first, last - 1))
+            return self.ERR_VERIFY
+        self.txtWrite("Verify OK\n")
+        return self.ERR_NONE
+
+# ------------------------------------------------------------------------------
+    def isBlank(self, block):
+        """ True if block is all 0xFF, as flash memory after an erase """
+        return block == bytearray('\xff') * len(block)
+
 # ------------------------------------------------------------------------------
     def closeDevice(self):
         """ Close currently-open USB device """
@@ -73,10 +296,11 @@ class Uploader:
     from uploaderVSC import uploaderVSC
     from uploaderDLN import uploaderDLN
     from uploader8   import uploader8
+    from uploader32  import uploader32
     #from uploaderMCC import uploaderMCC
 
     #----------------------------------------------------------------------
-    def __init__(self, logwindow, filename, Board):
+    def __init__(self, logwindow, filename, Board, mode=baseUploader.UPLOAD_FULL, verify=False, listeners=()):
         self.logwindow = logwindow
         self.filename = filename
         if type(Board) == type([]):
@@ -84,18 +308,12 @@ class Uploader:
         else:
             self.curBoard = Board
 
-        parameters = (self.logwindow, filename + '.hex', self.curBoard)
-
-        if self.curBoard.bldr == 'boot2':
-            curUploader = self.uploaderVSC(*parameters)
-        elif self.curBoard.bldr == 'boot3':
-            curUploader = self.uploaderDLN(*parameters)
-        elif self.curBoard.bldr == 'boot4':
-            curUploader = self.uploader8(*parameters)
-        elif self.curBoard.bldr == 'microchip':
-            curUploader = self.uploaderMCC(*parameters)
+        parameters = (self.logwindow, filename + '.hex', self.curBoard, mode, verify)
 
-        curUploader.writeHex()
+        curUploader = getUploaderClass(self.curBoard)(*parameters)
+        for listener in listeners:
+            curUploader.addListener(listener)
+        self.status = curUploader.upload()
 
 
     #----------------------------------------------------------------------
@@ -104,3 +322,58 @@ class Uploader:
         #Code to get and return board parameters
         #return a board from boardlist
 
+# ------------------------------------------------------------------------------
+# getUploaderClass: uploader of the board's bootloader
+# ------------------------------------------------------------------------------
+
+def getUploaderClass(board):
+    if board.bldr == 'boot2':
+        return Uploader.uploaderVSC
+    elif board.bldr == 'boot3':
+        return Uploader.uploaderDLN
+    elif board.bldr == 'boot4':
+        return Uploader.uploader8
+    elif board.bldr == 'microchip':
+        return Uploader.uploader32
+
+########################################################################
+class ConsoleOutput:
+    """ log window of the command line, the messages are printed """
+
+    #----------------------------------------------------------------------
+    def WriteText(self, message):
+        sys.stdout.write(message)
+        sys.stdout.flush()
+
+    #----------------------------------------------------------------------
+    def onUploadEvent(self, event):
+        """ print the progress of the upload """
+        if event['event'] == 'write':
+            sys.stdout.write("\r%3d%% %d/%d bytes" % (event['percent'], event['bytes'], event['total']))
+            if event['percent'] == 100:
+                sys.stdout.write("\n")
+            sys.stdout.flush()
+        elif event['event'] == 'done' and event['status'] == baseUploader.ERR_NONE:
+            print "%d bytes in %.1f seconds, %d bytes/s" % (event['bytes'], event['duration'], event['rate'])
+
+########################################################################
+class UploadLog:
+    """ append each upload event to a file, one JSON object per line """
+
+    #----------------------------------------------------------------------
+    def __init__(self, filename, **fields):
+        self.filename = filename
+        self.fields = fields        # added to each event, as the device name
+        self.lock = threading.Lock()
+
+    #----------------------------------------------------------------------
+    def __call__(self, event):
+        record = dict(self.fields)
+        record.update(event)
+        self.lock.acquire()
+        try:
+            fichier = open(self.filename, 'a')
+            fichier.write(json.dumps(record) + "\n")
+            fichier.close()
+        finally:
+            self.lock.release()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python
+#-*- coding: iso-8859-15 -*-
+
+"""-------------------------------------------------------------------------
+	Pinguino Uploader for Pinguino 32
+
+	Upload .hex files through the Microchip HID bootloader of the 32-bit
+	boards, in the IDE process instead of running ubw32 or mphidflash.
+
+	This library is free software; you can redistribute it and/or
+	modify it under the terms of the GNU Lesser General Public
+	License as published by the Free Software Foundation; either
+	version 2.1 of the License, or (at your option) any later version.
+
+	This library is distributed in the hope that it will be useful,
+	but WITHOUT ANY WARRANTY; without even the implied warranty of
+	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+	Lesser General Public License for more details.
+
+	You should have received a copy of the GNU Lesser General Public
+	License along with this library; if not, write to the Free Software
+	Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+-------------------------------------------------------------------------"""
+
+# This class is based on extra/bootloaders/32bit/uploader32.py and on :
+# - UBW32 / Microchip mphidflash software licensed (GNU GPL v3) by Phillip Burgess <pburgess@dslextreme.com>
+# MPHIDFLASH sources at : http://mphidflash.googlecode.com/svn-history/r2/trunk/
+# PyUSB Doc : http://wiki.erazor-zone.de/wiki:projects:python:pyusb:pydoc
+# Device Descriptors : lsusb -v -d 04d8:003C
+
+import sys
+import os
+import usb			# checked in check.py
+
+from uploader import baseUploader
+from wxgui.hexfile import readHex, MemoryImage, HexError, HexChecksumError, HexRecordError
+
+class uploader32(baseUploader):
+	""" upload .hex into pinguino 32 device """
+
+	# Microchip Hid bootloader commands
+	# --------------------------------------------------------------------------
+
+	UNLOCKCONFIG_CMD				=	0x00	# sub-command for the ERASE_DEVICE_CMD
+	LOCKCONFIG_CMD					=	0x01	# sub-command for the ERASE_DEVICE_CMD
+	QUERY_DEVICE_CMD				=	0x02	# what regions can be programmed, and what type of memory is the region
+	UNLOCK_CONFIG_CMD				=	0x03	# for both locking and unlocking the config bits
+	ERASE_DEVICE_CMD				=	0x04	# to start an erase operation, firmware controls which pages should be erased
+	PROGRAM_DEVICE_CMD				=	0x05	# to send a full RequestDataBlockSize to be programmed
+	PROGRAM_COMPLETE_CMD			=	0x06	# to program whatever was left in the buffer of the bootloader
+	GET_DATA_CMD					=	0x07	# to read out memory from the device, used during verify
+	RESET_DEVICE_CMD				=	0x08	# resets the microcontroller, leaving the bootloader
+
+	# Query Device Response
+	TypeProgramMemory				=	0x01	# the regions which can be programmed
+	TypeEEPROM						=	0x02
+	TypeConfigWords					=	0x03
+	TypeEndOfTypeList				=	0xFF	# end of the memory region list
+
+	# Device family
+	DEVICE_FAMILY_PIC18				=	0x01
+	DEVICE_FAMILY_PIC24				=	0x02
+	DEVICE_FAMILY_PIC32				=	0x03
+
+	# Data block description
+	MAXPACKETSIZE					=	64
+	BLOCKSIZE						=	56		# MAXPACKETSIZE - Block Command Size
+	READSIZE						=	56
+
+	# hid endpoints
+	IN_EP							=	0x81	# endpoint for Hid reads
+	OUT_EP							=	0x01	# endpoint for Hid writes
+
+	# configuration
+	INTERFACE_ID					=	0x00
+	ACTIVE_CONFIG					=	1
+	TIMEOUT							=	10000	# an erase takes a few seconds
+
+	# query response, (type, address, size) of each memory region
+	regions							=	()
+
+	# number of HID reports sent
+	reports							=	0
+
+	# program memory is above 0x1D000000
+	ADDRESS							=	"0x%08X"
+
+# ------------------------------------------------------------------------------
+	def initDevice(self):
+# ------------------------------------------------------------------------------
+		""" init pinguino device """
+		handle = self.device.open()
+		if handle:
+			try:
+				# make sure the hiddev kernel driver is not active
+				handle.detachKernelDriver(self.INTERFACE_ID)
+			except usb.USBError:
+				pass
+			handle.setConfiguration(self.ACTIVE_CONFIG)
+			handle.claimInterface(self.INTERFACE_ID)
+			return handle
+		return self.ERR_USB_INIT1
+# ------------------------------------------------------------------------------
+	def usbWrite(self, usbBuf):
+# ------------------------------------------------------------------------------
+		"""	Write a MAXPACKETSIZE bytes data packet to currently-open USB device """
+		self.reports = self.reports + 1
+		try:
+			sent_bytes = self.handle.interruptWrite(self.OUT_EP, usbBuf, self.TIMEOUT)
+		except usb.USBError:
+			return self.ERR_USB_WRITE
+		if sent_bytes == len(usbBuf):
+			return self.ERR_NONE
+		return self.ERR_USB_WRITE
+# ------------------------------------------------------------------------------
+	def usbRead(self):
+# ------------------------------------------------------------------------------
+		""" Read a MAXPACKETSIZE bytes data packet, None if nothing came """
+		try:
+			usbBuf = self.handle.interruptRead(self.IN_EP, self.MAXPACKETSIZE, self.TIMEOUT)
+		except usb.USBError:
+			return None
+		if len(usbBuf) == 0:
+			return None
+		return usbBuf
+# ------------------------------------------------------------------------------
+	def getPacket(self, cmd, address=0, length=0):
+# ------------------------------------------------------------------------------
+		""" command packet, with the address and the length of its data """
+		usbBuf = [0] * self.MAXPACKETSIZE
+		usbBuf[0] = cmd
+		usbBuf[1] = address & 0xFF
+		usbBuf[2] = (address >> 8) & 0xFF
+		usbBuf[3] = (address >> 16) & 0xFF
+		usbBuf[4] = (address >> 24) & 0xFF
+		usbBuf[5] = length
+		return usbBuf
+# ------------------------------------------------------------------------------
+	def queryDevice(self):
+# ------------------------------------------------------------------------------
+		""" device family and memory regions, None if the device doesn't answer """
+		usbBuf = [0] * self.MAXPACKETSIZE
+		usbBuf[0] = self.QUERY_DEVICE_CMD
+		if self.usbWrite(usbBuf) != self.ERR_NONE:
+			return None
+		usbBuf = self.usbRead()
+		if usbBuf is None or usbBuf[0] != self.QUERY_DEVICE_CMD:
+			return None
+		family = usbBuf[2]
+		regions = []
+		j = 3
+		while j + 9 <= len(usbBuf) and usbBuf[j] != self.TypeEndOfTypeList:
+			address = usbBuf[j + 1] | usbBuf[j + 2] << 8 | usbBuf[j + 3] << 16 | usbBuf[j + 4] << 24
+			size = usbBuf[j + 5] | usbBuf[j + 6] << 8 | usbBuf[j + 7] << 16 | usbBuf[j + 8] << 24
+			regions.append((usbBuf[j], address, size))
+			j = j + 9
+		return family, regions
+# ------------------------------------------------------------------------------
+	def eraseDevice(self):
+# ------------------------------------------------------------------------------
+		""" erase the program memory, the bootloader chooses the pages """
+		usbBuf = [0] * self.MAXPACKETSIZE
+		usbBuf[0] = self.ERASE_DEVICE_CMD
+		status = self.usbWrite(usbBuf)
+		if status != self.ERR_NONE:
+			return self.ERR_USB_ERASE
+		# the bootloader answers the next query once the erase is done
+		if self.queryDevice() is None:
+			return self.ERR_USB_ERASE
+		return self.ERR_NONE
+# ------------------------------------------------------------------------------
+	def issueBlock(self, address, block):
+# ------------------------------------------------------------------------------
+		""" write a block of at most BLOCKSIZE bytes of code """
+		length = len(block)
+		usbBuf = self.getPacket(self.PROGRAM_DEVICE_CMD, address, length)
+		# add data 'right justified' within packet
+		for i in range(length):
+			usbBuf[self.MAXPACKETSIZE - length + i] = block[i]
+		return self.usbWrite(usbBuf)
+# ------------------------------------------------------------------------------
+	def programComplete(self):
+# ------------------------------------------------------------------------------
+		""" program what is left in the buffer of the bootloader """
+		usbBuf = [0] * self.MAXPACKETSIZE
+		usbBuf[0] = self.PROGRAM_COMPLETE_CMD
+		return self.usbWrite(usbBuf)
+# ------------------------------------------------------------------------------
+	def sendRead(self, address, length):
+# ------------------------------------------------------------------------------
+		""" ask for length (at most BLOCKSIZE) bytes of flash """
+		return self.usbWrite(self.getPacket(self.GET_DATA_CMD, address, length))
+# ------------------------------------------------------------------------------
+	def receiveRead(self, length):
+# ------------------------------------------------------------------------------
+		""" length bytes of the answer to a read, None if it can't be read """
+		usbBuf = self.usbRead()
+		if usbBuf is None or usbBuf[0] != self.GET_DATA_CMD:
+			return None
+		# data are 'right justified' within packet
+		return bytearray(usbBuf[self.MAXPACKETSIZE - length:self.MAXPACKETSIZE])
+# ------------------------------------------------------------------------------
+	def resetDevice(self):
+# ------------------------------------------------------------------------------
+		""" reset device, leave the bootloader and start user's app. """
+		usbBuf = [0] * self.MAXPACKETSIZE
+		usbBuf[0] = self.RESET_DEVICE_CMD
+		return self.usbWrite(usbBuf)
+# ------------------------------------------------------------------------------
+	def getProgramImage(self, image, family):
+# ------------------------------------------------------------------------------
+		""" code of image within the program memory regions of the device """
+		program = MemoryImage()
+		for region_type, start, size in self.regions:
+			if region_type != self.TypeProgramMemory:
+				continue
+			for address, data in image.getSegments():
+				if family == self.DEVICE_FAMILY_PIC32:
+					# kseg0 and kseg1 addresses to physical addresses
+					address = address & 0x1FFFFFFF
+				first = max(address, start)
+				last = min(address + len(data), start + size)
+				if first < last:
+					program.write(first, data[first - address:last - address])
+		return program
+# ------------------------------------------------------------------------------
+	def getRuns(self, image):
+# ------------------------------------------------------------------------------
+		""" list of (address, bytearray) runs to program, each one ended by
+		PROGRAM_COMPLETE_CMD
+
+		segments less than a block apart are joined, the gap is filled with
+		0xFF as the erased memory, so that every report but the last one of
+		a run is full. Out of full mode, runs are split at blank blocks. """
+		runs = []
+		for address, data in image.getSegments():
+			if runs and address - (runs[-1][0] + len(runs[-1][1])) < self.BLOCKSIZE:
+				gap = address - (runs[-1][0] + len(runs[-1][1]))
+				runs[-1][1].extend(bytearray('\xff') * gap + data)
+			else:
+				runs.append([address, bytearray(data)])
+		if self.mode == self.UPLOAD_FULL:
+			return runs
+		split = []
+		for address, data in runs:
+			start = None
+			for i in range(0, len(data), self.BLOCKSIZE):
+				if self.isBlank(data[i:i + self.BLOCKSIZE]):
+					if start is not None:
+						split.append([address + start, data[start:i]])
+						start = None
+				elif start is None:
+					start = i
+			if start is not None:
+				split.append([address + start, data[start:]])
+		return split
+# ------------------------------------------------------------------------------
+	def hexWrite(self, family):
+# ------------------------------------------------------------------------------
+		""" Parse the Hex File Format and send data to usb device """
+
+		# read hex file
+		# ----------------------------------------------------------------------
+
+		try:
+			image = readHex(self.filename)
+		except HexChecksumError:
+			return self.ERR_HEX_CHECKSUM
+		except HexRecordError:
+			return self.ERR_HEX_RECORD
+		except HexError:
+			return self.ERR_HEX_SYNTAX
+
+		# kept for verifyFlash
+		self.image = self.getProgramImage(image, family)
+		self.codesize = self.image.getSize()
+
+		# the bootloader erases all the program memory
+		# ----------------------------------------------------------------------
+
+		self.emit('erase_start')
+		status = self.eraseDevice()
+		if status != self.ERR_NONE:
+			return status
+		self.emit('erase_end')
+
+		# issue each run by blocks of BLOCKSIZE bytes
+		# ----------------------------------------------------------------------
+
+		self.reports = 0
+		runs = self.getRuns(self.image)
+		self.startWrite(sum([len(data) for address, data in runs]))
+		done = 0
+		for address, data in runs:
+			for i in range(0, len(data), self.BLOCKSIZE):
+				status = self.issueBlock(address + i, data[i:i + self.BLOCKSIZE])
+				if status != self.ERR_NONE:
+					self.failed = [address + i]
+					return status
+				self.progress(done + i + self.BLOCKSIZE)
+			done = done + len(data)
+			# the next block isn't contiguous, the buffer needs flushing
+			status = self.programComplete()
+			if status != self.ERR_NONE:
+				self.failed = [address + len(data)]
+				return status
+
+		return self.ERR_NONE
+# ------------------------------------------------------------------------------
+	def getVerifySegments(self, image):
+# ------------------------------------------------------------------------------
+		""" all the code of image is read back, configuration words too """
+		return image.getSegments()
+# ------------------------------------------------------------------------------
+	def writeHex(self):
+# ------------------------------------------------------------------------------
+
+		# check file to upload
+		# ----------------------------------------------------------------------
+
+		if self.filename == '':
+			self.txtWrite("No program to write\n")
+			return self.ERR_HEX_OPEN
+
+		if not os.path.isfile(self.filename):
+			self.txtWrite("Unable to open %s\n" % self.filename)
+			return self.ERR_HEX_OPEN
+
+		# search for a Pinguino board
+		# ----------------------------------------------------------------------
+
+		# device is already set when several boards are flashed at once
+		if self.device is None:
+			self.device = self.getDevice()
+		if self.device == self.ERR_DEVICE_NOT_FOUND:
+			self.txtWrite("Pinguino not found\n")
+			self.txtWrite("Is your device connected and/or in bootloader mode ?\n")
+			return self.ERR_DEVICE_NOT_FOUND
+		else:
+			self.txtWrite("Pinguino found\n")
+
+		self.handle = self.initDevice()
+		if self.handle == self.ERR_USB_INIT1:
+			self.txtWrite("Upload not possible\n")
+			self.txtWrite("Try to restart the bootloader mode\n")
+			return self.ERR_USB_INIT1
+
+		# find out the processor and its memory
+		# ----------------------------------------------------------------------
+
+		query = self.queryDevice()
+		if query is None:
+			self.txtWrite("Query Error!\n")
+			self.closeDevice()
+			return self.ERR_USB_READ
+		family, self.regions = query
+		if family == self.DEVICE_FAMILY_PIC32:
+			self.txtWrite("PIC32 Processor\n")
+		elif family == self.DEVICE_FAMILY_PIC24:
+			self.txtWrite("PIC24 Processor\n")
+		elif family == self.DEVICE_FAMILY_PIC18:
+			self.txtWrite("PIC18 Processor\n")
+		else:
+			self.txtWrite("Unknown Processor\n")
+		for region_type, address, size in self.regions:
+			if region_type == self.TypeProgramMemory:
+				self.txtWrite("%d bytes free\n" % size)
+		self.emit('found', proc=self.board.proc, bootloader="HID", family=family)
+
+		# start writing
+		# ----------------------------------------------------------------------
+
+		self.txtWrite("Writing ...\n")
+		self.failed = []
+		status = self.hexWrite(family)
+		if status == self.ERR_NONE:
+			self.txtWrite("%d bytes written in %d reports\n" % (self.codesize, self.reports))
+			self.txtWrite(os.path.basename(self.filename) + " successfully uploaded\n")
+			if self.verify:
+				status = self.verifyImage(self.image)
+				if status != self.ERR_NONE:
+					self.closeDevice()
+					return status
+		elif status == self.ERR_HEX_RECORD:
+			self.txtWrite("Record error\n")
+		elif status == self.ERR_HEX_CHECKSUM:
+			self.txtWrite("Checksum error\n")
+		elif status == self.ERR_HEX_SYNTAX:
+			self.txtWrite("Syntax error\n")
+		elif status == self.ERR_USB_ERASE:
+			self.txtWrite("Erase Error!\n")
+		elif status == self.ERR_USB_WRITE:
+			for address in self.failed:
+				self.txtWrite("Write error at 0x%08X\n" % address)
+		if status != self.ERR_NONE:
+			self.closeDevice()
+			return status
+
+		# reset and start user's app.
+		# ----------------------------------------------------------------------
+
+		self.emit('reset')
+		if self.resetDevice() != self.ERR_NONE:
+			self.txtWrite("Reset Error!\n")
+		self.closeDevice()
+		self.txtWrite("Ready\n")
+		return status
+# ------------------------------------------------------------------------------
@@ -33,6 +33,7 @@ import os
 import usb            # checked in check.py
 
 from uploader import baseUploader
+from wxgui.hexfile import readHex, HexError, HexChecksumError, HexRecordError
 
 class uploader8(baseUploader):
     """ upload .hex into pinguino device """
@@ -83,6 +84,10 @@ class uploader8(baseUploader):
     # --------------------------------------------------------------------------
     BLOCKSIZE                       =    32
 
+    # Block's size to read back (at most 64 - BOOT_DATA_START)
+    # --------------------------------------------------------------------------
+    READSIZE                        =    32
+
     # bulk endpoints
     # --------------------------------------------------------------------------
     IN_EP                           =    0x81    # endpoint for Bulk reads
@@ -94,6 +99,13 @@ class uploader8(baseUploader):
     INTERFACE_ID                    =    0x00
     TIMEOUT                         =    1200
 
+    # write commands sent before their response is read, reduced to 1
+    # if the bootloader doesn't accept that many
+    # --------------------------------------------------------------------------
+    PIPELINE_DEPTH                  =    4
+    pending                         =    ()      # (command, address, length) of the commands in flight
+    failed                          =    ()      # addresses of the commands which failed
+
     # Table with Microchip 8-bit USB devices
     # device_id:[PIC name] 
     # --------------------------------------------------------------------------
@@ -170,6 +182,8 @@ class uploader8(baseUploader):
     def sendCMD(self, usbBuf):  
 # ------------------------------------------------------------------------------
         """ send command to the bootloader """
+        # responses come in the order of the commands
+        self.flushCMD()
         sent_bytes = self.handle.bulkWrite(self.OUT_EP, usbBuf, self.TIMEOUT)
         if sent_bytes == len(usbBuf):
             # whatever is returned, USB packet size is always 64 bytes long in high speed mode
@@ -177,6 +191,53 @@ class uploader8(baseUploader):
             #return self.ERR_NONE
         else:        
             return self.ERR_USB_WRITE
+# ------------------------------------------------------------------------------
+    def queueCMD(self, usbBuf, address, length=None):
+# ------------------------------------------------------------------------------
+        """ send a command without waiting for its response
+
+        the length bytes of data of a read command are kept in self.readback,
+        the address of a write command which fails in self.failed """
+        while len(self.pending) >= self.depth:
+            self.collectCMD()
+        try:
+            sent_bytes = self.handle.bulkWrite(self.OUT_EP, usbBuf, self.TIMEOUT)
+        except usb.USBError:
+            if not self.pending:
+                if length is None:
+                    self.failed.append(address)
+                return self.ERR_USB_WRITE
+            # the bootloader can't buffer that many commands
+            self.flushCMD()
+            self.depth = 1
+            return self.queueCMD(usbBuf, address, length)
+        if sent_bytes != len(usbBuf):
+            if length is None:
+                self.failed.append(address)
+            return self.ERR_USB_WRITE
+        self.pending.append((usbBuf[self.BOOT_CMD], address, length))
+        return self.ERR_NONE
+# ------------------------------------------------------------------------------
+    def collectCMD(self):
+# ------------------------------------------------------------------------------
+        """ read the response of the oldest command in flight, it starts
+        with the code of the command """
+        cmd, address, length = self.pending.pop(0)
+        try:
+            usbBuf = self.handle.bulkRead(self.IN_EP, 64, self.TIMEOUT)
+        except usb.USBError:
+            usbBuf = ()
+        if len(usbBuf) == 0 or usbBuf[self.BOOT_CMD] != cmd:
+            if length is None:
+                self.failed.append(address)
+        elif length is not None:
+            self.readback[address] = bytearray(usbBuf[self.BOOT_DATA_START:self.BOOT_DATA_START + length])
+# ------------------------------------------------------------------------------
+    def flushCMD(self):
+# ------------------------------------------------------------------------------
+        """ wait for the responses of all the commands in flight """
+        while self.pending:
+            self.collectCMD()
 # ------------------------------------------------------------------------------
     def resetDevice(self):
 # ------------------------------------------------------------------------------
@@ -249,6 +310,14 @@ class uploader8(baseUploader):
     def readFlash(self, address, length):
 # ------------------------------------------------------------------------------
         """ read a block of flash """
+        # send request to the bootloader
+        return self.sendCMD(self.getReadCMD(address, length))
+        #self.handle.bulkWrite(self.OUT_EP, usbBuf, self.TIMEOUT)
+        #return self.handle.bulkRead(self.IN_EP, self.BOOT_DATA_START + length, self.TIMEOUT)
+# ------------------------------------------------------------------------------
+    def getReadCMD(self, address, length):
+# ------------------------------------------------------------------------------
+        """ packet of a read flash command """
         usbBuf = [0] * 64
         # command code
         usbBuf[self.BOOT_CMD] = self.READ_FLASH_CMD 
@@ -258,10 +327,7 @@ class uploader8(baseUploader):
         usbBuf[self.BOOT_ADDR_LO] = (address      ) & 0xFF
         usbBuf[self.BOOT_ADDR_HI] = (address >> 8 ) & 0xFF
         usbBuf[self.BOOT_ADDR_UP] = (address >> 16) & 0xFF
-        # send request to the bootloader
-        return self.sendCMD(usbBuf)
-        #self.handle.bulkWrite(self.OUT_EP, usbBuf, self.TIMEOUT)
-        #return self.handle.bulkRead(self.IN_EP, self.BOOT_DATA_START + length, self.TIMEOUT)
+        return usbBuf
 # ------------------------------------------------------------------------------
     def writeFlash(self, address, block):
 # ------------------------------------------------------------------------------
@@ -278,10 +344,9 @@ class uploader8(baseUploader):
         # add data to the packet
         for i in range(len(block)):
             usbBuf[self.BOOT_DATA_START + i] = block[i]
-        # write data packet on usb device
-        #print usbBuf
-        usbBuf = self.sendCMD(usbBuf)
+        # write data packet on usb device, its response is read later
         #print usbBuf
+        return self.queueCMD(usbBuf, address)
 # ------------------------------------------------------------------------------
     def hexWrite(self, filename, board):
 # ------------------------------------------------------------------------------
@@ -298,108 +363,50 @@ class uploader8(baseUploader):
                 03 + 00 + 30 + 00 + 02 + 33 + 7A = E2, 2's complement is 1E
         """
 
-        data        = []
-        old_address = 0 # or self.board.memstart ?
-        max_address = 0
-        address_Hi  = 0
-        codesize    = 0
-
         # read hex file
         # ----------------------------------------------------------------------
 
-        fichier = open(filename,'r')
-        lines = fichier.readlines()
-        fichier.close()
-
-        # 1st pass : calculate checksum and max_address
+        try:
+            image = readHex(filename)
+        except HexChecksumError:
+            return self.ERR_HEX_CHECKSUM
+        except HexRecordError:
+            return self.ERR_HEX_RECORD
+        except HexError:
+            return self.ERR_HEX_SYNTAX
+
+        self.codesize = image.getSize(self.board.memstart, self.board.memend)
+        # kept for verifyFlash
+        self.image = image
+
+        # write commands in flight and addresses of the failed ones
+        self.pending = []
+        self.failed = []
+        self.depth = self.PIPELINE_DEPTH
+
+        if self.mode != self.UPLOAD_FULL:
+            self.hexWriteRows(image, board)
+            return self.endWrite()
+
+        # max_address must be divisible by 64 (erase block)
         # ----------------------------------------------------------------------
 
-        for line in lines:
-            byte_count = int(line[1:3], 16)
-            address_Lo = int(line[3:7], 16) # lower 16 bits (bits 0-15) of the data address
-            record_type= int(line[7:9], 16)
-            
-            address = (address_Hi << 16) + address_Lo
-            #print "address =", address
-
-            # checksum calculation
-            end = 9 + byte_count * 2 # position of checksum at end of line
-            checksum = int(line[end:end+2], 16)
-            cs = 0
-            i = 1
-            while i < end:
-                cs = cs + (0x100 - int(line[i:i+2], 16) ) & 0xff # not(i)
-                i = i + 2
-            if checksum != cs:
-                return self.ERR_HEX_CHECKSUM
-
-            # extended linear address record
-            if record_type == self.Extended_Linear_Address_Record:
-                address_Hi = int(line[9:13], 16) << 16 # upper 16 bits (bits 16-31) of the data address
-                #address = (address_Hi << 16) + address_Lo
-
-            # code size
-            if (address >= self.board.memstart) and (address < self.board.memend):
-                codesize = codesize + byte_count
-
-            # max address
-            if (address > old_address) and (address < self.board.memend):
-                max_address = address + byte_count
-                old_address = address
-                #print "max address =", max_address
-
-        # max_address must be divisible by self.BLOCKSIZE
-        #max_address = max_address + self.BLOCKSIZE - (max_address % self.BLOCKSIZE)        <= ERROR
+        max_address = image.getEnd(self.board.memstart, self.board.memend)
+        if max_address is None:
+            max_address = self.board.memstart
         max_address = max_address + 64 - (max_address % 64)
         #print self.board.memstart, max_address, self.board.memend    
 
-        # fill data sequence with 0xFF
+        # data from self.board.memstart to max_address, filled with 0xFF
         # ----------------------------------------------------------------------
 
-        for i in range(max_address - self.board.memstart):
-        #for i in range(max_address + 64 - self.board.memstart):
-            data.append(0xFF)
-
-        # 2nd pass : parse bytes from line into data
-        # ----------------------------------------------------------------------
-
-        address_Hi = 0
-
-        for line in lines:
-            byte_count  = int(line[1:3], 16)
-            address_Lo  = int(line[3:7], 16) # four hex digits
-            record_type = int(line[7:9], 16)
-
-            # 32-bit address
-            address = (address_Hi << 16) + address_Lo
-            #print hex(address)
-
-            # data record
-            if record_type == self.Data_Record:
-                if (address >= self.board.memstart) and (address < self.board.memend):
-                    #print hex(address)
-                    for i in range(byte_count):
-                        #print address - self.board.memstart + i
-                        #print int(line[9 + (2 * i) : 11 + (2 * i)], 16)
-                        data[address - self.board.memstart + i] = int(line[9 + (2 * i) : 11 + (2 * i)], 16)
-                    
-            # end of file record
-            elif record_type == self.End_Of_File_Record:
-                break
-
-            # extended linear address record
-            elif record_type == self.Extended_Linear_Address_Record:
-                address_Hi = int(line[9:13], 16) # upper 16 bits (bits 16-31) of the data address
-                #print "address_Hi = " + hex(address_Hi)
-                #address = (address_Hi << 16) + address_Lo
-
-            # unsupported record type
-            else:
-                return self.ERR_HEX_RECORD
+        data = image.getRange(self.board.memstart, max_address)
 
         # erase memory from self.board.memstart to max_address 
         # ----------------------------------------------------------------------
 
+        self.emit('erase_start', address=self.board.memstart, size=max_address - self.board.memstart)
+
         # Pinguino x6j50
         if "j" in board.proc :
             #print board.proc
@@ -426,24 +433,88 @@ class uploader8(baseUploader):
                 numBlocks64 = numBlocks64 - 255
                 self.eraseFlash(self.board.memstart + 0x4000, numBlocks64)
 
+        self.emit('erase_end')
+
         # write 32-bit blocks
         # ----------------------------------------------------------------------
 
-        usbBuf = []
-        for addr in range(self.board.memstart, max_address):
-        #for addr in range(self.board.memstart, max_address + 64):
+        self.startWrite(max_address - self.board.memstart)
+        for addr in range(self.board.memstart, max_address, self.BLOCKSIZE):
             index = addr - self.board.memstart
-            #print hex(addr)
-            if addr % self.BLOCKSIZE == 0:
-                if usbBuf != []:
-                    #print usbBuf
-                    self.writeFlash(addr - self.BLOCKSIZE, usbBuf)
-                usbBuf = []
-            if data[index] != []:
-                #print data[addr - self.board.memstart]
-                usbBuf.append(data[index])
+            self.writeFlash(addr, data[index:index + self.BLOCKSIZE])
+            self.progress(index + self.BLOCKSIZE)
         #print "%d bytes written.\n" % codesize
 
+        return self.endWrite()
+# ------------------------------------------------------------------------------
+    def endWrite(self):
+# ------------------------------------------------------------------------------
+        """ wait for the last responses, failed blocks are in self.failed """
+        self.flushCMD()
+        if self.failed:
+            return self.ERR_USB_WRITE
+        return self.ERR_NONE
+# ------------------------------------------------------------------------------
+    def readBlocks(self, blocks):
+# ------------------------------------------------------------------------------
+        """ {address: bytearray} of the (address, length) blocks read back,
+        the read commands go through the pipeline of the write commands """
+        # no CRC command in the bootloader, all the code is read back
+        self.flushCMD()
+        self.readback = {}
+        for addr, length in blocks:
+            self.queueCMD(self.getReadCMD(addr, length), addr, length)
+        self.flushCMD()
+        return self.readback
+# ------------------------------------------------------------------------------
+    def getRowSize(self, board):
+# ------------------------------------------------------------------------------
+        """ size of an erase block """
+        # Pinguino x6j50
+        if "j" in board.proc:
+            return 1024
+        # Pinguino x550
+        return 64
+# ------------------------------------------------------------------------------
+    def eraseRows(self, address, numBlocks, rowsize):
+# ------------------------------------------------------------------------------
+        """ erase numBlocks rows, at most 255 rows per command """
+        while numBlocks > 0:
+            count = min(numBlocks, 255)
+            self.eraseFlash(address, count)
+            address = address + count * rowsize
+            numBlocks = numBlocks - count
+# ------------------------------------------------------------------------------
+    def hexWriteRows(self, image, board):
+# ------------------------------------------------------------------------------
+        """ erase only the rows holding code and write only its non blank blocks
+
+        in delta mode, rows which already hold the same code are skipped """
+        rowsize = self.getRowSize(board)
+        self.rowsTotal = 0
+        self.rowsWritten = 0
+        rowruns = self.getRowRuns(image, self.board.memstart, self.board.memend, rowsize)
+        self.startWrite(sum([last - first for first, last in rowruns]))
+        done = 0
+        for first, last in rowruns:
+            data = image.getRange(first, last)
+            self.rowsTotal = self.rowsTotal + (last - first) / rowsize
+            if self.mode == self.UPLOAD_DELTA:
+                runs = self.getChangedRuns(first, data, rowsize)
+            else:
+                runs = [(first, last)]
+            for start, end in runs:
+                self.emit('erase_start', address=start, size=end - start)
+                self.eraseRows(start, (end - start) / rowsize, rowsize)
+                self.emit('erase_end')
+                self.rowsWritten = self.rowsWritten + (end - start) / rowsize
+                for addr in range(start, end, self.BLOCKSIZE):
+                    block = data[addr - first:addr - first + self.BLOCKSIZE]
+                    if not self.isBlank(block):
+                        self.writeFlash(addr, block)
+                    self.progress(done + addr + self.BLOCKSIZE - first)
+            done = done + last - first
+            self.progress(done)
         return self.ERR_NONE
 # ------------------------------------------------------------------------------
     #def writeHex(self, output, filename, board):
@@ -455,23 +526,24 @@ class uploader8(baseUploader):
 
         if self.filename == '':
             self.txtWrite("No program to write\n")
-            self.closeDevice()
-            return
+            return self.ERR_HEX_OPEN
 
         fichier = open(self.filename, 'r')
         if fichier == "":
             self.txtWrite("Unable to open %s\n" % self.filename)
-            return
+            return self.ERR_HEX_OPEN
         fichier.close()
 
         # search for a Pinguino board
         # ----------------------------------------------------------------------
 
-        self.device = self.getDevice()
+        # device is already set when several boards are flashed at once
+        if self.device is None:
+            self.device = self.getDevice()
         if self.device == self.ERR_DEVICE_NOT_FOUND:
             self.txtWrite("Pinguino not found\n")
             self.txtWrite("Is your device connected and/or in bootloader mode ?\n")
-            return
+            return self.ERR_DEVICE_NOT_FOUND
         else:
             self.txtWrite("Pinguino found\n")
 
@@ -479,7 +551,7 @@ class uploader8(baseUploader):
         if self.handle == self.ERR_USB_INIT1:
             self.txtWrite("Upload not possible\n")
             self.txtWrite("Try to restart the bootloader mode\n")
-            return
+            return self.ERR_USB_INIT1
 
         # find out the processor
         # ----------------------------------------------------------------------
@@ -488,7 +560,8 @@ class uploader8(baseUploader):
         proc = self.getDeviceName(device_id)
         if proc != self.board.proc:
             self.txtWrite("Compiled for %s but device has %s\n" % (self.board.proc, proc))
-            return
+            self.closeDevice()
+            return self.ERR_DEVICE_NOT_FOUND
         self.txtWrite("%s (id=%s)\n" % (proc, hex(device_id)))
 
         # find out bootloader version
@@ -496,7 +569,9 @@ class uploader8(baseUploader):
 
         #product = handle.getString(device.iProduct, 30)
         #manufacturer = handle.getString(device.iManufacturer, 30)
-        self.txtWrite("Pinguino bootloader v%s\n" % self.getVersion())
+        version = self.getVersion()
+        self.txtWrite("Pinguino bootloader v%s\n" % version)
+        self.emit('found', proc=proc, bootloader=version)
 
         # start writing
         # ----------------------------------------------------------------------
@@ -504,25 +579,42 @@ class uploader8(baseUploader):
         self.txtWrite("Writing ...\n")
         status = self.hexWrite(self.filename, self.board)
         if status == self.ERR_NONE:
+            if self.mode == self.UPLOAD_DELTA:
+                self.txtWrite("%d of %d rows changed\n" % (self.rowsWritten, self.rowsTotal))
             self.txtWrite(os.path.basename(self.filename) + " successfully uploaded\n")
+            if self.verify:
+                status = self.verifyImage(self.image)
+                if status != self.ERR_NONE:
+                    self.closeDevice()
+                    return status
         if status == self.ERR_HEX_RECORD:
             self.txtWrite("Record error\n")
             self.closeDevice()
-            return
+            return status
         if status == self.ERR_HEX_CHECKSUM:
             self.txtWrite("Checksum error\n")
             self.closeDevice()
-            return
+            return status
+        if status == self.ERR_HEX_SYNTAX:
+            self.txtWrite("Syntax error\n")
+            self.closeDevice()
+            return status
+        if status == self.ERR_USB_WRITE:
+            for address in self.failed:
+                self.txtWrite("Write error at 0x%06X\n" % address)
+            self.closeDevice()
+            return status
         if status == self.ERR_USB_ERASE:
             self.txtWrite("Erase error\n")
             self.closeDevice()
-            return
+            return status
 
         # reset and start start user's app.
         # ----------------------------------------------------------------------
 
         self.txtWrite("Resetting ...\n")
+        self.emit('reset')
         self.resetDevice()
         self.closeDevice()
-        return
+        return self.ERR_NONE
 # ------------------------------------------------------------------------------
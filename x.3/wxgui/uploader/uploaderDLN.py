@@ -32,7 +32,10 @@ import sys
 import os
 import usb			# checked in check.py
 
-class uploaderDLN:
+from uploader import baseUploader
+from wxgui.hexfile import readHex, HexError, HexChecksumError, HexRecordError
+
+class uploaderDLN(baseUploader):
 	""" upload .hex into pinguino device """
 
 	# Bootloader commands
@@ -128,12 +131,12 @@ class uploaderDLN:
 		}
 
 # ------------------------------------------------------------------------------
-	def initDevice(self, device):
+	def initDevice(self):
 # ------------------------------------------------------------------------------
 		""" init pinguino device """
-		conf = device.configurations[0]
+		conf = self.device.configurations[0]
 		iface = conf.interfaces[0][0]
-		handle = device.open()
+		handle = self.device.open()
 		if handle:
 			if sys.platform == 'win32':
 				handle.setConfiguration(conf)
@@ -171,13 +174,13 @@ class uploaderDLN:
 			timeout: operation timeout in miliseconds. (default: 100)
 		Returns the number of bytes written.
 		"""
-		sent_bytes = handle.controlMsg(0x21, 0x09, usbBuf, 0x00, 0x00, self.DLN_TIMEOUT)
+		sent_bytes = self.handle.controlMsg(0x21, 0x09, usbBuf, 0x00, 0x00, self.DLN_TIMEOUT)
 		if sent_bytes == len(usbBuf):
 			return self.ERR_NONE
 		else:		
 			return self.ERR_USB_WRITE
 # ------------------------------------------------------------------------------
-	def transaction(self, handle, usbBuf):
+	def transaction(self, usbBuf):
 # ------------------------------------------------------------------------------
 		"""
 		Write a data packet to currently-open USB device 
@@ -193,31 +196,31 @@ class uploaderDLN:
 		"""
 		retry = 0
 		while retry < self.MAX_HID_RETRY:
-			status = self.usbWrite(handle, usbBuf)
+			status = self.usbWrite(usbBuf)
 			if status == self.ERR_NONE:
-				return handle.interruptRead(1, 64, self.DLN_TIMEOUT)
-				#return handle.interruptRead(1, len(usbBuf), self.DLN_TIMEOUT)
+				return self.handle.interruptRead(1, 64, self.DLN_TIMEOUT)
+				#return self.handle.interruptRead(1, len(usbBuf), self.DLN_TIMEOUT)
 			else:
 				retry = retry + 1
 		return self.ERR_USB_WRITE
 # ------------------------------------------------------------------------------
-	def reset(self, handle):
+	def reset(self):
 # ------------------------------------------------------------------------------
 		""" reset device """
 		usbBuf = [0] * 64
 		# command code
 		usbBuf[self.BOOT_CMD] = self.DLN_RESET_CMD
 		# write data packet
-		return self.usbWrite(handle, usbBuf)
+		return self.usbWrite(usbBuf)
 # ------------------------------------------------------------------------------
-	def getVersion(self, handle):
+	def getVersion(self):
 # ------------------------------------------------------------------------------
 		""" get bootloader version """
 		usbBuf = [0] * 64
 		# command code
 		usbBuf[self.BOOT_CMD] = self.DLN_GET_FW_VER_CMD
 		# write data packet and get response
-		usbBuf = self.transaction(handle, usbBuf)
+		usbBuf = self.transaction(usbBuf)
 		if usbBuf == self.ERR_USB_WRITE:
 			return self.ERR_USB_WRITE
 		else:		
@@ -226,14 +229,14 @@ class uploaderDLN:
 					str(usbBuf[self.BOOT_VER_MINOR]) + "." + \
 					str(usbBuf[self.BOOT_VER_SUBMINOR])
 # ------------------------------------------------------------------------------
-	def getDeviceID(self, handle):
+	def getDeviceID(self):
 # ------------------------------------------------------------------------------
 		""" read Device ID """
 		usbBuf = [0] * 64
 		# command code
 		usbBuf[self.BOOT_CMD] = self.DLN_READ_DEVID_CMD
 		# write data packet and get response
-		usbBuf = self.transaction(handle, usbBuf)
+		usbBuf = self.transaction(usbBuf)
 		if usbBuf == self.ERR_USB_WRITE:
 			return self.ERR_USB_WRITE
 		else:		
@@ -258,7 +261,7 @@ class uploaderDLN:
 				return self.devices_table[n][0]
 		return self.ERR_DEVICE_NOT_FOUND
 # ------------------------------------------------------------------------------
-	def eraseFlash(self, handle, address, size64):
+	def eraseFlash(self, address, size64):
 # ------------------------------------------------------------------------------
 		""" erase n * 64-byte blocks of flash memory """
 		usbBuf = [0] * 64
@@ -274,10 +277,10 @@ class uploaderDLN:
 		usbBuf[self.BOOT_SIZE] = size64
 		# write data packet and get response
 		#print usbBuf
-		usbBuf = self.transaction(handle, usbBuf)
+		usbBuf = self.transaction(usbBuf)
 		#print usbBuf
 # ------------------------------------------------------------------------------
-	def writeFlash(self, handle, address, block):
+	def writeFlash(self, address, block):
 # ------------------------------------------------------------------------------
 		""" write a block of code """
 		usbBuf = [0xFF] * 64
@@ -299,10 +302,10 @@ class uploaderDLN:
 			usbBuf[self.BOOT_CODE + i] = block[i]
 		# write data packet on usb device
 		#print usbBuf
-		usbBuf = self.transaction(handle, usbBuf)
+		usbBuf = self.transaction(usbBuf)
 		#print usbBuf
 # ------------------------------------------------------------------------------
-	def hexWrite(self, handle, filename, board):
+	def hexWrite(self):
 # ------------------------------------------------------------------------------
 		""" Parse the Hex File Format and send data to usb device """
 
@@ -317,193 +320,139 @@ class uploaderDLN:
 				03 + 00 + 30 + 00 + 02 + 33 + 7A = E2, 2's complement is 1E
 		"""
 
-		data		= []
-		old_address = 0
-		max_address	= 0
-		address_Hi	= 0
-		codesize	= 0
-
 		# read hex file
 		# ----------------------------------------------------------------------
 
-		fichier = open(filename,'r')
-		lines = fichier.readlines()
-		fichier.close()
-
-		# 1st pass : calculate checksum and max_address
-		# ----------------------------------------------------------------------
-
-		for line in lines:
-			byte_count = int(line[1:3], 16)
-			address_Lo = int(line[3:7], 16) # lower 16 bits (bits 0-15) of the data address
-			record_type= int(line[7:9], 16)
-			
-			address = (address_Hi << 16) + address_Lo
-
-			# checksum calculation
-			end = 9 + byte_count * 2 # position of checksum at end of line
-			checksum = int(line[end:end+2], 16)
-			cs = 0
-			i = 1
-			while i < end:
-				cs = cs + (0x100 - int(line[i:i+2], 16) ) & 0xff # not(i)
-				i = i + 2
-			if checksum != cs:
-				return self.ERR_HEX_CHECKSUM
-
-			# extended linear address record
-			if record_type == self.Extended_Linear_Address_Record:
-				address_Hi = int(line[9:13], 16) << 16 # upper 16 bits (bits 16-31) of the data address
-				address = (address_Hi << 16) + address_Lo
-
-			# code size
-			if address >= board.memstart:
-				codesize = codesize + byte_count
-
-			# max address
-			if (address > old_address) and (address < board.memend):
-				max_address = address + byte_count
-				old_address = address
-
+		try:
+			image = readHex(self.filename)
+		except HexChecksumError:
+			return self.ERR_HEX_CHECKSUM
+		except HexRecordError:
+			return self.ERR_HEX_RECORD
+		except HexError:
+			return self.ERR_HEX_SYNTAX
+
+		board = self.board
+		self.codesize = image.getSize(board.memstart)
+
+		max_address = image.getEnd(board.memstart, board.memend)
+		if max_address is None:
+			max_address = board.memstart
 		max_address = max_address + 64 - (max_address % 64)
 		#print memstart, max_address, memend
 
-		# fill data sequence with 0xFF
+		# data from memstart to max_address, filled with 0xFF
 		# ----------------------------------------------------------------------
 
-		for i in range(max_address - board.memstart):
-			data.append(0xFF)
-
-		# 2nd pass : parse bytes from line into data
-		# ----------------------------------------------------------------------
-
-		address_Hi	= 0
-
-		for line in lines:
-			byte_count = int(line[1:3], 16)
-			address_Lo = int(line[3:7], 16) # four hex digits
-			record_type= int(line[7:9], 16)
-
-			# 32-bit address
-			address = (address_Hi << 16) + address_Lo
-			#print hex(address)
-
-			# data record
-			if record_type == self.Data_Record:
-				if (address >= board.memstart) and (address < board.memend):
-					#print hex(address)
-					for i in range(byte_count):
-						#print address - memstart + i
-						#print int(line[9 + (2 * i) : 11 + (2 * i)], 16)
-						data[address - board.memstart + i] = int(line[9 + (2 * i) : 11 + (2 * i)], 16)
-					
-			# end of file record
-			elif record_type == self.End_Of_File_Record:
-				break
-
-			# extended linear address record
-			elif record_type == self.Extended_Linear_Address_Record:
-				address_Hi = int(line[9:13], 16) # upper 16 bits (bits 16-31) of the data address
-				#print "address_Hi = " + hex(address_Hi)
-
-			# unsupported record type
-			else:
-				return self.ERR_HEX_RECORD
+		data = image.getRange(board.memstart, max_address)
 
 		# erase memory from memstart to max_address 
 		# ----------------------------------------------------------------------
 
 		size64 = (max_address - board.memstart) / 64
 		if size64 > 511:
-			return ERR_USB_ERASE
+			return self.ERR_USB_ERASE
+		self.emit('erase_start', address=board.memstart, size=max_address - board.memstart)
 		if size64 < 256:
-			self.eraseFlash(handle, board.memstart, size64)
+			self.eraseFlash(board.memstart, size64)
 		else:
 			# erase flash memory from memstart to memstart + 0x4000
-			self.eraseFlash(handle, board.memstart, 255)
+			self.eraseFlash(board.memstart, 255)
 			# erase flash memory from memstart + 0x4000 to max_address
 			size64 = size64 - 255
-			self.eraseFlash(handle, board.memstart + 0x4000, size64)
+			self.eraseFlash(board.memstart + 0x4000, size64)
+		self.emit('erase_end')
 
 		# write 32-bit blocks
 		# ----------------------------------------------------------------------
 
-		usbBuf = []
-		for addr in range(board.memstart, max_address):
+		self.startWrite(max_address - board.memstart)
+		for addr in range(board.memstart, max_address, self.DLN_BLOCKSIZE):
 			index = addr - board.memstart
-			#print hex(addr)
-			if addr % self.DLN_BLOCKSIZE == 0:
-				if usbBuf != []:
-					#print usbBuf
-					self.writeFlash(handle, addr - self.DLN_BLOCKSIZE, usbBuf)
-				usbBuf = []
-			if data[index] != []:
-				#print data[addr - memstart]
-				usbBuf.append(data[index])
+			self.writeFlash(addr, data[index:index + self.DLN_BLOCKSIZE])
+			self.progress(index + self.DLN_BLOCKSIZE)
 		#print "%d bytes written.\n" % codesize
 
 		return self.ERR_NONE
 # ------------------------------------------------------------------------------
-	def writeHex(self, output, filename, board):
+	def verifyFlash(self, image):
+# ------------------------------------------------------------------------------
+		""" the bootloader has no read command """
+		return None
 # ------------------------------------------------------------------------------
-		fichier = open(filename, 'r')
+	def writeHex(self):
+# ------------------------------------------------------------------------------
+		fichier = open(self.filename, 'r')
 		if fichier == "":
-			self.txtWrite(output, "Unable to open %s\n" % filename)
-			return
+			self.txtWrite("Unable to open %s\n" % self.filename)
+			return self.ERR_HEX_OPEN
 		fichier.close()
 
-		device = self.getDevice(board)
-		if device == self.ERR_DEVICE_NOT_FOUND:
-			self.txtWrite(output, "Pinguino not found\n")
-			self.txtWrite(output, "Is your device connected and/or in bootloader mode ?\n")
-			return
+		# device is already set when several boards are flashed at once
+		if self.device is None:
+			self.device = self.getDevice()
+		if self.device is self.ERR_DEVICE_NOT_FOUND:
+			self.txtWrite("Pinguino not found\n")
+			self.txtWrite("Is your device connected and/or in bootloader mode ?\n")
+			return self.ERR_DEVICE_NOT_FOUND
 		else:
-			self.txtWrite(output, "Pinguino found\n")
+			self.txtWrite("Pinguino found\n")
 
-		handle = self.initDevice(device)
-		if handle == self.ERR_USB_INIT1:
-			self.txtWrite(output, "Upload not possible\n")
-			self.txtWrite(output, "Try to restart the bootloader mode\n")
-			return
+		self.handle = self.initDevice()
+		if self.handle == self.ERR_USB_INIT1:
+			self.txtWrite("Upload not possible\n")
+			self.txtWrite("Try to restart the bootloader mode\n")
+			return self.ERR_USB_INIT1
 
-		device_id = self.getDeviceID(handle)
+		device_id = self.getDeviceID()
 		proc = self.getDeviceName(device_id)
-		if proc != board.proc:
-			self.txtWrite(output, "Compiled for %s but device has %s\n" % (board.proc, proc))
-			return
+		if proc != self.board.proc:
+			self.txtWrite("Compiled for %s but device has %s\n" % (self.board.proc, proc))
+			self.closeDevice()
+			return self.ERR_DEVICE_NOT_FOUND
 		#memend = self.getDeviceFlash(device_id)
-		self.txtWrite(output, "%s (id=%s)\n" % (proc, hex(device_id)))
-		self.txtWrite(output, "%d bytes free\n" % (board.memend - board.memstart))
+		self.txtWrite("%s (id=%s)\n" % (proc, hex(device_id)))
+		self.txtWrite("%d bytes free\n" % (self.board.memend - self.board.memstart))
 
 		#product = handle.getString(device.iProduct, 30)
 		#manufacturer = handle.getString(device.iManufacturer, 30)
-		self.txtWrite(output, "Pinguino HID bootloader %s\n" % self.getVersion(handle))
-
-		if filename == '':
-			self.txtWrite(output, "No program to write\n")
-			self.closeDevice(handle)
-			return
-
-		self.txtWrite(output, "Writing ...\n")
-		status = self.hexWrite(handle, filename, board)
+		version = self.getVersion()
+		self.txtWrite("Pinguino HID bootloader %s\n" % version)
+		self.emit('found', proc=proc, bootloader=version)
+
+		if self.filename == '':
+			self.txtWrite("No program to write\n")
+			self.closeDevice()
+			return self.ERR_HEX_OPEN
+
+		# the rows holding code can't be read back, all the code is written
+		self.txtWrite("Writing ...\n")
+		status = self.hexWrite()
 		if status == self.ERR_NONE:
-			self.txtWrite(output, os.path.basename(filename) + " successfully uploaded\n")
+			self.txtWrite(os.path.basename(self.filename) + " successfully uploaded\n")
+			if self.verify:
+				self.verifyImage(None)
 		if status == self.ERR_HEX_RECORD:
-			self.txtWrite(output, "Record error\n")
-			self.closeDevice(handle)
-			return
+			self.txtWrite("Record error\n")
+			self.closeDevice()
+			return status
 		if status == self.ERR_HEX_CHECKSUM:
-			self.txtWrite(output, "Checksum error\n")
-			self.closeDevice(handle)
-			return
+			self.txtWrite("Checksum error\n")
+			self.closeDevice()
+			return status
+		if status == self.ERR_HEX_SYNTAX:
+			self.txtWrite("Syntax error\n")
+			self.closeDevice()
+			return status
 		if status == self.ERR_USB_ERASE:
-			self.txtWrite(output, "Erase error\n")
-			self.closeDevice(handle)
-			return
+			self.txtWrite("Erase error\n")
+			self.closeDevice()
+			return status
 
 		# Disable EIS and Start User App.
-		self.txtWrite(output, "Resetting ...\n")
-		self.reset(handle)
-		self.closeDevice(handle)
-		return
+		self.txtWrite("Resetting ...\n")
+		self.emit('reset')
+		self.reset()
+		self.closeDevice()
+		return self.ERR_NONE
 # ------------------------------------------------------------------------------
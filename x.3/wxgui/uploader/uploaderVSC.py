@@ -32,6 +32,7 @@ import os
 import usb			# checked in check.py
 
 from uploader import baseUploader
+from wxgui.hexfile import readHex, HexError, HexChecksumError, HexRecordError
 
 class uploaderVSC(baseUploader):
 	""" upload .hex into pinguino device """
@@ -49,6 +50,7 @@ class uploaderVSC(baseUploader):
 	# boot command size in bytes
 	VSC_BOOT_CMD_SIZE				=	4
 	VSC_BLOCKSIZE					=	32
+	READSIZE						=	32
 
 	# bulk endpoints
 	VSC_IN_EP						=	0x82	# endpoint for Bulk reads
@@ -59,6 +61,10 @@ class uploaderVSC(baseUploader):
 	VSC_ACTIVE_CONFIG				=	0x02
 	VSC_TIMEOUT						=	200
 
+	# rows erased and written in delta mode
+	rowsTotal						=	0
+	rowsWritten						=	0
+
 	# Table with supported USB devices
 	# device_id:[PIC name, flash size(in bytes), eeprom size (in bytes)] 
 	# --------------------------------------------------------------------------
@@ -121,6 +127,42 @@ class uploaderVSC(baseUploader):
 			usbBuf = usbBuf + chr(block[i])
 		# write data packet on usb device
 		self.usbWrite(usbBuf)
+# ------------------------------------------------------------------------------
+	def sendRead(self, address, length):
+# ------------------------------------------------------------------------------
+		""" ask for a block of flash, the bootloader answers with 32 bytes """
+		# command
+		cmd = self.VSC_READ_FLASH_CMD
+		# block address
+		address = "%06X" % address
+		addr_lo = int(address[4:6],16)
+		addr_hi = int(address[2:4],16)
+		addr_up = int(address[0:2],16)
+		usbBuf = chr(cmd) + chr(addr_lo) + chr(addr_hi) + chr(addr_up)
+		try:
+			return self.usbWrite(usbBuf)
+		except usb.USBError:
+			return self.ERR_USB_WRITE
+# ------------------------------------------------------------------------------
+	def receiveRead(self, length):
+# ------------------------------------------------------------------------------
+		""" first length bytes of the answer to a read, None if it can't be read """
+		try:
+			usbBuf = self.handle.bulkRead(self.VSC_IN_EP, self.VSC_BLOCKSIZE, self.VSC_TIMEOUT)
+		except usb.USBError:
+			return None
+		if len(usbBuf) != self.VSC_BLOCKSIZE:
+			return None
+		return bytearray(usbBuf[:length])
+# ------------------------------------------------------------------------------
+	def verifyFlash(self, image):
+# ------------------------------------------------------------------------------
+		""" read back the code of image, return the [first, last) address
+		ranges where the device differs, None if the bootloader doesn't
+		answer the read command """
+		if not self.readBlocks([(self.board.memstart, self.VSC_BLOCKSIZE)]):
+			return None
+		return baseUploader.verifyFlash(self, image)
 # ------------------------------------------------------------------------------
 	def hexWrite(self):
 # ------------------------------------------------------------------------------
@@ -137,110 +179,84 @@ class uploaderVSC(baseUploader):
 				03 + 00 + 30 + 00 + 02 + 33 + 7A = E2, 2's complement is 1E
 		"""
 
-		data = []
-		old_address = 0
-		max_address = 0
-		address_Hi	= 0
-		codesize	= 0
-
 		# read hex file
 		# ----------------------------------------------------------------------
 
-		fichier = open(self.filename,'r')
-		lines = fichier.readlines()
-		fichier.close()
-
-		# 1st pass : calculate checksum and max address
-		# ----------------------------------------------------------------------
-
-		i = 0
-		for line in lines:
-			byte_count = int(line[1:3], 16)
-			address_Lo = int(line[3:7], 16) # lower 16 bits (bits 0-15) of the data address
-			record_type= int(line[7:9], 16)
-			i+=1
-			
-			address = (address_Hi << 16) + address_Lo
-
-			# checksum calculation
-			end = 9 + byte_count * 2 # position of checksum at end of line
-			checksum = int(line[end:end+2], 16)
-			cs = 0
-			i = 1
-			while i < end:
-				cs = cs + (0x100 - int(line[i:i+2], 16) ) & 0xff # not(i)
-				i = i + 2
-			if checksum != cs:
-				return self.ERR_HEX_CHECKSUM
-
-			# extended linear address record
-			if record_type == self.Extended_Linear_Address_Record:
-				address_Hi = int(line[9:13], 16) << 16 # upper 16 bits (bits 16-31) of the data address
-
-			# code size
-			if address >= self.board.memstart:
-				codesize = codesize + byte_count
-
-			# max address
-			if (address > old_address) and (address < self.board.memend):
-				max_address = address + byte_count
-				old_address = address
-
+		try:
+			image = readHex(self.filename)
+		except HexChecksumError:
+			return self.ERR_HEX_CHECKSUM
+		except HexRecordError:
+			return self.ERR_HEX_RECORD
+		except HexError:
+			return self.ERR_HEX_SYNTAX
+
+		self.codesize = image.getSize(self.board.memstart)
+		# kept for verifyFlash
+		self.image = image
+
+		if self.mode != self.UPLOAD_FULL:
+			return self.hexWriteRows(image)
+
+		max_address = image.getEnd(self.board.memstart, self.board.memend)
+		if max_address is None:
+			max_address = self.board.memstart
 		max_address = max_address + 64 - (max_address % 64)
 		#self.txtWrite(output, "%d bytes to write\n" % codesize)
 
-		# fill data sequence with 0xFF
-		# ----------------------------------------------------------------------
-
-		for i in range(self.board.memstart, max_address + 64):
-			#print i
-			data.append(0xFF)
-
-		# 2nd pass : parse bytes from line into data
+		# data from self.board.memstart to max_address + 64, filled with 0xFF
 		# ----------------------------------------------------------------------
 
-		address_Hi	= 0
-
-		for line in lines:
-			byte_count = int(line[1:3], 16)
-			address_Lo = int(line[3:7], 16) # four hex digits
-			record_type= int(line[7:9], 16)
-
-			address = (address_Hi << 16) + address_Lo
-
-			# data record
-			if record_type == self.Data_Record:
-				if (address >= self.board.memstart) and (address < self.board.memend):
-					for i in range(byte_count):
-						data[address - self.board.memstart + i] = int(line[9 + (2 * i) : 11 + (2 * i)], 16)
-
-			# end of file record
-			elif record_type == self.End_Of_File_Record:
-				break
-
-			# extended linear address record
-			elif record_type == self.Extended_Linear_Address_Record:
-				address_Hi = int(line[9:13], 16) # upper 16 bits (bits 16-31) of the data address
-
-			# unsupported record type
-			else:
-				return self.ERR_HEX_RECORD
+		data = image.getRange(self.board.memstart, max_address + 64)
 
 		# erase and write blocks 
 		# ----------------------------------------------------------------------
 
-		usbBuf = []
-		for i in range(self.board.memstart, max_address + 64):
-			if i % 64 == 0:
-				self.eraseBlock(i)
-			if i % self.VSC_BLOCKSIZE == 0:
-				if usbBuf != []:
-					self.issueBlock(i - self.VSC_BLOCKSIZE, usbBuf)
-				usbBuf = []
-			if data[i - self.board.memstart] != []:
-				usbBuf.append(data[i - self.board.memstart])
+		self.eraseRows(self.board.memstart, max_address + 64)
+		self.startWrite(max_address + 64 - self.board.memstart)
+		for i in range(self.board.memstart, max_address + 64, self.VSC_BLOCKSIZE):
+			index = i - self.board.memstart
+			self.issueBlock(i, data[index:index + self.VSC_BLOCKSIZE])
+			self.progress(index + self.VSC_BLOCKSIZE)
 
 		return self.ERR_NONE
+# ------------------------------------------------------------------------------
+	def eraseRows(self, first, last):
+# ------------------------------------------------------------------------------
+		""" erase the 64-byte rows from first to last """
+		self.emit('erase_start', address=first, size=last - first)
+		for i in range(first, last, 64):
+			self.eraseBlock(i)
+		self.emit('erase_end')
+# ------------------------------------------------------------------------------
+	def hexWriteRows(self, image):
+# ------------------------------------------------------------------------------
+		""" erase only the 64-byte rows holding code and write only its non blank blocks
+
+		in delta mode, rows which already hold the same code are skipped """
+		self.rowsTotal = 0
+		self.rowsWritten = 0
+		rowruns = self.getRowRuns(image, self.board.memstart, self.board.memend, 64)
+		self.startWrite(sum([last - first for first, last in rowruns]))
+		done = 0
+		for first, last in rowruns:
+			data = image.getRange(first, last)
+			self.rowsTotal = self.rowsTotal + (last - first) / 64
+			if self.mode == self.UPLOAD_DELTA:
+				runs = self.getChangedRuns(first, data, 64)
+			else:
+				runs = [(first, last)]
+			for start, end in runs:
+				self.rowsWritten = self.rowsWritten + (end - start) / 64
+				self.eraseRows(start, end)
+				for i in range(start, end, self.VSC_BLOCKSIZE):
+					block = data[i - first:i - first + self.VSC_BLOCKSIZE]
+					if not self.isBlank(block):
+						self.issueBlock(i, block)
+					self.progress(done + i + self.VSC_BLOCKSIZE - first)
+			done = done + last - first
+			self.progress(done)
+		return self.ERR_NONE
 # ------------------------------------------------------------------------------
 	def writeHex(self):
 # ------------------------------------------------------------------------------
@@ -250,23 +266,24 @@ class uploaderVSC(baseUploader):
 
 		if self.filename == '':
 			self.txtWrite("No program to write\n")
-			self.closeDevice(handle)
-			return
+			return self.ERR_HEX_OPEN
 
 		fichier = open(self.filename, 'r')
 		if fichier == "":
 			self.txtWrite("Unable to open %s\n" % self.filename)
-			return
+			return self.ERR_HEX_OPEN
 		fichier.close()
 
 		# search for a Pinguino board
 		# ----------------------------------------------------------------------
 
-		self.device = self.getDevice()
+		# device is already set when several boards are flashed at once
+		if self.device is None:
+			self.device = self.getDevice()
 		if self.device is self.ERR_DEVICE_NOT_FOUND:
 			self.txtWrite("Pinguino not found\n")
 			self.txtWrite("Is your device connected and/or in bootloader mode ?\n")
-			return
+			return self.ERR_DEVICE_NOT_FOUND
 		else:
 			self.txtWrite("Pinguino found\n")
 
@@ -274,7 +291,7 @@ class uploaderVSC(baseUploader):
 		if self.handle is self.ERR_USB_INIT1:
 			self.txtWrite("Upload not possible\n")
 			self.txtWrite("Try to restart the bootloader mode\n")
-			return
+			return self.ERR_USB_INIT1
 
 		# find out bootloader version
 		# ----------------------------------------------------------------------
@@ -282,6 +299,7 @@ class uploaderVSC(baseUploader):
 		#product = handle.getString(device.iProduct, 30)
 		#manufacturer = handle.getString(device.iManufacturer, 30)
 		self.txtWrite("Bootloader v2.12\n")
+		self.emit('found', proc=self.board.proc, bootloader="2.12")
 
 		# start writing
 		# ----------------------------------------------------------------------
@@ -289,11 +307,24 @@ class uploaderVSC(baseUploader):
 		self.txtWrite("Writing ...\n")
 		status = self.hexWrite()
 		if status == self.ERR_NONE:
+			if self.mode == self.UPLOAD_DELTA:
+				self.txtWrite("%d of %d rows changed\n" % (self.rowsWritten, self.rowsTotal))
 			self.txtWrite(os.path.basename(self.filename) + " successfully uploaded\n")
+			if self.verify:
+				status = self.verifyImage(self.image)
+				if status != self.ERR_NONE:
+					self.closeDevice()
+					return status
 		if status == self.ERR_HEX_RECORD:
 			self.txtWrite("Record error\n")
 		if status == self.ERR_HEX_CHECKSUM:
 			self.txtWrite("Checksum error\n")
+		if status == self.ERR_HEX_SYNTAX:
+			self.txtWrite("Syntax error\n")
+		if status == self.ERR_NONE:
+			# v2.12 has no reset command, the code starts when the board is reset by hand
+			self.emit('reset', sent=False)
 
 		self.closeDevice()
+		return status
 # ------------------------------------------------------------------------------